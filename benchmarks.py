@@ -0,0 +1,183 @@
+"""Benchmarks for the minigames' engines. Run `python benchmarks.py [name ...]` to run some of
+the benchmarks (all of them if no name is given), and `python benchmarks.py --list` to list them.
+
+Every benchmark is a function taking no arguments that prints its own results, and is registered
+in BENCHMARKS with the `benchmark` decorator.
+"""
+import argparse
+import random
+import time
+
+BENCHMARKS = {}
+
+def benchmark(func):
+    """Registers `func` in BENCHMARKS under its name, without the `bench_` prefix."""
+    BENCHMARKS[func.__name__.replace('bench_', '', 1)] = func
+    return func
+
+def timed(func, *args, **kwargs):
+    """Calls `func` with the arguments given.
+
+    Returns:
+        tuple: The result of the call in tuple[0], and the time it took in seconds in tuple[1].
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+@benchmark
+def bench_hangman_solver():
+    """Time taken by hangman_solver.HangmanSolver to build its bitsets and play whole games."""
+    import minigames
+    game = minigames.Hangman()
+    solver = game.solver
+    rng = random.Random(0)
+    for length in (5, 8, 12):
+        _, buildTime = timed(solver.index_for, length)
+        _, hintTime = timed(solver.best_letter, '_' * length, set())
+        print("length %2d: %5d words, index built in %.2f ms, first hint in %.3f ms"
+              % (length, solver.index_for(length).size, buildTime * 1000, hintTime * 1000))
+    words = [game.words.random_word(rng=rng) for i in range(500)]
+    results, playTime = timed(lambda: [solver.play(word) for word in words])
+    wins = sum(won for won, _ in results)
+    print("played %d games in %.2f s (%.3f ms per game), won %d"
+          % (len(words), playTime, playTime * 1000 / len(words), wins))
+
+@benchmark
+def bench_evil_hangman_partition():
+    """Time taken by hangman_solver.WordFamilies to partition the words on every guess."""
+    import hangman_solver
+    import minigames
+    import utils
+    game = minigames.Hangman()
+    modes = [False, True] if utils.get_numpy() is not None else [False]
+    if utils.get_numpy() is None:
+        print("NumPy is not installed; only the pure Python partition is measured.")
+    for length in (5, 8, 11):
+        for useNumpy in modes:
+            families = hangman_solver.WordFamilies(game.words, length, useNumpy=useNumpy)
+            pattern = ['_'] * length
+            guessedLetters = set()
+            splitTimes = []
+            # Guess like a good player would, so the partitions stay realistic.
+            while '_' in pattern and len(families) > 1:
+                letter, _ = game.solver.best_letter(pattern, guessedLetters)
+                if letter is None:
+                    break
+                positions, splitTime = timed(families.split, letter)
+                splitTimes.append(splitTime)
+                guessedLetters.add(letter)
+                for position in positions:
+                    pattern[position] = letter
+            print("length %2d, %-6s: %5d words, first split %.2f ms, mean split %.3f ms over %d guesses"
+                  % (length, "numpy" if useNumpy else "python", game.words.lengths[length][1] - game.words.lengths[length][0],
+                     splitTimes[0] * 1000, sum(splitTimes) * 1000 / len(splitTimes), len(splitTimes)))
+
+@benchmark
+def bench_puzzle_solver():
+    """Time taken by the dancing links solver to find the first and all solutions of Fix the Puzzle."""
+    import minigames
+    import polyomino
+    puzzle = minigames.Puzzle()
+    solutions = polyomino.iter_solutions(puzzle.blocks, puzzle.width, puzzle.height)
+    _, firstTime = timed(next, solutions)
+    print("time to first solution: %.1f ms" % (firstTime * 1000))
+    count, allTime = timed(polyomino.count_solutions, puzzle.blocks, puzzle.width, puzzle.height)
+    print("time to all %d solutions: %.2f s (%.3f ms per solution)" % (count, allTime, allTime * 1000 / count))
+
+@benchmark
+def bench_mcts():
+    """Playouts per second of the Monte Carlo tree search against the number of worker processes."""
+    import os
+    import bitboard
+    import mcts
+    cpuCount = os.cpu_count() or 1
+    workerCounts = sorted({1 << i for i in range(cpuCount.bit_length())} | {cpuCount})
+    for size, winLength in ((5, 4), (15, 5)):
+        geometry = bitboard.get_geometry(size, winLength)
+        middle = geometry.cellCount // 2
+        # A position with a stone of each side, so there is no win to take straight away.
+        own, other = 1 << middle, 1 << (middle + 1)
+        for workers in workerCounts:
+            player = mcts.MCTSPlayer(geometry, timeLimit=1.0, workers=workers, seed=0)
+            # Start the worker processes before timing.
+            player.best_move(own, other)
+            _, moveTime = timed(player.best_move, own, other)
+            player.close()
+            print("%2dx%-2d board, %2d workers: %7d playouts in %.2f s, %8.0f playouts per second"
+                  % (size, size, workers, player.playouts, moveTime, player.playouts / moveTime))
+
+@benchmark
+def bench_matrix_match():
+    """Time taken to count wildcard patterns in boards of growing sizes, with and without NumPy."""
+    import matrix_match
+    import utils
+    rng = random.Random(0)
+    # The lines of 4 of a side, and the lines going to win, of the old Tic Tac Toe patterns.
+    patterns = [['pppp'], ['p', 'p', 'p', 'p'], ['p---', '-p--', '--p-', '---p'], ['---p', '--p-', '-p--', 'p---'],
+                ['ppp'], ['p', 'p', 'p'], ['p--', '-p-', '--p'], ['--p', '-p-', 'p--']]
+    matcher = matrix_match.PatternMatcher(patterns)
+    modes = [False, True] if utils.get_numpy() is not None else [False]
+    if utils.get_numpy() is None:
+        print("NumPy is not installed; only the pure Python matcher is measured.")
+    for size in (10, 50, 100, 200, 400):
+        board = [[rng.choice('pc ') for col in range(size)] for row in range(size)]
+        times = []
+        for useNumpy in modes:
+            counts, countTime = timed(matcher.count, board, useNumpy)
+            times.append("%-6s %9.2f ms" % ("numpy" if useNumpy else "python", countTime * 1000))
+        print("%3dx%-3d board, %d patterns: %s" % (size, size, len(patterns), ", ".join(times)))
+
+@benchmark
+def bench_tictactoe_scoring():
+    """Time taken to score every move of a Tic Tac Toe board, grid by grid and all at once."""
+    import bitboard
+    import utils
+    rng = random.Random(0)
+    modes = [False, True] if utils.get_numpy() is not None else [False]
+    if utils.get_numpy() is None:
+        print("NumPy is not installed; only the pure Python scoring is measured.")
+    for size, winLength in ((5, 4), (10, 5), (15, 5), (25, 5), (40, 5)):
+        geometry = bitboard.get_geometry(size, winLength)
+        # A board with about a third of the grids taken by each side.
+        own = other = 0
+        for cell in range(geometry.cellCount):
+            side = rng.randrange(3)
+            if side == 0:
+                own |= 1 << cell
+            elif side == 1:
+                other |= 1 << cell
+        free = [cell for cell in range(geometry.cellCount) if not (own | other) >> cell & 1]
+        def by_grid():
+            return [(geometry.wins_with(own, cell), geometry.wins_with(other, cell),
+                     geometry.threatens_with(own, cell), geometry.threatens_with(other, cell)) for cell in free]
+        def all_at_once(useNumpy):
+            return [geometry.completing_moves(own, other, geometry.winLines, useNumpy),
+                    geometry.completing_moves(other, own, geometry.winLines, useNumpy),
+                    geometry.completing_moves(own, other, geometry.threatLines, useNumpy),
+                    geometry.completing_moves(other, own, geometry.threatLines, useNumpy)]
+        all_at_once(utils.get_numpy() is not None)
+        _, gridTime = timed(by_grid)
+        times = ["by grid %8.3f ms" % (gridTime * 1000)]
+        for useNumpy in modes:
+            _, batchTime = timed(all_at_once, useNumpy)
+            times.append("%-6s %8.3f ms" % ("numpy" if useNumpy else "python", batchTime * 1000))
+        print("%2dx%-2d board: %s" % (size, size, ", ".join(times)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmarks.")
+    parser.add_argument('names', nargs='*', help="Benchmarks to run. Defaults all of them.")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit.")
+    args = parser.parse_args()
+    if args.list:
+        for name, func in BENCHMARKS.items():
+            print("%s: %s" % (name, func.__doc__))
+        return
+    for name in args.names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark `%s`" % name)
+        print("== %s ==" % name)
+        BENCHMARKS[name]()
+
+if __name__ == '__main__':
+    main()
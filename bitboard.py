@@ -0,0 +1,194 @@
+"""Bitboards for the Tic Tac Toe game.
+
+A bitboard is an integer with 1 bit for every grid of the board: grid `move` (numbered from 1,
+left to right, then top to bottom, like in the game) is bit `move - 1`. A position is a pair
+of bitboards, one for each side.
+
+Classes:
+    Geometry:
+        The lines of a board of some size, as bitmasks.
+
+Functions:
+    get_geometry(size, winLength):
+        Returns the Geometry of a board, building it only once.
+
+    completes_line(bits, masks):
+        Checks whether `bits` has all the bits of any of the masks.
+
+NumPy is optional. If it is installed, the moves completing a line are found with it on boards
+of at least NUMPY_THRESHOLD grids. It is only imported then, see `utils.get_numpy`.
+"""
+import utils
+from utils import bit_count
+
+# Boards with at least this many grids are scored with NumPy, if it is installed. Below it,
+# turning the bitboards into arrays costs more than it saves.
+NUMPY_THRESHOLD = 400
+
+# Directions of the lines, as (row step, column step): right, down, down-right and down-left.
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+def line_masks(size, length):
+    """Returns the bitmasks of every straight line of `length` grids (horizontal, vertical or
+    diagonal) on a `size` by `size` board."""
+    masks = []
+    for rowStep, colStep in DIRECTIONS:
+        for row in range(size):
+            for col in range(size):
+                endRow, endCol = row + rowStep * (length - 1), col + colStep * (length - 1)
+                if not (0 <= endRow < size and 0 <= endCol < size):
+                    continue
+                mask = 0
+                for step in range(length):
+                    mask |= 1 << ((row + rowStep * step) * size + col + colStep * step)
+                masks.append(mask)
+    return masks
+
+def completes_line(bits, masks):
+    """Checks whether `bits` has all the bits of any mask in `masks`."""
+    for mask in masks:
+        if bits & mask == mask:
+            return True
+    return False
+
+class Geometry:
+    """The lines of a `size` by `size` board where `winLength` in a line wins, as bitmasks.
+
+    Attributes:
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        cellCount (int): Number of grids of the board.
+        full (int): The bitboard with every grid.
+        winLines (list): Masks of every line of `winLength` grids.
+        threatLines (list): Masks of every line of `winLength - 1` grids, a line that is
+                            going to win.
+        winLinesThrough (list): winLinesThrough[cell] is a list of the winning lines through
+                                bit `cell`.
+        threatLinesThrough (list): threatLinesThrough[cell] is a list of the threat lines through
+                                   bit `cell`.
+    """
+    def __init__(self, size, winLength):
+        self.size = size
+        self.winLength = winLength
+        self.cellCount = size * size
+        self.full = (1 << self.cellCount) - 1
+        self.winLines = line_masks(size, winLength)
+        self.threatLines = line_masks(size, winLength - 1) if winLength > 1 else []
+        self.winLinesThrough = [[mask for mask in self.winLines if mask >> cell & 1]
+                                for cell in range(self.cellCount)]
+        self.threatLinesThrough = [[mask for mask in self.threatLines if mask >> cell & 1]
+                                   for cell in range(self.cellCount)]
+        # The grids of `winLines` and `threatLines` as arrays for NumPy, built when needed.
+        self._lineCells = {}
+
+    def wins(self, bits):
+        """Checks whether the bitboard `bits` has a winning line."""
+        return completes_line(bits, self.winLines)
+
+    def wins_with(self, bits, cell):
+        """Checks whether adding bit `cell` to the bitboard `bits` makes a winning line. Only
+        the lines through `cell` are checked."""
+        return completes_line(bits | 1 << cell, self.winLinesThrough[cell])
+
+    def longest_line_through(self, bits, cell):
+        """Returns the length of the longest line of bits of `bits` through bit `cell`, by
+        walking at most `winLength - 1` grids each way along the 4 directions, so it takes
+        O(winLength) steps whatever the size of the board."""
+        row, col = divmod(cell, self.size)
+        longest = 0
+        for rowStep, colStep in DIRECTIONS:
+            length = 1
+            for sign in (1, -1):
+                nextRow, nextCol = row + sign * rowStep, col + sign * colStep
+                while (length < self.winLength and 0 <= nextRow < self.size and 0 <= nextCol < self.size
+                       and bits >> (nextRow * self.size + nextCol) & 1):
+                    length += 1
+                    nextRow, nextCol = nextRow + sign * rowStep, nextCol + sign * colStep
+            longest = max(longest, length)
+        return longest
+
+    def completing_moves(self, bits, other, lines, useNumpy=None):
+        """Returns the bitboard of every free grid that completes a line of `lines` for the side
+        owning `bits` when played, against the side owning `other`. `lines` is `winLines` (the
+        winning moves, like `wins_with`) or `threatLines` (the moves making a line that is going
+        to win, like `threatens_with`).
+
+        All the grids are scored at once: a line is completed by its only grid not in `bits`
+        when it has `length - 1` grids of `bits` and none of `other`. So the cost grows with the
+        number of lines, not with the number of free grids times the lines through each.
+
+        Args:
+            bits (int): Bitboard of the side to score the moves of.
+            other (int): Bitboard of the opponent.
+            lines (list): `winLines` or `threatLines`.
+            useNumpy (bool): Whether to use NumPy. Defaults to whether NumPy is installed and the
+                             board has at least NUMPY_THRESHOLD grids.
+        Returns:
+            int: The bitboard of the moves.
+        """
+        if len(lines) == 0:
+            return 0
+        if useNumpy is None:
+            useNumpy = self.cellCount >= NUMPY_THRESHOLD
+        if useNumpy and utils.get_numpy() is not None:
+            return self._completing_moves_numpy(bits, other, lines)
+        length = bit_count(lines[0])
+        moves = 0
+        for line in lines:
+            if line & other == 0 and bit_count(line & bits) == length - 1:
+                moves |= line
+        return moves & ~bits
+
+    def _line_cells(self, lines):
+        """Returns an array with a row for every line of `lines`, holding the bits of its grids.
+        Built once for `winLines` and `threatLines`, every time for other lines."""
+        numpy = utils.get_numpy()
+        if lines is self.winLines:
+            kind = 'win'
+        elif lines is self.threatLines:
+            kind = 'threat'
+        else:
+            kind = None
+        if kind in self._lineCells:
+            return self._lineCells[kind]
+        lineCells = numpy.array([[cell for cell in range(self.cellCount) if line >> cell & 1]
+                                 for line in lines], dtype=numpy.intp)
+        if kind is not None:
+            self._lineCells[kind] = lineCells
+        return lineCells
+
+    def _to_vector(self, bits):
+        """Returns the bitboard `bits` as a vector of 0s and 1s, one per grid."""
+        numpy = utils.get_numpy()
+        data = numpy.frombuffer(bits.to_bytes((self.cellCount + 7) // 8, 'little'), dtype=numpy.uint8)
+        return numpy.unpackbits(data, bitorder='little')[:self.cellCount]
+
+    def _completing_moves_numpy(self, bits, other, lines):
+        """`completing_moves` with NumPy: the grids of `bits` and `other` on every line are
+        counted at once by gathering the grids of every line."""
+        numpy = utils.get_numpy()
+        lineCells = self._line_cells(lines)
+        ownCounts = self._to_vector(bits)[lineCells].sum(axis=1)
+        otherCounts = self._to_vector(other)[lineCells].sum(axis=1)
+        completed = numpy.zeros(self.cellCount, dtype=numpy.uint8)
+        completed[lineCells[(ownCounts == lineCells.shape[1] - 1) & (otherCounts == 0)].ravel()] = 1
+        moves = int.from_bytes(numpy.packbits(completed, bitorder='little').tobytes(), 'little')
+        return moves & ~bits
+
+    def threatens(self, bits):
+        """Checks whether the bitboard `bits` has a line that is going to win."""
+        return completes_line(bits, self.threatLines)
+
+    def threatens_with(self, bits, cell):
+        """Checks whether adding bit `cell` to the bitboard `bits` makes a line that is going to
+        win through `cell`."""
+        return completes_line(bits | 1 << cell, self.threatLinesThrough[cell])
+
+_GEOMETRIES = {}
+
+def get_geometry(size, winLength):
+    """Returns the Geometry of a `size` by `size` board where `winLength` in a line wins. Every
+    geometry is only built once."""
+    if (size, winLength) not in _GEOMETRIES:
+        _GEOMETRIES[(size, winLength)] = Geometry(size, winLength)
+    return _GEOMETRIES[(size, winLength)]
@@ -1,7 +1,80 @@
 """Command related classes and functions."""
 import game_objects
+import minigames
 import sys
 import utils
+
+# The checks of the basic requirement forms "[adj] [noun]". Each maps `adj` to a function taking
+# the player and `noun`, and returning True if the requirement is fulfilled.
+REQUIREMENT_CHECKS = {
+    # Checks whether the lock is unlocked or not.
+    'unlocked': lambda player, noun: noun in player.unlocked,
+    # Checks whether a container/door is unlocked or not.
+    'opened': lambda player, noun: noun in player.opened,
+    # Checks whether the object is in the player's inventory or not.
+    'collected': lambda player, noun: noun in player.inventory,
+    # Checks whether the password given by the player is the same as the password `noun` given.
+    'password': lambda player, noun: player.enter_password(noun),
+    # Checks whether the player played the game successfully.
+    'played': lambda player, noun: minigames.GAMES[noun].run(),
+}
+
+class Requirement:
+    """A requirement compiled by `compile_requirement`, checked by calling it with the player.
+
+    Attributes:
+        source (str/func): The requirement it was compiled from.
+        checks (list): Tuples (check, noun) that must all be fulfilled, in order, where check is a
+                       function taking the player and `noun`.
+    """
+    def __init__(self, source, checks):
+        self.source = source
+        self.checks = checks
+
+    def __call__(self, player):
+        """Returns True if `player` fulfills every check. Stops at the first check not fulfilled."""
+        for check, noun in self.checks:
+            if not check(player, noun):
+                return False
+        return True
+
+def compile_requirement(req):
+    """Compiles a requirement once, so that checking it does not parse it again.
+
+    Args:
+        req (str/func/Requirement): The requirement. If this is not None, this string must be
+                                    a semicolon-separated of requirements, each having a basic
+                                    requirement form (see `REQUIREMENT_CHECKS`), or a custom
+                                    function that returns True if the requirement is fulfilled.
+    Returns:
+        Requirement: The compiled requirement. Always fulfilled if `req` is None.
+    Raises:
+        ValueError: A requirement in `req` does not have a basic requirement form, or names a
+                    game that does not exist.
+    """
+    if isinstance(req, Requirement):
+        return req
+    elif req is None:
+        return Requirement(None, [])
+    elif callable(req):
+        return Requirement(req, [(lambda player, noun: req(), None)])
+    checks = []
+    for requirement in req.split(';'):
+        try:
+            adj, noun = utils.separate_first_from_last(requirement)
+        except ValueError:
+            raise ValueError("Requirement `%s` in `%s` must be of the form `[adj] [noun]`."
+                             % (requirement.strip(), req)) from None
+        if adj not in REQUIREMENT_CHECKS:
+            raise ValueError("Requirement `%s` in `%s` must start with one of %s."
+                             % (requirement.strip(), req, ', '.join(REQUIREMENT_CHECKS)))
+        # The games are only known once they are set up.
+        if adj == 'played' and len(minigames.GAMES) != 0 and noun not in minigames.GAMES:
+            raise ValueError("Requirement `%s` in `%s` names a game that does not exist."
+                             % (requirement.strip(), req))
+        checks.append((REQUIREMENT_CHECKS[adj], noun))
+    return Requirement(req, checks)
+
 class Command:
     """Describes an executable command in game.
     
@@ -10,9 +83,11 @@ class Command:
                         successMsg is None, does not print anything.
        failMsg (str): Message that will be printed if command fails. If failMsg is None, does
                      not print anything.
-       req (str/func): Basic requirement(s) that must be fulfilled before command can be successful.
-                       If req is None, no requirement is needed to successfully run this command. req
-                       must have a basic requirement form, or a function that returns True if req is fulfilled.
+       req (Requirement): Basic requirement(s) that must be fulfilled before command can be successful,
+                          compiled by `compile_requirement` from a string or a function when the command
+                          is made. If no requirement is given, no requirement is needed to successfully run
+                          this command. The requirement must have a basic requirement form, or be a function
+                          that returns True if req is fulfilled.
 
                        The basic requirements forms are:
                        "unlocked [noun]": Checks whether the lock is unlocked or not.
@@ -34,10 +109,14 @@ class Command:
            Returns the description of this command.
     """
     def __init__(self, commandDescription, successMsg, failMsg, req, onsuccess):
-        """Initialise command."""
+        """Initialise command.
+
+        Raises:
+            ValueError: `req` is not a valid requirement, see `compile_requirement`.
+        """
         self.successMsg = successMsg
         self.failMsg = failMsg
-        self.req = req
+        self.req = compile_requirement(req)
         self.onsuccess = onsuccess
         self.description = commandDescription
 
@@ -49,7 +128,7 @@ class Command:
         Returns:
             None
         """
-        if player.fulfill_requirement(self.req):
+        if self.req(player):
             if self.successMsg is not None:
                 print(self.successMsg)
             if self.onsuccess != None:
@@ -83,6 +162,104 @@ def handle_repeated_command(gameObject, counterVar, timesNeeded, onsuccessMsg, o
     else:
         gameObject.kwargs[counterVar] += 1
 
+class CommandGrammar:
+    """The game's own commands (eg. `enter [place]`, `show inventory`), as a trie over their
+    words, so that a line is resolved in one walk down the trie whatever the number of commands.
+    A command may have many words, and may be followed by a noun, the rest of the line.
+
+    Attributes:
+        root (dict): The root of the trie. A node maps a word to the next node, and '' (which is
+                     never a word) to a dictionary mapping whether the command takes a noun to
+                     the command's handler.
+
+    Methods:
+        add(phrase, handler, takesNoun=False):
+            Adds a command.
+
+        resolve(words):
+            Returns the handler of the longest command matching a line, and its noun.
+    """
+    def __init__(self):
+        self.root = {}
+
+    def add(self, phrase, handler, takesNoun=False):
+        """Adds the command `phrase`, handled by `handler`.
+
+        Args:
+            phrase (str): The words of the command, eg. 'show inventory'.
+            handler (func): Called with the player, the level and the noun ('' if the command
+                            takes no noun) when the command is typed.
+            takesNoun (bool): Whether the command must be followed by a noun. Defaults False.
+        Returns:
+            self (for method chaining)
+        """
+        node = self.root
+        for word in phrase.split():
+            node = node.setdefault(word, {})
+        node.setdefault('', {})[takesNoun] = handler
+        return self
+
+    def resolve(self, words):
+        """Returns the handler of the longest command matching `words`, the words of a line.
+
+        Returns:
+            tuple: The handler in tuple[0], and the noun in tuple[1]. (None, None) if no command
+                   matches.
+        """
+        node = self.root
+        match = (None, None)
+        for depth, word in enumerate(words):
+            node = node.get(word)
+            if node is None:
+                break
+            handlers = node.get('')
+            if handlers is None:
+                continue
+            takesNoun = depth + 1 < len(words)
+            if takesNoun in handlers:
+                match = (handlers[takesNoun], ' '.join(words[depth + 1:]))
+        return match
+
+def enter_place(player, levelMap, noun):
+    """Handles `enter [place]`: the player enters a place."""
+    try:
+        playerRequestedPlace = levelMap.places[noun]
+    except KeyError:
+        print("`%s` is not a place." % noun)
+        return
+    if not playerRequestedPlace.reachable:
+        print('You cannot go into `%s` yet.' % noun)
+        return
+    player.set_current_place(playerRequestedPlace)
+    playerRequestedPlace.describe_place()
+
+def show_places(player, levelMap, noun):
+    """Handles `help places`: describes the level's places and the player's place."""
+    levelMap.show_introduction()
+    player.place.describe_place()
+
+def show_object_help(player, levelMap, noun):
+    """Handles `help [object]`: shows the object's help screen."""
+    calledObject = game_objects.get_object(noun, player, player.place)
+    if calledObject is None:
+        print("`%s` is not found." % noun)
+        return
+    game_objects.show_help_message(calledObject)
+
+def quit_game(player, levelMap, noun):
+    """Handles `quit`: the player quits the game."""
+    utils.print_quit_message()
+    sys.exit() # Quits the game
+
+# The game's own commands. Any other command is an object's command, `[verb] [object]`.
+GRAMMAR = CommandGrammar()\
+    .add('help', lambda player, levelMap, noun: game_objects.show_help_message(None))\
+    .add('help', show_object_help, takesNoun=True)\
+    .add('help places', show_places)\
+    .add('quit', quit_game)\
+    .add('enter', enter_place, takesNoun=True)\
+    .add('show inventory', lambda player, levelMap, noun: player.show_inventory())
+
 def get_and_execute_user_command(player, levelMap):
     """Get and execute command by user.
     
@@ -92,65 +269,52 @@ def get_and_execute_user_command(player, levelMap):
     Returns:
         None
     """
-    playerPlace = player.place 
     instruction = input("Enter a command: ").lower().strip()
+    words = instruction.split()
+    execute_command(player, levelMap, words)
 
-    if game_objects.get_object(instruction, player, playerPlace) is not None:
-        # Player may had typed the name of the object alone.
-        print("Type `help %s` for more information about this object." % instruction)
-        return
+def execute_command(player, levelMap, words):
+    """Executes the command made of `words`, the words of a line typed by the user.
 
-    # Check for invalid syntax
-    try:
-        verb, noun = utils.separate_first_from_last(instruction)
-    except ValueError:
-        # Single word inputs
-        if instruction == 'help':
-            # General help message
-            game_objects.show_help_message(None)
-        elif instruction == 'quit':
-            # Player quits the game.
-            utils.print_quit_message()
-            sys.exit() # Quits the game
-        else:
-            print("`%s` is not a valid command." % instruction)
-        return
-    # Player wants to enter a place.
-    if verb == 'enter':
-        try:
-            playerRequestedPlace = levelMap.places[noun]
-        except KeyError:
-            print("`%s` is not a place." % noun)
-            return
-        if not playerRequestedPlace.reachable:
-            print('You cannot go into `%s` yet.' % noun)
-            return
-        playerPlace = playerRequestedPlace
-        player.set_current_place(playerPlace)
-        playerPlace.describe_place()
-        return
+    The game's own commands in GRAMMAR come first. Any other command is `[verb] [object]`, where
+    the verb may have many words if it is a command of the object: the longest object name at
+    the end of the line is the object.
+    The object names are found in one walk back from the end of the line, see
+    `place.Locator.names_ending`.
 
-    # Showing inventory
-    if verb == 'show' and noun == 'inventory':
-        player.show_inventory()
+    Args:
+        player (player.Player): The current user playing the game.
+        levelMap (levels.Level): The current level's places.
+        words (list): The words of the command.
+    Returns:
+        None
+    """
+    if len(words) == 0:
+        print("`` is not a valid command.")
         return
-    
-    # Help for place
-    if verb == 'help' and noun == 'places':
-        levelMap.show_introduction()
-        playerPlace.describe_place()
+    # The longest object name at the end of the line that the player can see.
+    calledObject, nameLength = None, 0
+    for name in levelMap.locator.names_ending(words):
+        calledObject = game_objects.get_object(name, player, player.place)
+        if calledObject is not None:
+            nameLength = len(name.split())
+            break
+    if calledObject is not None and nameLength == len(words):
+        # Player may had typed the name of the object alone.
+        print("Type `help %s` for more information about this object." % ' '.join(words))
         return
-        
-    # Check for invalid object
-    calledObject = game_objects.get_object(noun, player, playerPlace)
-    if calledObject is None:
-        print("`%s` is not found." % noun)
+    handler, noun = GRAMMAR.resolve(words)
+    if handler is not None:
+        handler(player, levelMap, noun)
         return
-
-    # Help with object
-    if verb == 'help':
-        game_objects.show_help_message(calledObject)
+    if len(words) == 1:
+        print("`%s` is not a valid command." % words[0])
         return
-
-    # Other valid commands - leave to object
-    calledObject.run_command(player, verb)
+    # Other valid commands - leave to object. A verb of many words must be a command of the
+    # object; otherwise the words after the first one are taken as a name that is not found,
+    # eg. `open the drawer`.
+    verb = ' '.join(words[:len(words) - nameLength])
+    if calledObject is not None and (len(words) - nameLength == 1 or verb in calledObject.commands):
+        calledObject.run_command(player, verb)
+        return
+    print("`%s` is not found." % ' '.join(words[1:]))
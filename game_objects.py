@@ -9,9 +9,9 @@ class GameObject:
         name (str): Name of this object
         collectable (bool): Determines whether the player can collect this object and put it
                            into his inventory. Default False.
-        collectionReq (str): The basic requirement that must be fulfiled before collection. If defined,
-                             collectionReq must be of form '[adj/noun/verb] [game object's name]' Defaults
-                             None
+        collectionReq (command.Requirement): The basic requirement that must be fulfiled before collection,
+                                             compiled from a string of form '[adj/noun/verb] [game object's
+                                             name]'. Defaults None
         description (str): Description to be printed to the console whenever object is examined by the player.
                            Defaults "Nothing to examine here."
         commands (dict): Represents the available commands the object has. Dictionary must map a string, the
@@ -59,7 +59,8 @@ class GameObject:
 
         set_accessibility(flag):
             Sets whether this object and all the objects in self.thingsOn can be accessible by
-            the player. Also recurses through the objects in self.thingsOn.
+            the player. Also goes through the objects in self.thingsOn, and updates the places
+            of the objects.
 
         add_included_item(item):
             Attach another item on this object.
@@ -82,6 +83,11 @@ class GameObject:
         self.accessible = True
         self.collectionFailMsg = "Sorry, item cannot be collected."
         self.place = None
+        # The objects this object is attached on, see `add_included_item`.
+        self._holders = []
+        # Whether this object and everything attached on it, directly or not, have the same
+        # accessibility, with no object attached on several objects. See `set_accessibilities`.
+        self._uniform = True
 
     def set_value(self, attr, val):
         """Sets value val into keyword argument `attr` in constructor.
@@ -127,6 +133,9 @@ class GameObject:
                                       Defaults None.
             Returns:
                self (for method chaining)
+            Raises:
+               ValueError: `req` is not a valid requirement, see `command.compile_requirement`. Requirements
+                           are checked here, when the level is built, not when the command is run.
         """
         self.commands[commandType] = command.Command(commandDescription,
                                              successMsg=successMsg,
@@ -186,9 +195,11 @@ class GameObject:
             onFail (str): Message to be printed when item fails to be collected. Use default if None.
         Returns:
             self (for method chaining)
+        Raises:
+            ValueError: `req` is not a valid requirement, see `command.compile_requirement`.
         """
         self.collectable = True
-        self.collectionReq = req
+        self.collectionReq = command.compile_requirement(req) if req is not None else None
         if onFail is not None:
             self.collectionFailMsg = onFail
         return self
@@ -299,32 +310,37 @@ class GameObject:
     # Accessibility settings
     def set_accessibility(self, flag):
         """Sets whether this object and all the objects in self.thingsOn can be accessible by
-           the player through the value of `flag`. Also recurses through the objects in self.thingsOn.
+           the player through the value of `flag`. Also goes through the objects in self.thingsOn,
+           see `set_accessibilities`.
            
         Args:
             flag (bool): The state of the accessibility flag to be changed.
         Returns:
             self (for method chaining)   
         """
-        self.accessible = flag
-        for obj in self.thingsOn:
-            # If this object has a certain accessibility `flag`, other objects that is on this object 
-            # must also be of accessibility `flag`.
-            obj.set_accessibility(flag)
+        set_accessibilities([(self, flag)])
         return self
 
     # Included items settings
     def add_included_item(self, item):
         """Attach another item on this object, and set its accessibility property to that
-           of this object.
+           of this object. Items must only be attached through this method, so that `set_accessibility`
+           knows which objects are attached to which.
 
         Args:
             item (GameObject): The new item to be attached on this object.
         Returns:
             self (for method chaining)  
         """
-        self.thingsOn.append(item)
+        # The item is set before it is attached, so only its own subtree is gone through.
         item.set_accessibility(self.accessible)
+        self.thingsOn.append(item)
+        item._holders.append(self)
+        if len(item._holders) > 1:
+            # Objects attached to several objects are never skipped, see `set_accessibilities`.
+            _mark_mixed(item)
+        if not item._uniform:
+            _mark_mixed(self)
         return self
 
     # Help commands
@@ -463,6 +479,107 @@ class Lock(GameObject):
         player.unlocked_lock(self.name)
         player.opened_object(self.lockedObject.name)
 
+def set_accessibilities(changes):
+    """Applies many accessibility changes at once. Every change sets an object and all the objects
+    attached on it, directly or not (see `GameObject.add_included_item`), to a flag, with the same
+    results as calling `GameObject.set_accessibility` for every change in order.
+
+    The changes are propagated in a single pass with an explicit stack, so attachments can be
+    of any depth. The latest change reaching an object wins, so the changes are gone through
+    from the last one, and an object already reached is not gone through again. Every object
+    knows whether everything attached on it has its accessibility (its `_uniform` flag), so a
+    subtree already set to the flag is skipped as a whole.
+
+    Args:
+        changes (iterable): Tuples (object, flag), where object is a GameObject and flag a bool.
+    Returns:
+        None
+    """
+    # `reached` maps id(object) to the objects gone through, `skipped` has the ids of the roots
+    # of the uniform subtrees skipped.
+    reached = {}
+    skipped = set()
+    changed = []
+    for obj, flag in reversed(list(changes)):
+        if _inside(obj, skipped):
+            # A later change skipped a uniform subtree with this object in it, so this change
+            # would be undone by it.
+            continue
+        stack = [obj]
+        while stack:
+            current = stack.pop()
+            if id(current) in reached or id(current) in skipped:
+                # A later change already reached this object.
+                continue
+            if current._uniform and current.accessible == flag:
+                # This object and everything attached on it already have the flag.
+                skipped.add(id(current))
+                continue
+            reached[id(current)] = current
+            if current.accessible != flag:
+                current.accessible = flag
+                changed.append(current)
+                if current.place is not None:
+                    # Keep the place's list of base objects up to date.
+                    current.place.update_visibility(current)
+            # If this object has a certain accessibility `flag`, other objects that is on this
+            # object must also be of accessibility `flag`.
+            stack.extend(current.thingsOn)
+    _update_uniform(reached, changed)
+
+def _inside(obj, subtrees):
+    """Whether `obj` is in one of the uniform subtrees whose roots have their id in `subtrees`."""
+    # Objects in a uniform subtree are uniform and attached on one object only, so there is a
+    # single way up, and it ends at the first object that is not uniform.
+    while len(subtrees) != 0:
+        if id(obj) in subtrees:
+            return True
+        if not obj._uniform or len(obj._holders) != 1:
+            return False
+        obj = obj._holders[0]
+    return False
+
+def _update_uniform(reached, changed):
+    """Works out again the `_uniform` flags of the objects `reached` by `set_accessibilities`,
+    objects attached on others first, and clears the flag of the objects they are attached on
+    that were not reached, if `changed` or no longer uniform."""
+    # 1 while an object's attached objects are worked out, 2 once it is done.
+    state = {}
+    for start in reached.values():
+        if id(start) in state:
+            continue
+        stack = [(start, False)]
+        while stack:
+            obj, expanded = stack.pop()
+            if expanded:
+                # An attached object still being worked out is part of a cycle.
+                obj._uniform = len(obj._holders) <= 1 and all(
+                    child._uniform and child.accessible == obj.accessible and state.get(id(child)) != 1
+                    for child in obj.thingsOn)
+                state[id(obj)] = 2
+            elif id(obj) not in state:
+                state[id(obj)] = 1
+                stack.append((obj, True))
+                stack.extend((child, False) for child in obj.thingsOn
+                             if id(child) in reached and id(child) not in state)
+    changedIds = {id(obj) for obj in changed}
+    for obj in reached.values():
+        if id(obj) in changedIds or not obj._uniform:
+            for holder in obj._holders:
+                if id(holder) not in reached:
+                    _mark_mixed(holder)
+
+def _mark_mixed(obj):
+    """Clears the `_uniform` flag of `obj` and all the objects it is attached on, directly or not."""
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if not current._uniform:
+            # The objects it is attached on are not uniform either.
+            continue
+        current._uniform = False
+        stack.extend(current._holders)
+
 def switch_boolean_state(gameObject, booleanFlag, whenTrueMsg=None, whenFalseMsg=None, onTrue=None, onFalse=None):
     """Switchs the boolean variable `booleanFlag` in `gameObject`. If the result is True, prints `whenTrueMsg`
     and call `onTrue` if function is defined; or else, prints `whenFalseMsg` and call `onFalse` if defined.
@@ -507,7 +624,10 @@ def get_object(name, player, place):
             The item does not exist.
     """
     calledObject = None
-    if name in place.objects:
+    if place.locator is not None:
+        # The level knows where every object is.
+        calledObject = place.locator.resolve(name, place, player)
+    elif name in place.objects:
         calledObject = place.objects[name]
     elif name in player.inventory:
         calledObject = player.inventory[name]
@@ -582,6 +702,10 @@ def find_item_place(places, item):
         place.Place: Place of the object
         None: Item not found in any of the places.
     """
+    firstPlace = next(iter(places.values()), None)
+    if firstPlace is not None and firstPlace.locator is not None and firstPlace.locator.places is places:
+        # The level knows where every object is.
+        return firstPlace.locator.place_of(item)
     for place in places:
         if item in places[place].objects:
             return places[place]
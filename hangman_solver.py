@@ -0,0 +1,256 @@
+"""A Hangman solver and hint engine, and the word families of Evil Hangman.
+
+Classes:
+    HangmanSolver:
+        Finds the words that fit a Hangman game's state, and the best letter to guess next.
+
+    WordFamilies:
+        The words of one length that an Evil Hangman game can still choose from.
+
+NumPy is optional. If it is installed, WordFamilies partitions the words with it. It is only
+imported then, see `utils.get_numpy`.
+"""
+import random
+import utils
+from utils import bit_count
+
+def bits_from_indices(indices, size):
+    """Returns an integer with bits `indices` set, where every index is less than `size`.
+    Building the integer from a bytearray is much faster than or-ing the bits one by one,
+    which creates a new big integer each time."""
+    mask = bytearray((size + 7) // 8)
+    for idx in indices:
+        mask[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(mask, 'little')
+
+class LengthIndex:
+    """Bitsets over all the words of one length in a word store. Bit i of every bitset
+    stands for word `start + i` of the store.
+
+    Attributes:
+        start (int): Index in the store of the first word with this length.
+        size (int): Number of words with this length.
+        everything (int): The bitset with all the words.
+        atPosition (dict): Maps a tuple (position, letter) to the bitset of words with `letter`
+                           at `position`.
+        hasLetter (dict): Maps a letter to the bitset of words containing it.
+    """
+    def __init__(self, store, length):
+        self.start, end = store.lengths.get(length, (0, 0))
+        self.size = end - self.start
+        self.everything = (1 << self.size) - 1
+        atPosition = {}
+        hasLetter = {}
+        for i in range(self.size):
+            word = store[self.start + i]
+            for position, letter in enumerate(word):
+                atPosition.setdefault((position, letter), []).append(i)
+            for letter in set(word):
+                hasLetter.setdefault(letter, []).append(i)
+        self.atPosition = {key: bits_from_indices(indices, self.size) for key, indices in atPosition.items()}
+        self.hasLetter = {key: bits_from_indices(indices, self.size) for key, indices in hasLetter.items()}
+
+    def indices(self, bits):
+        """Yields the indices in the store of the words in the bitset `bits`."""
+        while bits:
+            lowest = bits & -bits
+            yield self.start + lowest.bit_length() - 1
+            bits ^= lowest
+
+class HangmanSolver:
+    """Finds the words in a word store that fit a Hangman game's state, and the best letter
+    to guess next. The bitsets for a word length are built the first time that length is
+    asked for, so narrowing down the words takes a few bitwise operations.
+
+    Attributes:
+        store (wordlist.WordStore): The words the hidden word is chosen from.
+
+    Methods:
+        candidate_bits(pattern, guessedLetters):
+            Returns the bitset of the words that fit the game's state.
+
+        candidates(pattern, guessedLetters):
+            Returns the words that fit the game's state.
+
+        best_letter(pattern, guessedLetters):
+            Returns the letter found in the most words that fit the game's state.
+
+        play(word, lives=9):
+            Plays a game of Hangman against `word` with the best letters.
+    """
+    def __init__(self, store):
+        self.store = store
+        self._indices = {}
+
+    def index_for(self, length):
+        """Returns the LengthIndex of the words with `length` letters, building it if needed."""
+        if length not in self._indices:
+            self._indices[length] = LengthIndex(self.store, length)
+        return self._indices[length]
+
+    def candidate_bits(self, pattern, guessedLetters):
+        """Returns the bitset of the words that fit the game's state.
+
+        Args:
+            pattern (str/list): The word shown to the player, with '_' for letters not found yet.
+            guessedLetters (set): Letters the player had guessed.
+        Returns:
+            tuple: The LengthIndex of the words with the pattern's length in tuple[0], and the
+                   bitset of the words that fit in tuple[1].
+        """
+        index = self.index_for(len(pattern))
+        bits = index.everything
+        blanks = [position for position, letter in enumerate(pattern) if letter == '_']
+        for position, letter in enumerate(pattern):
+            if letter != '_':
+                bits &= index.atPosition.get((position, letter), 0)
+        for letter in guessedLetters:
+            if letter in pattern:
+                # Every occurance of a found letter is shown, so the blanks cannot be this letter.
+                for position in blanks:
+                    bits &= ~index.atPosition.get((position, letter), 0)
+            else:
+                bits &= ~index.hasLetter.get(letter, 0)
+        return index, bits
+
+    def candidates(self, pattern, guessedLetters):
+        """Returns a list of the words that fit the game's state. See `candidate_bits`."""
+        index, bits = self.candidate_bits(pattern, guessedLetters)
+        return [self.store[idx] for idx in index.indices(bits)]
+
+    def best_letter(self, pattern, guessedLetters):
+        """Returns the letter not guessed yet that is found in the most words that fit the
+        game's state. Ties are broken alphabetically.
+
+        Args:
+            pattern (str/list): The word shown to the player, with '_' for letters not found yet.
+            guessedLetters (set): Letters the player had guessed.
+        Returns:
+            tuple: The best letter in tuple[0] (None if no word fits), and the number of words
+                   that fit in tuple[1].
+        """
+        index, bits = self.candidate_bits(pattern, guessedLetters)
+        bestLetter, bestCount = None, 0
+        for letter in sorted(index.hasLetter):
+            if letter in guessedLetters:
+                continue
+            count = bit_count(bits & index.hasLetter[letter])
+            if count > bestCount:
+                bestLetter, bestCount = letter, count
+        return bestLetter, bit_count(bits)
+
+    def play(self, word, lives=9):
+        """Plays a game of Hangman against `word`, always guessing the best letter. Used for
+        automated play and benchmarks.
+
+        Args:
+            word (str): The hidden word.
+            lives (int): Number of wrong guesses allowed. Defaults 9.
+        Returns:
+            tuple: Whether the game is won in tuple[0], and the letters guessed, in order, in tuple[1].
+        """
+        pattern = ['_'] * len(word)
+        guessedLetters = set()
+        guesses = []
+        while lives > 0 and '_' in pattern:
+            letter, _ = self.best_letter(pattern, guessedLetters)
+            if letter is None:
+                # `word` is not in the store.
+                break
+            guessedLetters.add(letter)
+            guesses.append(letter)
+            if letter in word:
+                pattern = [letter if wordLetter == letter else shown for wordLetter, shown in zip(word, pattern)]
+            else:
+                lives -= 1
+        return '_' not in pattern, guesses
+
+class WordFamilies:
+    """The words of one length that an Evil Hangman game can still choose from.
+
+    The words are kept as a matrix of characters, one word per row. When a letter is
+    guessed, every word gets a key, the bitmask of the positions of that letter in the word,
+    and the words are partitioned into families by their key. With NumPy, this is done for
+    all the words at once.
+
+    Attributes:
+        length (int): The length of the words.
+        start (int): Index in the store of the first word with this length.
+        candidates (numpy.ndarray/list): Row numbers of the words that can still be chosen.
+
+    Methods:
+        split(letter):
+            Keeps the largest family of words for `letter`.
+
+        answer(rng=random):
+            Returns one of the words that can still be chosen.
+    """
+    def __init__(self, store, length, letters=None, useNumpy=True):
+        """Initialise with all the words of `length` letters in `store`, only those with
+        `letters` different letters if it is not None. NumPy is not used if `useNumpy` is False,
+        or if it is not installed."""
+        self.store = store
+        self.length = length
+        self.start, end = store.lengths.get(length, (0, 0))
+        # The words with `letters` different letters are a range of the words of `length` letters.
+        first, last = (store.word_range(length, letters) or [(self.start, self.start)])[0]
+        numpy = utils.get_numpy() if useNumpy else None
+        self.useNumpy = numpy is not None
+        if self.useNumpy:
+            block = store.length_block(length)
+            self.matrix = numpy.frombuffer(block, dtype=numpy.uint8).reshape(end - self.start, length)
+            self.weights = numpy.left_shift(1, numpy.arange(length, dtype=numpy.int64))
+            self.candidates = numpy.arange(first - self.start, last - self.start)
+        else:
+            self.candidates = list(range(first - self.start, last - self.start))
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def words(self):
+        """Returns a list of the words that can still be chosen."""
+        return [self.store[self.start + row] for row in self.candidates]
+
+    def keys(self, letter):
+        """Returns the key of every candidate for `letter`: the bitmask of the positions of
+        `letter` in the word."""
+        if self.useNumpy:
+            return (self.matrix[self.candidates] == ord(letter)) @ self.weights
+        keys = []
+        for row in self.candidates:
+            key = 0
+            for position, wordLetter in enumerate(self.store[self.start + row]):
+                if wordLetter == letter:
+                    key |= 1 << position
+            keys.append(key)
+        return keys
+
+    def split(self, letter):
+        """Keeps the largest family of words for `letter`. If families tie, the family
+        revealing fewer positions (the smaller key) is kept.
+
+        Args:
+            letter (str): The letter guessed by the player.
+        Returns:
+            list: The positions of `letter` in the kept family's words. Empty if the kept
+                  family does not have the letter.
+        """
+        keys = self.keys(letter)
+        if self.useNumpy:
+            numpy = utils.get_numpy()
+            familyKeys, familyOf, sizes = numpy.unique(keys, return_inverse=True, return_counts=True)
+            # argmax returns the first of the largest families, which has the smallest key.
+            biggest = int(numpy.argmax(sizes))
+            key = int(familyKeys[biggest])
+            self.candidates = self.candidates[familyOf.reshape(-1) == biggest]
+        else:
+            sizes = {}
+            for familyKey in keys:
+                sizes[familyKey] = sizes.get(familyKey, 0) + 1
+            key = min(sizes, key=lambda familyKey: (-sizes[familyKey], familyKey))
+            self.candidates = [row for row, familyKey in zip(self.candidates, keys) if familyKey == key]
+        return [position for position in range(self.length) if key >> position & 1]
+
+    def answer(self, rng=random):
+        """Returns one of the words that can still be chosen, at random."""
+        return self.store[self.start + int(self.candidates[rng.randrange(len(self.candidates))])]
@@ -1,7 +1,9 @@
 """Levels in game."""
-from game_objects import GameObject, Door, Container, switch_boolean_state, relocate_item, find_item_place, get_object
-from place import Place, MazeGrid
+from game_objects import GameObject, Door, Container, switch_boolean_state, relocate_item, find_item_place, get_object, \
+                         set_accessibilities
+from place import Place, MazeGrid, Locator
 import command
+# The levels, in order. `play_game` sets a level to None once it is completed.
 LEVELS = []
 class Maze:
     """A maze is just places in a grid, some accessible, some inaccessible.
@@ -76,6 +78,7 @@ class Level:
         startPlace (any): The name of the player's starting place. Must be an existing key in the places dictionary.
         msgOnEnter (str): Message to be printed when the player starts this level. Defaults None, and so all the places 
                           in the level will be printed to the console.
+        locator (place.Locator): Where every object of this level is.
 
     Methods:
         show_introduction(): 
@@ -91,6 +94,7 @@ class Level:
         self.placesNames = [placeName for placeName in self.places if isinstance(placeName, str)]
         self.startPlace = startPlace
         self.msgOnEnter = msgOnEnter
+        self.locator = Locator(places)
 
     def show_introduction(self):
         """Prints introduction `self.msgOnEnter` to the screen when player first starts this level. If `self.msgOnEnter` 
@@ -105,7 +109,8 @@ class Level:
         print("In this level, there are %d place(s) you can go: %s." % (len(self.places), ', '.join(self.placesNames)))
 
 def completed_level(player, level):
-    """A level had been completed. Start a new level if possible.
+    """A level had been completed. Signals `play_game` to start the next level, if there is one, once
+    the command completing this level returns.
     
     Args:
         player (Player.player): The current user who had completed this level.
@@ -113,13 +118,8 @@ def completed_level(player, level):
     Returns:
         None
     """
+    # `play_level` stops asking for commands once the player's level changes.
     player.advance_level()
-    try:
-        LEVELS[player.level - 1]
-    except IndexError:
-        print("Congratulations! You escaped all the rooms and won the game!")
-        return
-    play_level(level=player.level, player=player)
 
 def make_levels(player):
     """Make levels.
@@ -602,9 +602,9 @@ def make_levels(player):
                                                          req="unlocked diamond door.lock",
                                                          result_success=\
                                                          lambda: (player.set_current_place(lvl5_places['computer lab']),
-                                                                 lvl5_computer_lab_objects['computer'].set_accessibility(False),
-                                                                 lvl5_computer_lab_objects['computer.game'].set_accessibility(False),
-                                                                 lvl5_computer_lab_objects['door'].set_accessibility(True),
+                                                                 set_accessibilities([(lvl5_computer_lab_objects['computer'], False),
+                                                                                      (lvl5_computer_lab_objects['computer.game'], False),
+                                                                                      (lvl5_computer_lab_objects['door'], True)]),
                                                                  lvl5_places['computer lab'].describe_place(),
                                                                  lvl5_places['computer lab'].set_reachable(True),
                                                                  lvl5_places['room'].set_reachable(False),
@@ -633,6 +633,7 @@ def play_level(level, player):
     player.reset()
     player.level = level
     levelMap = LEVELS[level - 1]
+    player.locator = levelMap.locator
     levelMap.show_introduction()
     playerPlace = levelMap.places[levelMap.startPlace]
     player.set_current_place(playerPlace)
@@ -642,3 +643,21 @@ def play_level(level, player):
     # When a level is completed, a signal will be sent to increment the player's level.
     while player.level == level:
         command.get_and_execute_user_command(player, levelMap)
+
+def play_game(player, level=1):
+    """Plays the levels one after the other, from `level` on, until the player completes the last one.
+    Each level is played from here once the previous one returns, so the game's call stack does not
+    grow from level to level, and a completed level is dropped from LEVELS to be freed.
+    
+    Args:
+        player (player.Player): The current user playing the game.
+        level (int): The level to start playing. Defaults 1.
+    Returns:
+        None
+    """
+    while level <= len(LEVELS):
+        play_level(level, player)
+        # Nothing refers to a completed level's places and objects after this.
+        LEVELS[level - 1] = None
+        level = player.level
+    print("Congratulations! You escaped all the rooms and won the game!")
@@ -39,11 +39,12 @@ def main():
     # set up
     try:
         the_player = player.Player()
-        minigames.set_up_games()
+        # Games are built when first played; the warm-up builds them in the background meanwhile.
+        minigames.set_up_games(warmUp=True)
         levels.make_levels(the_player)
         # start game.
         print_header()
-        levels.play_level(level=1, player=the_player) # Change this number to start on a different level.
+        levels.play_game(the_player, level=1) # Change this number to start on a different level.
     except KeyboardInterrupt: 
         # User tries to exit the improper way.
         # Catching this will prevent an ugly exception to be printed on the console.
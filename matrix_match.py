@@ -0,0 +1,159 @@
+"""Finding wildcard patterns in a matrix, eg. a game board.
+
+A matrix is a list of rows of the same length, each a list (or string) of cells. A pattern is
+a smaller matrix where '-' stands for any cell.
+
+Classes:
+    PatternMatcher:
+        Finds many patterns in a matrix in a single pass.
+
+Functions:
+    get_matcher(patterns):
+        Returns the PatternMatcher of a set of patterns, building it only once.
+
+NumPy is optional. If it is installed, the occurances in matrices of at least NUMPY_THRESHOLD
+cells are counted with it, testing every position of a pattern at once. It is only imported
+then, see `utils.get_numpy`.
+"""
+import utils
+
+# A cell of a pattern that stands for any cell of the matrix.
+WILDCARD = '-'
+# Matrices with at least this many cells are counted with NumPy, if it is installed. Below it,
+# turning the matrix into an array costs more than it saves.
+NUMPY_THRESHOLD = 2500
+
+class PatternMatcher:
+    """Finds a set of wildcard patterns in matrices. The patterns are compiled once: every
+    pattern is anchored on one of its cells that is not a wildcard, and the patterns are
+    grouped by the value of their anchor. A matrix is then scanned once, cell by cell, and
+    only the patterns anchored on the value of that cell are checked there, each one stopping
+    at its first mismatching cell.
+
+    Attributes:
+        patterns (list): The patterns, as given.
+
+    Methods:
+        find(matrix):
+            Returns the first occurance of any pattern.
+
+        matches(matrix):
+            Checks whether any pattern is in the matrix.
+
+        count(matrix):
+            Returns the number of occurances of every pattern.
+    """
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        # Maps the value of an anchor to a list of tuples (pattern index, anchor row, anchor
+        # column, height, width, cells), where cells is a list of (row, column, value) of the
+        # other cells that are not wildcards, relative to the anchor.
+        self.byAnchor = {}
+        # Patterns of only wildcards are found at every position they fit in.
+        self.wildcardOnly = []
+        for idx, pattern in enumerate(self.patterns):
+            height = len(pattern)
+            width = len(pattern[0]) if height != 0 else 0
+            cells = [(row, col, value) for row, line in enumerate(pattern)
+                     for col, value in enumerate(line) if value != WILDCARD]
+            if len(cells) == 0:
+                self.wildcardOnly.append((idx, height, width))
+                continue
+            anchorRow, anchorCol, anchorValue = cells[0]
+            others = [(row - anchorRow, col - anchorCol, value) for row, col, value in cells[1:]]
+            self.byAnchor.setdefault(anchorValue, []).append((idx, anchorRow, anchorCol, height, width, others))
+
+    def _occurances(self, matrix):
+        """Yields a tuple (pattern index, top row, left column) for every occurance of every
+        pattern in `matrix`: first the patterns of only wildcards, then the others row by row."""
+        height = len(matrix)
+        width = len(matrix[0]) if height != 0 else 0
+        for top in range(height):
+            for left in range(width):
+                for idx, patternHeight, patternWidth in self.wildcardOnly:
+                    if top + patternHeight <= height and left + patternWidth <= width:
+                        yield idx, top, left
+        for row in range(height):
+            line = matrix[row]
+            for col in range(width):
+                candidates = self.byAnchor.get(line[col])
+                if candidates is None:
+                    continue
+                for idx, anchorRow, anchorCol, patternHeight, patternWidth, others in candidates:
+                    top, left = row - anchorRow, col - anchorCol
+                    if top < 0 or left < 0 or top + patternHeight > height or left + patternWidth > width:
+                        continue
+                    for dRow, dCol, value in others:
+                        if matrix[row + dRow][col + dCol] != value:
+                            break
+                    else:
+                        yield idx, top, left
+
+    def find(self, matrix):
+        """Returns the first occurance found of any pattern in `matrix`, stopping the scan there.
+
+        Returns:
+            tuple: The index of the pattern in tuple[0], and the top row and left column of the
+                   occurance in tuple[1] and tuple[2]. None if no pattern is in `matrix`.
+        """
+        return next(self._occurances(matrix), None)
+
+    def matches(self, matrix):
+        """Checks whether any pattern is in `matrix`. Stops at the first occurance."""
+        return self.find(matrix) is not None
+
+    def count(self, matrix, useNumpy=None):
+        """Returns a list of the number of occurances of every pattern in `matrix`.
+
+        Args:
+            matrix (2d list): The matrix to search in.
+            useNumpy (bool): Whether to count with NumPy. Defaults to whether NumPy is installed
+                             and `matrix` has at least NUMPY_THRESHOLD cells.
+        """
+        height = len(matrix)
+        width = len(matrix[0]) if height != 0 else 0
+        if useNumpy is None:
+            useNumpy = height * width >= NUMPY_THRESHOLD
+        if useNumpy and utils.get_numpy() is not None:
+            return self._count_numpy(matrix, height, width)
+        counts = [0] * len(self.patterns)
+        for idx, _, _ in self._occurances(matrix):
+            counts[idx] += 1
+        return counts
+
+    def _count_numpy(self, matrix, height, width):
+        """Counts the occurances of every pattern in `matrix` with NumPy. The cells are turned
+        into integer codes, and every position of a pattern is compared at once on a sliding
+        window view of the matrix, with the wildcards masked out."""
+        numpy = utils.get_numpy()
+        from numpy.lib.stride_tricks import sliding_window_view
+        codes = {}
+        board = numpy.array([[codes.setdefault(value, len(codes)) for value in line] for line in matrix],
+                            dtype=numpy.int32).reshape(height, width)
+        counts = []
+        for pattern in self.patterns:
+            patternHeight = len(pattern)
+            patternWidth = len(pattern[0]) if patternHeight != 0 else 0
+            if patternHeight > height or patternWidth > width:
+                counts.append(0)
+                continue
+            mask = numpy.array([[value != WILDCARD for value in line] for line in pattern], dtype=bool)
+            values = [value for line in pattern for value in line if value != WILDCARD]
+            if any(value not in codes for value in values):
+                # A cell of the pattern is nowhere in the matrix.
+                counts.append(0)
+                continue
+            windows = sliding_window_view(board, (patternHeight, patternWidth))
+            wanted = numpy.array([codes[value] for value in values], dtype=numpy.int32)
+            counts.append(int((windows[..., mask] == wanted).all(axis=-1).sum()))
+        return counts
+
+_MATCHERS = {}
+
+def get_matcher(patterns):
+    """Returns the PatternMatcher of `patterns`. Every matcher is only built once, so searching
+    for the same patterns again does not compile them again."""
+    key = tuple(tuple(tuple(line) for line in pattern) for pattern in patterns)
+    if key not in _MATCHERS:
+        _MATCHERS[key] = PatternMatcher(patterns)
+    return _MATCHERS[key]
@@ -0,0 +1,287 @@
+"""A Monte Carlo tree search player for the Tic Tac Toe game, for boards too large for the
+alpha-beta search (eg. Gomoku).
+
+The search is root-parallel: every worker process grows its own tree from the same position
+for the time budget, and the visits of the root moves of all the trees are added up. Every
+process keeps its last tree, and reuses the part of it below the next position it is asked
+to search, so the playouts of a move are not thrown away on the next one.
+
+Classes:
+    Node:
+        A node of a search tree.
+
+    TreeSearch:
+        The search tree of one process, and the playouts that grow it.
+
+    MCTSPlayer:
+        Chooses moves with a pool of worker processes running the search.
+
+Functions:
+    run_playouts(size, winLength, own, other, timeLimit, seed, radius=2):
+        Grows the tree of this process from a position for `timeLimit` seconds.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import random
+import time
+import bitboard
+
+# Exploration constant of the UCT formula.
+EXPLORATION = math.sqrt(2)
+
+class Node:
+    """A node of a search tree: the position after `move` is played.
+
+    Attributes:
+        move (int): The bit of the move leading to this node. None at the root.
+        children (dict): Maps a move to the child node it leads to.
+        untried (list): The moves not expanded yet.
+        visits (int): Number of playouts through this node.
+        wins (float): Playouts through this node won by the side that played `move`, with a
+                      tie counting as half a win.
+    """
+    __slots__ = ('move', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, untried):
+        self.move = move
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+    def best_child(self):
+        """Returns the child with the highest UCT score."""
+        logVisits = math.log(self.visits)
+        return max(self.children.values(),
+                   key=lambda child: child.wins / child.visits + EXPLORATION * math.sqrt(logVisits / child.visits))
+
+def near_masks(geometry, radius):
+    """Returns a list where item `cell` is the bitmask of the grids at most `radius` rows and
+    columns away from bit `cell`."""
+    size = geometry.size
+    masks = []
+    for cell in range(geometry.cellCount):
+        row, col = divmod(cell, size)
+        mask = 0
+        for nearRow in range(max(0, row - radius), min(size, row + radius + 1)):
+            for nearCol in range(max(0, col - radius), min(size, col + radius + 1)):
+                mask |= 1 << (nearRow * size + nearCol)
+        masks.append(mask)
+    return masks
+
+class TreeSearch:
+    """The search tree of one process, and the playouts that grow it.
+
+    Attributes:
+        geometry (bitboard.Geometry): The board the search is for.
+        radius (int): Only free grids at most this far from a taken grid are tried in the tree.
+        root (Node): The root of the tree.
+        rootPosition (tuple): The position (own, other) at the root, `own` being the side to move.
+    """
+    def __init__(self, geometry, radius=2):
+        self.geometry = geometry
+        self.radius = radius
+        self.nearMasks = near_masks(geometry, radius)
+        self.root = None
+        self.rootPosition = None
+
+    def candidate_moves(self, own, other):
+        """Returns the free grids near a taken grid, or the middle grid of an empty board."""
+        taken = own | other
+        if taken == 0:
+            return [self.geometry.cellCount // 2]
+        near = 0
+        bits = taken
+        while bits:
+            lowest = bits & -bits
+            near |= self.nearMasks[lowest.bit_length() - 1]
+            bits ^= lowest
+        near &= ~taken
+        moves = []
+        while near:
+            lowest = near & -near
+            moves.append(lowest.bit_length() - 1)
+            near ^= lowest
+        return moves
+
+    def set_root(self, own, other):
+        """Moves the root of the tree to the position (own, other). If the position is the root
+        or 2 moves below it, that part of the tree is kept; otherwise a new tree is started."""
+        node = None
+        if self.rootPosition is not None:
+            rootOwn, rootOther = self.rootPosition
+            ownMoves, otherMoves = own & ~rootOwn, other & ~rootOther
+            if own & rootOwn == rootOwn and other & rootOther == rootOther:
+                if ownMoves == 0 and otherMoves == 0:
+                    node = self.root
+                elif ownMoves & (ownMoves - 1) == 0 and otherMoves & (otherMoves - 1) == 0 and ownMoves and otherMoves:
+                    child = self.root.children.get(ownMoves.bit_length() - 1)
+                    if child is not None:
+                        node = child.children.get(otherMoves.bit_length() - 1)
+        if node is None:
+            node = Node(None, self.candidate_moves(own, other))
+        node.move = None
+        self.root = node
+        self.rootPosition = (own, other)
+
+    def playout(self, own, other, rng):
+        """Plays the position (own, other) to the end at random.
+
+        Returns:
+            float: 1 if the side to move wins, 0 if it loses, 0.5 for a tie.
+        """
+        geometry = self.geometry
+        taken = own | other
+        free = [cell for cell in range(geometry.cellCount) if not taken >> cell & 1]
+        rng.shuffle(free)
+        sides = [own, other]
+        turn = 0
+        for cell in free:
+            if geometry.wins_with(sides[turn], cell):
+                return 1.0 if turn == 0 else 0.0
+            sides[turn] |= 1 << cell
+            turn ^= 1
+        return 0.5
+
+    def iterate(self, rng):
+        """Runs one playout: selects a path down the tree, expands a node, plays the rest of
+        the game at random, and updates the nodes on the path."""
+        geometry = self.geometry
+        own, other = self.rootPosition
+        node = self.root
+        path = [node]
+        result = None
+        # Selection.
+        while not node.untried and node.children:
+            node = node.best_child()
+            if geometry.wins_with(own, node.move):
+                result = 1.0
+            own, other = other, own | 1 << node.move
+            path.append(node)
+            if result is not None:
+                break
+        # Expansion.
+        if result is None and node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            if geometry.wins_with(own, move):
+                result = 1.0
+            child = Node(move, [] if result is not None else self.candidate_moves(other, own | 1 << move))
+            node.children[move] = child
+            own, other = other, own | 1 << move
+            node = child
+            path.append(node)
+        # Simulation, from the point of view of the side that played the last move.
+        if result is None:
+            result = 1.0 - self.playout(own, other, rng)
+        # Backpropagation: `result` is for the side that played into the last node of the path.
+        for node in reversed(path):
+            node.visits += 1
+            node.wins += result
+            result = 1.0 - result
+
+    def run(self, timeLimit, rng):
+        """Runs playouts for `timeLimit` seconds. Returns the number of playouts run."""
+        deadline = time.perf_counter() + timeLimit
+        playouts = 0
+        # The clock is checked every few playouts, as a playout takes microseconds on small boards.
+        while playouts == 0 or time.perf_counter() < deadline:
+            for i in range(16):
+                self.iterate(rng)
+            playouts += 16
+        return playouts
+
+# The search tree of this process for every board, kept between calls of run_playouts.
+_TREES = {}
+
+def run_playouts(size, winLength, own, other, timeLimit, seed, radius=2):
+    """Grows the search tree of this process from the position (own, other) for `timeLimit`
+    seconds. Runs in the worker processes of MCTSPlayer.
+
+    Args:
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        own (int): Bitboard of the side to move.
+        other (int): Bitboard of the opponent.
+        timeLimit (float): The time budget in seconds.
+        seed (int): Seed of the random playouts.
+        radius (int): Only free grids at most this far from a taken grid are tried in the tree.
+    Returns:
+        tuple: A dictionary mapping every root move played in this call to a tuple (visits, wins)
+               of the playouts of this call in tuple[0], and the number of playouts run in tuple[1].
+    """
+    key = (size, winLength, radius)
+    if key not in _TREES:
+        _TREES[key] = TreeSearch(bitboard.get_geometry(size, winLength), radius)
+    tree = _TREES[key]
+    tree.set_root(own, other)
+    # A reused tree already has visits from earlier calls, maybe even from this position if
+    # this process got 2 tasks of the same move, so only the visits of this call are returned.
+    before = {move: (child.visits, child.wins) for move, child in tree.root.children.items()}
+    playouts = tree.run(timeLimit, random.Random(seed))
+    added = {}
+    for move, child in tree.root.children.items():
+        visits, wins = before.get(move, (0, 0.0))
+        if child.visits > visits:
+            added[move] = (child.visits - visits, child.wins - wins)
+    return added, playouts
+
+class MCTSPlayer:
+    """Chooses moves with a root-parallel Monte Carlo tree search.
+
+    Attributes:
+        geometry (bitboard.Geometry): The board the player plays on.
+        timeLimit (float): The time budget of a move in seconds.
+        workers (int): Number of worker processes. With 1 worker, the search runs in this process.
+        radius (int): Only free grids at most this far from a taken grid are tried in the tree.
+        playouts (int): Number of playouts run by all the workers for the last move.
+
+    Methods:
+        best_move(own, other):
+            Returns the move with the most playouts.
+
+        close():
+            Shuts the worker processes down.
+    """
+    def __init__(self, geometry, timeLimit=1.0, workers=None, radius=2, seed=None):
+        self.geometry = geometry
+        self.timeLimit = timeLimit
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.radius = radius
+        self.rng = random.Random(seed)
+        self.playouts = 0
+        self._executor = None
+
+    def best_move(self, own, other):
+        """Returns the bit of the move with the most playouts for the side owning `own`, after
+        searching for `timeLimit` seconds. None if the board is full."""
+        if (own | other) == self.geometry.full:
+            return None
+        # Take a win or block a loss straight away, there is nothing to search.
+        free = [cell for cell in range(self.geometry.cellCount) if not (own | other) >> cell & 1]
+        for bits in (own, other):
+            for cell in free:
+                if self.geometry.wins_with(bits, cell):
+                    return cell
+        args = (self.geometry.size, self.geometry.winLength, own, other, self.timeLimit)
+        seeds = [self.rng.getrandbits(32) for i in range(self.workers)]
+        if self.workers == 1:
+            results = [run_playouts(*args, seeds[0], self.radius)]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [self._executor.submit(run_playouts, *args, seed, self.radius) for seed in seeds]
+            results = [future.result() for future in futures]
+        visits = {}
+        self.playouts = 0
+        for moves, playouts in results:
+            self.playouts += playouts
+            for move, (moveVisits, _) in moves.items():
+                visits[move] = visits.get(move, 0) + moveVisits
+        return max(visits, key=lambda move: (visits[move], -move))
+
+    def close(self):
+        """Shuts the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -1,20 +1,26 @@
 """In-game minigames related classes and functions."""
+import os
 import random
 import sys
+import threading
+# The game engines (eg. wordlist, polyomino, mcts) are imported by the methods using them, not
+# here, so that importing this module and registering the games stays as fast as starting
+# Python. Some of them pull in slow modules like concurrent.futures or mmap.
 # Mini Games
 # Each game must inherit from BasicGame and implement the `run` method, which returns True
-# only if the player successfully finishes the game, False otherwise; and the `name` function
-# property which returns a string: the name of the game.
+# only if the player successfully finishes the game, False otherwise; and the `name` class
+# attribute, a string: the name of the game.
 
-# When the main game is inititalised, all the subclasses of BasicGame will also be inititalised
-# in GAMES[self.name].
+# When the main game is inititalised, every subclass of BasicGame is registered in GAMES[cls.name]
+# as a GameDescriptor. The game object itself is only built the first time the game is used.
 GAMES = {}
 class BasicGame:
     """Interface for Game objects.
     
     Abstract properties:
         name(): 
-            Returns the name of the game.
+            Returns the name of the game. Subclasses should override this with a class attribute,
+            so that the name is known without building the game.
     Abstract methods:  
         run():
             Runs the game. Should only return True when the game is successfully completed, False
@@ -31,28 +37,72 @@ class BasicGame:
         raise NotImplementedError("Method `run` must be implemented")
 
 class Hangman(BasicGame):
-    """A hangman game."""
-    def __init__(self):
+    """A hangman game.
+
+    Attributes:
+        words (wordlist.WordStore): All the words that can be chosen.
+        wordLength (int): If not None, only words of this length are chosen.
+        wordLetters (int): If not None, only words with this number of different letters
+                           are chosen. The more different letters, the harder the word.
+        sharedName (str): If not None, the words are read from this shared memory segment (see
+                          `wordlist.publish_shared`) instead of `dictionary.txt`. Defaults to
+                          the environment variable `wordlist.SHARED_ENV_VAR`, if set.
+    """
+    name = "Hangman"
+
+    def __init__(self, wordLength=None, wordLetters=None, sharedName=None):
         super().__init__()
-        self.words = {}
+        import wordlist
+        self.words = None
+        self.wordLength = wordLength
+        self.wordLetters = wordLetters
+        self.sharedName = sharedName if sharedName is not None else os.environ.get(wordlist.SHARED_ENV_VAR)
         self.add_words()
+        self._solver = None
 
     @property
-    def name(self):
-        return "Hangman"
+    def solver(self):
+        """The hangman_solver.HangmanSolver over this game's words, built when first used."""
+        if self._solver is None:
+            import hangman_solver
+            self._solver = hangman_solver.HangmanSolver(self.words)
+        return self._solver
 
     def add_words(self):
-        """Populate the words dictionary."""
+        """Populate the words store, through the compiled dictionary cache if possible."""
+        import wordlist
         try:
-            f = open("dictionary.txt", mode="r")
+            self.words = wordlist.load_words("dictionary.txt", sharedName=self.sharedName)
         except FileNotFoundError:
+            if self.sharedName is not None:
+                print("The shared dictionary `%s` is not found." % self.sharedName)
+                sys.exit()
             print("`dictionary.txt` is not found in the current directory of this file.")
             print("Please ensure that `dictionary.txt` is set up properly, and rerun the game.")
             sys.exit()
-        while (word := f.readline()) != '':
-            # Python's hash table lookup is much faster than a list lookup.
-            self.words[word.strip().lower()] = None
-        f.close()
+
+    def choose_word(self):
+        """Chooses the word for a new round.
+
+        Returns:
+            int: The length of the word.
+        """
+        self.chosenWord = self.words.random_word(length=self.wordLength, letters=self.wordLetters)
+        return len(self.chosenWord)
+
+    def find_letter(self, letter):
+        """Finds `letter` in the word.
+
+        Args:
+            letter (str): The letter guessed by the player.
+        Returns:
+            list: The positions of `letter` in the word. Empty if the guess is wrong.
+        """
+        return [position for position, wordLetter in enumerate(self.chosenWord) if wordLetter == letter]
+
+    def answer(self):
+        """Returns the word of this round."""
+        return self.chosenWord
 
     def run(self):
         """Runs the hangman game."""
@@ -63,8 +113,8 @@ class Hangman(BasicGame):
             # Initialise game.
             lives = 9
             # WARNING: I have absolutely no idea what the word will be.
-            chosenWord = random.sample(self.words.keys(), 1)[0]
-            guessedWord = ['_'] * len(chosenWord)
+            wordLength = self.choose_word()
+            guessedWord = ['_'] * wordLength
             guessedLetters = set()
             # Main game loop
             while lives > 0:
@@ -73,10 +123,14 @@ class Hangman(BasicGame):
 
                 # Get a valid input from user.
                 while True:
-                    letter = input("Please enter a letter (or `quit` to quit): ").strip().lower()
+                    letter = input("Please enter a letter (or `hint` for a hint, `quit` to quit): ").strip().lower()
                     if letter == "quit":
                         print("Game is quitting...")
                         return False
+                    if letter == "hint":
+                        hintLetter, possibleWords = self.solver.best_letter(guessedWord, guessedLetters)
+                        print("There are %d possible words. Try letter '%s'." % (possibleWords, hintLetter))
+                        continue
                     if len(letter) > 1:
                         print("Sorry, too many characters found. Please try again.")
                         continue
@@ -90,33 +144,101 @@ class Hangman(BasicGame):
                     break
 
                 # Updates game state.
-                result = chosenWord.find(letter)
-                if result == -1:
+                positions = self.find_letter(letter)
+                if len(positions) == 0:
                     print("Sorry, letter '%s' is not in the required word. You lost a live." % letter)
                     lives -= 1
                 else:
                     # Find all the matches
                     print("You found a correct letter '%s'!" % letter)
-                    while result != -1:
-                        guessedWord[result] = letter
-                        result = chosenWord.find(letter,result + 1)
+                    for position in positions:
+                        guessedWord[position] = letter
                 guessedLetters.add(letter)
 
                 # If there are no blanks, all letters had been guessed correctly.
                 if '_' not in guessedWord:
-                    print("You won! The answer is %s." % chosenWord)
+                    print("You won! The answer is %s." % self.answer())
                     return True
 
-            print("Sorry, you lost. The answer is %s." % chosenWord)
+            print("Sorry, you lost. The answer is %s." % self.answer())
             if not input("Play again? (yes / no): ").lower().strip().startswith('y'):
                 return False
         return True
 
+class EvilHangman(Hangman):
+    """A hangman game where the computer cheats: it does not choose a word until it has to.
+    After every guess, it keeps the largest family of words that share the same positions
+    of the guessed letter, so the player reveals as little as possible.
+
+    Inherits from Hangman.
+    Attributes defined here:
+        families (hangman_solver.WordFamilies): The words the computer can still choose from.
+    """
+    name = "Evil Hangman"
+
+    def choose_word(self):
+        """Chooses the length of the word for a new round; any word of that length can still
+        be the answer.
+
+        Returns:
+            int: The length of the word.
+        """
+        # Choose the length as the normal game would, so long words stay as rare as they are.
+        import hangman_solver
+        wordLength = len(self.words.random_word(length=self.wordLength, letters=self.wordLetters))
+        self.families = hangman_solver.WordFamilies(self.words, wordLength, self.wordLetters)
+        return wordLength
+
+    def find_letter(self, letter):
+        """Keeps the largest family of words for `letter`, see `Hangman.find_letter`."""
+        return self.families.split(letter)
+
+    def answer(self):
+        """Returns one of the words the computer can still choose from."""
+        return self.families.answer()
+
 class Puzzle(BasicGame):
     """A puzzle game, where the player have to fix back a 8 by 7 board with only the 
-    tiles given to him, without rotating any of the tiles."""
-    def __init__(self):
+    tiles given to him, without rotating any of the tiles.
+
+    Attributes:
+        blocks (list): The blocks of tiles, each a list of strings with a different letter.
+        width (int): Number of columns of the board.
+        height (int): Number of rows of the board.
+        knownSolution (list): A solution of the puzzle, the placement mask of every block (see
+                              `polyomino.iter_solutions`), or None if none is known yet.
+    """
+    name = "Fix the Puzzle"
+
+    def __init__(self, blocks=None, width=8, height=7, knownSolution=None):
+        """Initialise the puzzle with `blocks` on a `width` by `height` board. If `blocks` is
+        None, the original 8 by 7 puzzle is used. `knownSolution` is a solution of `blocks`, if
+        there is one at hand."""
         super().__init__()
+        if blocks is not None:
+            self.blocks = blocks
+            self.width = width
+            self.height = height
+        else:
+            self.set_original_blocks()
+        import polyomino
+        # The blocks are compiled once, so that a board is checked in one scan.
+        self.validator = polyomino.BoardValidator(self.blocks, self.width, self.height)
+        self.knownSolution = knownSolution
+        self.hintSolution = None
+        self.hintsGiven = 0
+
+    @classmethod
+    def generated(cls, width, height, **kwargs):
+        """Makes a puzzle with random blocks cut from a `width` by `height` board, so it surely
+        has a solution: the way the board was cut, which the hints are taken from. Keyword
+        arguments are passed to `polyomino.generate_puzzle`."""
+        import polyomino
+        blocks, solution = polyomino.generate_puzzle(width, height, **kwargs)
+        return cls(blocks, width, height, knownSolution=solution)
+
+    def set_original_blocks(self):
+        """Sets up the original 8 by 7 puzzle."""
         self.blocks = [
             ["aa",
              "a-"],
@@ -146,24 +268,39 @@ class Puzzle(BasicGame):
              "nnnn"],
             ["oo"],
         ]
+        self.width = 8
+        self.height = 7
 
-    @property
-    def name(self):
-        return "Fix the Puzzle"
-
-    def maximum_height_of_blocks(self):
-        """Finds the maximum amount of vertical space a block can take."""
+    def maximum_height_of_blocks(self, blocks=None):
+        """Finds the maximum amount of vertical space a block in `blocks` (defaults all the
+        blocks) can take."""
         maxHeight = 0
-        for block in self.blocks:
+        for block in (blocks if blocks is not None else self.blocks):
             maxHeight = max(maxHeight, len(block))
         return maxHeight
 
-    def print_blocks(self):
-        """Prints the blocks horizontally."""
-        maxHeight = self.maximum_height_of_blocks()
+    def print_blocks(self, lineWidth=79):
+        """Prints the blocks horizontally, starting a new line of blocks whenever the next block
+        would not fit in `lineWidth` characters."""
+        blockLines = [[]]
+        usedWidth = -1 # The separator before the first block of a line is not printed.
+        for block in self.blocks:
+            if usedWidth + len(block[0]) + 1 > lineWidth and len(blockLines[-1]) != 0:
+                blockLines.append([])
+                usedWidth = -1
+            blockLines[-1].append(block)
+            usedWidth += len(block[0]) + 1
+        for lineNum, blocks in enumerate(blockLines):
+            if lineNum != 0:
+                print()
+            self.print_blocks_line(blocks)
+
+    def print_blocks_line(self, blocks):
+        """Prints `blocks` side by side."""
+        maxHeight = self.maximum_height_of_blocks(blocks)
         toPrint = [[] for i in range(maxHeight)] # toPrint[height] stores what should be printed at that height.
         for height in range(maxHeight):
-            for block in self.blocks:
+            for block in blocks:
                 toPrint[height].append('|')
                 if height >= len(block):
                     # There is no tiles here for this block, fill it with empty spaces.
@@ -182,30 +319,61 @@ class Puzzle(BasicGame):
                           board the player had fixed.
         Returns:
             bool: Whether the player had actually placed all the provided blocks
-                  into the board or not.
+                  into the board or not, each exactly once and without gaps.
         """
-        return all([in_matrix(board, block) for block in self.blocks])
+        return self.validator.is_correct(board)
+
+    def show_hint(self):
+        """Shows 1 row of a correct board. Every hint shows the next row of the same board."""
+        import polyomino
+        if self.hintSolution is None and self.knownSolution is not None:
+            # Eg. a generated puzzle, which knows how its board was cut.
+            self.hintSolution = self.knownSolution
+        if self.hintSolution is None:
+            solutions = polyomino.load_solutions(self.blocks, self.width, self.height)
+            if solutions:
+                self.hintSolution = random.choice(solutions)
+            else:
+                # The solutions are not cached, so one is searched for. This is quick for small
+                # boards like the original puzzle, but may take long on large ones.
+                self.hintSolution = next(polyomino.iter_solutions(self.blocks, self.width, self.height), None)
+            if self.hintSolution is None:
+                print("Sorry, this puzzle has no solution.")
+                return
+        board = polyomino.solution_board(self.blocks, self.hintSolution, self.width, self.height)
+        row = self.hintsGiven % self.height
+        self.hintsGiven += 1
+        print("Hint: row %d of a correct board is %s." % (row + 1, board[row]))
 
     def run(self):
         """Runs this puzzle game, and returns True if the player successfully completed the puzzle."""
         print("Solve this puzzle.")
-        print("You have an empty 8 by 7 board. You are given these blocks of tiles:")
+        print("You have an empty %d by %d board. You are given these blocks of tiles:" % (self.width, self.height))
         self.print_blocks()
         print("Find a way to place these blocks of tiles back into the board, with no gaps!")
         print("To make things easier (or harder), you cannot change the orientation of the blocks.")
+        import polyomino
+        # Generated blocks may be labelled with capital letters too; only then is case important.
+        ignoreCase = all(polyomino.block_label(block).islower() for block in self.blocks)
         while True:
-            print("Enter a 8 by 7 board, or `q` on any of the lines to exit:")
+            print("Enter a %d by %d board, or `q` on any of the lines to exit (`hint` for a hint):"
+                  % (self.width, self.height))
             print("The board must be made entirely of letters, with each block shaped like the tiles shown to you.")
             user_board = []
             # Get the user's board after the tiles were filled in
-            for row in range(7):
-                line = input().strip().lower()
+            while len(user_board) < self.height:
+                line = input().strip()
+                if ignoreCase or line.lower() in ('q', 'hint'):
+                    line = line.lower()
                 if line == 'q':
                     print("You quitted the game.")
                     return False
+                if line == 'hint':
+                    self.show_hint()
+                    continue
                 user_board.append(line)
             for row in user_board:
-                if len(row) != 8:
+                if len(row) != self.width:
                     print("Your board has an incorrect size. Please try again.")
                     break # Short-circuit evaluation, if 1 is incorrect, the board is incorrect.
             else:
@@ -217,90 +385,72 @@ class Puzzle(BasicGame):
                     print("Sorry, you did not complete the puzzle. Please try again.")
 
 class TicTacToe(BasicGame):
-    """A 4 by 4 Tic Tac Toe Game."""
-    def __init__(self):
-        super().__init__()
+    """A Tic Tac Toe game on a `size` by `size` board, where `winLength` in a line wins. By
+    default, a 5 by 5 board where 4 in a line wins.
+
+    Attributes:
+        difficulty (str): How well the computer plays, one of `tictactoe_search.DIFFICULTIES`.
+                          'easy' plays a quick heuristic, the others search the game tree.
+        engine (str): How the game tree is searched, one of ENGINES: 'alphabeta' (see
+                      tictactoe_search.py), or 'mcts' (see mcts.py), which is better for
+                      large boards. Not used for the 'easy' difficulty.
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        winner (str): 'player' or 'computer' once someone had won, None otherwise.
+    """
+    name = "Tic Tac Toe"
+    ENGINES = ('alphabeta', 'mcts')
 
-        # The arrangement that needs to be seen on the board to be considered a win.
-        self.playerWinningLines = [['pppp'],
-                                   ['p',
-                                    'p',
-                                    'p',
-                                    'p'],
-                                   ['p---',
-                                    '-p--',
-                                    '--p-',
-                                    '---p'],
-                                   ['---p',
-                                    '--p-',
-                                    '-p--',
-                                    'p---']]
-        
-        self.computerWinningLines = [['cccc'],
-                                     ['c',
-                                      'c',
-                                      'c',
-                                      'c'],
-                                     ['c---',
-                                      '-c--',
-                                      '--c-',
-                                      '---c'],
-                                     ['---c',
-                                      '--c-',
-                                      '-c--',
-                                      'c---']]
-
-        # Danger, someone is going to win!
-        # Notice the slight exclusion of some cases. eg. 'p-pp'.
+    def __init__(self, difficulty='easy', size=5, winLength=4, engine='alphabeta'):
+        super().__init__()
+        import bitboard
+        import tictactoe_search
+        if difficulty not in tictactoe_search.DIFFICULTIES:
+            raise ValueError("Unknown difficulty `%s`. Expected one of %s."
+                             % (difficulty, ', '.join(tictactoe_search.DIFFICULTIES)))
+        if engine not in self.ENGINES:
+            raise ValueError("Unknown engine `%s`. Expected one of %s." % (engine, ', '.join(self.ENGINES)))
+        if not 1 < winLength <= size:
+            raise ValueError("The win length must be between 2 and the board size %d, not %d." % (size, winLength))
+        self.difficulty = difficulty
+        self.size = size
+        self.winLength = winLength
+        self.engine = engine
+        self._mctsPlayer = None
+        # The lines that need to be seen on the board to be considered a win (eg. 4 in a line), and
+        # the lines that are going to win (eg. 3 in a line), as bitmasks.
+        # Notice the slight exclusion of some cases of lines going to win. eg. 'p-pp'.
         # This ensures that the game is a little bit easier.
-        self.playerGoingToWinLines = [['ppp'],
-                                      ['p',
-                                       'p',
-                                       'p'],
-                                      ['p--',
-                                       '-p-',
-                                       '--p'],
-                                      ['--p',
-                                       '-p-',
-                                       'p--']]
-        
-        self.computerGoingToWinLines = [['ccc'],
-                                        ['c',
-                                         'c',
-                                         'c'],
-                                        ['c--',
-                                         '-c-',
-                                         '--c'],
-                                        ['--c',
-                                         '-c-',
-                                         'c--']]
-    @property
-    def name(self):
-        return "Tic Tac Toe"
+        self.geometry = bitboard.get_geometry(size, winLength)
 
     def set_up_game(self):
         """Sets up the game by resetting the state of the game."""
         self.board = []
-        for i in range(5):
-            self.board.append([' '] * 5)
-        self.gridAvailable = set(range(1, 26))
+        for i in range(self.size):
+            self.board.append([' '] * self.size)
+        self.gridAvailable = set(range(1, self.geometry.cellCount + 1))
+        # Bitboards of the grids taken by each side. Grid `move` is bit `move - 1`.
+        self.playerBits = 0
+        self.computerBits = 0
+        self.winner = None
+
+    def numbered_board(self):
+        """Returns the board with the number of every grid, as shown in the instructions."""
+        width = len(str(self.geometry.cellCount))
+        separator = '-' * ((width + 1) * self.size + 1)
+        lines = [separator]
+        for row in range(self.size):
+            numbers = range(row * self.size + 1, (row + 1) * self.size + 1)
+            lines.append(''.join('|%*d' % (width, number) for number in numbers) + '|')
+            lines.append(separator)
+        return '\n'.join(lines)
 
     def show_instructions(self):
         print("""This is a unique Tic Tac Toe game. Instead of playing in 3 by 3 board,
-you will be playing in a 5 by 5 board instead, and get 4 in a line to win!
+you will be playing in a %d by %d board instead, and get %d in a line to win!
 
 The board would be as follows:
-----------------
-| 1| 2| 3| 4| 5|
-----------------
-| 6| 7| 8| 9|10|
-----------------
-|11|12|13|14|15|
-----------------
-|16|17|18|19|20|
-----------------
-|21|22|23|24|25|
-----------------
+%s
 
 Type that particular number on that grid to place your move there.
 Type `help` to show this help message again, and `quit` to quit the game.
@@ -308,17 +458,17 @@ Type `help` to show this help message again, and `quit` to quit the game.
 In the board, 'p' represets you and 'c' represents the computer.
 
 And finally, good luck!
-""")
+""" % (self.size, self.size, self.winLength, self.numbered_board()))
 
     def print_board(self):
         """Prints the board state now."""
         print("The board now: ")
-        for i in range(0, 25, 5):
-            print('-' * 11) # Print separating line
-            for j in range(i, i + 5, 1):
-                print('|', self.board[j//5][j%5], sep='', end='') # Prints grid
+        for row in self.board:
+            print('-' * (2 * self.size + 1)) # Print separating line
+            for grid in row:
+                print('|', grid, sep='', end='') # Prints grid
             print('|')
-        print('-' * 11) # Print final border horizontal line
+        print('-' * (2 * self.size + 1)) # Print final border horizontal line
 
     def get_move(self, who):
         """Gets the move for `who`.
@@ -342,133 +492,233 @@ And finally, good luck!
                 except ValueError:
                     print("You did not enter an integer. Please try again.")
                     continue
-                if not 0 < player_move <= 25:
-                    print("Your move is out of range. Please enter an integer between 1 and 25 inclusive.")
+                if not 0 < player_move <= self.geometry.cellCount:
+                    print("Your move is out of range. Please enter an integer between 1 and %d inclusive."
+                          % self.geometry.cellCount)
                     continue
                 if player_move not in self.gridAvailable:
                     print("That gird is already taken. Plese try again.")
                     continue
                 return player_move
         elif who == 'computer':
-            winningMoves = []
-            necessaryBlockingMoves = []
-            advantageousMoves = []
-            for move in self.gridAvailable:
-                # Check whether you can win or player is going to win, and try to win / block player
-                # Try to play here.
-                self.board[(move - 1) // 5][(move - 1) % 5] = 'c'
-                if self.get_result() == "computer won": # You can win by making this move.
-                    winningMoves.append(move)
-                    
-                # Anticipate player's next move.
-                self.board[(move - 1) // 5][(move - 1) % 5] = 'p'
-                if self.get_result() == "player won": # You will lose if you do not make this move.
-                    necessaryBlockingMoves.append(move)
-
-                # Check which moves are more advantageous to you
-                self.board[(move - 1) // 5][(move - 1) % 5] = 'c'
-                if any([in_matrix(self.board, goal) for goal in self.computerGoingToWinLines]):
-                    advantageousMoves.append(move)
-
-                # Check which moves would give the player an advantage, if player chose them the next move.
-                self.board[(move - 1) // 5][(move - 1) % 5] = 'p'
-                if any([in_matrix(self.board, goal) for goal in self.playerGoingToWinLines]):
-                    advantageousMoves.append(move)
-
-                # Reset `move`
-                self.board[(move - 1) // 5][(move - 1) % 5] = ' '
-
-            if len(winningMoves) != 0:
-                # If you can win, why not?
-                return random.choice(winningMoves)
-            elif len(necessaryBlockingMoves) != 0:
-                # If player can win, stop him.
-                return random.choice(necessaryBlockingMoves)
-            
-            if len(advantageousMoves) == 0 or random.randint(1, 100) > 95:
-                # There is also a 5% chance that the computer may choose a random move
-                # instead of the ones advantaging it.
-                return random.sample(self.gridAvailable, 1)[0]
-            else:
-                # Pick one of the moves that will advantage the computer
-                return random.choice(advantageousMoves)
+            import tictactoe_book
+            import tictactoe_search
+            limits = tictactoe_search.DIFFICULTIES[self.difficulty]
+            if limits is None:
+                return self.heuristic_move()
+            if self.difficulty in tictactoe_book.BOOK_DIFFICULTIES:
+                # Positions in the opening book or the endgame table are not searched.
+                book = tictactoe_book.get_book(self.geometry)
+                entry = book.lookup(self.computerBits, self.playerBits) if book is not None else None
+                if entry is not None:
+                    return entry[0] + 1
+            maxDepth, timeLimit = limits
+            if self.engine == 'mcts':
+                return self.mctsPlayer.best_move(self.computerBits, self.playerBits) + 1
+            # The search is shared by every game on this board, so its transposition table is
+            # kept from one move and one game to the next.
+            search = tictactoe_search.get_search(self.geometry)
+            return search.best_move(self.computerBits, self.playerBits, maxDepth, timeLimit, rng=random) + 1
+
+    @property
+    def mctsPlayer(self):
+        """The Monte Carlo tree search player of the 'mcts' engine, built the first time it is
+        needed. It keeps its worker processes, and their trees, from one move to the next.
+
+        Raises:
+            ValueError: The difficulty has no time limit, eg. 'easy'.
+        """
+        if self._mctsPlayer is None:
+            import mcts
+            import tictactoe_search
+            limits = tictactoe_search.DIFFICULTIES[self.difficulty]
+            if limits is None:
+                raise ValueError("The '%s' difficulty has no time limit for the Monte Carlo player." % self.difficulty)
+            _, timeLimit = limits
+            self._mctsPlayer = mcts.MCTSPlayer(self.geometry, timeLimit)
+        return self._mctsPlayer
+
+    def heuristic_move(self):
+        """Returns the computer's move, chosen by looking only one move ahead. This is the
+        'easy' difficulty."""
+        geometry = self.geometry
+        # Score every move at once, as bitboards of the moves that:
+        # win for you,
+        winning = geometry.completing_moves(self.computerBits, self.playerBits, geometry.winLines)
+        # win for the player, so you will lose if you do not make them,
+        blocking = geometry.completing_moves(self.playerBits, self.computerBits, geometry.winLines)
+        # are more advantageous to you, or would give the player an advantage if player chose them
+        # the next move. A line that is already going to win stays there whatever the move.
+        free = geometry.full & ~(self.computerBits | self.playerBits)
+        if geometry.threatens(self.computerBits):
+            computerAdvantage = free
+        else:
+            computerAdvantage = geometry.completing_moves(self.computerBits, self.playerBits, geometry.threatLines)
+        if geometry.threatens(self.playerBits):
+            playerAdvantage = free
+        else:
+            playerAdvantage = geometry.completing_moves(self.playerBits, self.computerBits, geometry.threatLines)
+
+        winningMoves = []
+        necessaryBlockingMoves = []
+        advantageousMoves = []
+        for move in self.gridAvailable:
+            cell = move - 1
+            if winning >> cell & 1:
+                winningMoves.append(move)
+            if blocking >> cell & 1:
+                necessaryBlockingMoves.append(move)
+            # A move advantaging both is twice as likely to be picked.
+            if computerAdvantage >> cell & 1:
+                advantageousMoves.append(move)
+            if playerAdvantage >> cell & 1:
+                advantageousMoves.append(move)
+
+        if len(winningMoves) != 0:
+            # If you can win, why not?
+            return random.choice(winningMoves)
+        elif len(necessaryBlockingMoves) != 0:
+            # If player can win, stop him.
+            return random.choice(necessaryBlockingMoves)
+        
+        if len(advantageousMoves) == 0 or random.randint(1, 100) > 95:
+            # There is also a 5% chance that the computer may choose a random move
+            # instead of the ones advantaging it.
+            return random.choice(sorted(self.gridAvailable))
+        else:
+            # Pick one of the moves that will advantage the computer
+            return random.choice(advantageousMoves)
 
     def execute_move(self, move, who):
         """Excecutes the move by updating the board.
 
         Args:
-            move (int): A number between 1 to 25. Determines which space is going to be occupied.
+            move (int): A number between 1 to the number of grids. Determines which space is going
+                        to be occupied.
             who (str): Either 'player' or 'computer'. Determines who gets that space.
         Returns:
             None
         """
-        self.board[(move - 1) // 5][(move - 1) % 5] = 'p' if who == 'player' else 'c'
+        cell = move - 1
+        self.board[cell // self.size][cell % self.size] = 'p' if who == 'player' else 'c'
+        if who == 'player':
+            self.playerBits |= 1 << cell
+            bits = self.playerBits
+        else:
+            self.computerBits |= 1 << cell
+            bits = self.computerBits
         self.gridAvailable.remove(move)
+        # Only a line through this move can be new, so the rest of the board is not checked.
+        if self.winner is None and self.geometry.longest_line_through(bits, cell) >= self.winLength:
+            self.winner = who
 
     def get_result(self):
         """Gets the board's state.
 
         Returns:
-            "player won": Player had a match of 4 and won.
-            "computer won": Computer had a match of 4 and won.
+            "player won": Player had a match of `winLength` and won.
+            "computer won": Computer had a match of `winLength` and won.
             "tie": No moves left, no one wins.
             "no one won": The game is not a tie, ie. moves can still be played, and
                           no one had won yet.
         """
-        if any([in_matrix(self.board, goal) for goal in self.playerWinningLines]):
-            return "player won"
-        elif any([in_matrix(self.board, goal) for goal in self.computerWinningLines]):
-            return "computer won"
+        if self.winner is not None:
+            return self.winner + " won"
         elif len(self.gridAvailable) == 0:
             return "tie"
         else:
             return "no one won"
         
+    def play_headless(self, movers):
+        """Plays a whole game without asking for input or printing anything, eg. for games
+        between computer players.
+
+        Args:
+            movers (dict): Maps 'player' and 'computer' to a function taking the game and who is
+                           to move ('player' or 'computer'), and returning the move.
+                           'player' moves first.
+        Returns:
+            str: The result of the game, see `get_result`.
+        Raises:
+            ValueError: A mover returned a move that is not available.
+        """
+        self.set_up_game()
+        who = 'player'
+        while self.get_result() == 'no one won':
+            move = movers[who](self, who)
+            if move not in self.gridAvailable:
+                raise ValueError("The %s played %r, which is not an available grid." % (who, move))
+            self.execute_move(move, who)
+            who = 'computer' if who == 'player' else 'player'
+        return self.get_result()
+
     def run(self):
-        """Runs the game of 5 by 5 Tic Tac Toe."""
-        self.show_instructions()
-        while True:
-            self.set_up_game()
-            self.print_board()
+        """Runs the game of Tic Tac Toe."""
+        try:
+            self.show_instructions()
             while True:
-                # Your turn.
-                print("Your move: ")
-                player_move = self.get_move('player')
-                if player_move == 'quit':
-                    print("You quitted the game. Good luck next time!")
-                    return False
-                else:
-                    self.execute_move(player_move, 'player')
+                self.set_up_game()
                 self.print_board()
-                result = self.get_result()
-                if result == 'player won':
-                    print("Congratulations! You beat the computer!")
-                    return True
-                elif result == 'tie':
-                    print("Sorry, it's a tie.")
-                    break
-                # Computer's turn
-                print("It's now the computer's turn.")
-                com_move = self.get_move('computer')
-                self.execute_move(com_move, 'computer')
-                self.print_board()
-                result = self.get_result()
-                if result == 'computer won':
-                    print("Sorry, you did not beat the computer...")
-                    break
-                elif result == 'tie':
-                    print("Sorry, it's a tie.")
-                    break
+                while True:
+                    # Your turn.
+                    print("Your move: ")
+                    player_move = self.get_move('player')
+                    if player_move == 'quit':
+                        print("You quitted the game. Good luck next time!")
+                        return False
+                    else:
+                        self.execute_move(player_move, 'player')
+                    self.print_board()
+                    result = self.get_result()
+                    if result == 'player won':
+                        print("Congratulations! You beat the computer!")
+                        return True
+                    elif result == 'tie':
+                        print("Sorry, it's a tie.")
+                        break
+                    # Computer's turn
+                    print("It's now the computer's turn.")
+                    com_move = self.get_move('computer')
+                    self.execute_move(com_move, 'computer')
+                    self.print_board()
+                    result = self.get_result()
+                    if result == 'computer won':
+                        print("Sorry, you did not beat the computer...")
+                        break
+                    elif result == 'tie':
+                        print("Sorry, it's a tie.")
+                        break
                 
-            if not input("Play again? (yes / no): ").lower().strip().startswith('y'):
-                return False
+                if not input("Play again? (yes / no): ").lower().strip().startswith('y'):
+                    return False
+        finally:
+            # The Monte Carlo worker processes are not needed once the game is over.
+            self.close()
+
+    def close(self):
+        """Shuts down the worker processes of the Monte Carlo tree search player, if it had been built.
+        They are started again if another game is played."""
+        if self._mctsPlayer is not None:
+            self._mctsPlayer.close()
+
+class Gomoku(TicTacToe):
+    """Tic Tac Toe on a 15 by 15 board, where 5 in a line wins. The computer plays with the
+    Monte Carlo tree search by default, so the difficulty must have a time limit (not 'easy').
+
+    Inherits from TicTacToe.
+    """
+    name = "Gomoku"
+
+    def __init__(self, difficulty='medium', size=15, winLength=5, engine='mcts'):
+        super().__init__(difficulty, size, winLength, engine)
 
 def count_occurances_in_matrix(bigger, smaller):
     """Counts the number of times the smaller matrix is in the bigger matrix. '-' in
     the smaller matrix represents that it could represent anything. Does not check
     whether both matrixes are valid matrixes.
-    
-    Time complexity: O(N^4) as we are not expecting `bigger` to be more than 50x50.
+
+    Large matrices are counted with NumPy if it is installed (see `matrix_match.NUMPY_THRESHOLD`).
+    To find many patterns at once, use a `matrix_match.PatternMatcher` instead.
 
     Args:
         bigger (2d list): The bigget matrix to search in.
@@ -476,37 +726,13 @@ def count_occurances_in_matrix(bigger, smaller):
     Returns:
         int: Number of times `smaller` is found inside `larger`.
     """
-    if len(bigger) < len(smaller):
-        # The smaller matrix height is greater than the bigger matrix height.
-        return 0
-    elif len(bigger[0]) < len(smaller[0]):
-        # The smaller matrix length is greater than the bigger matrix length.
-        return 0
-    # Check every possible starting position of the smaller matrix (i1, j1)
-    # in the bigger matrix.
-    numOccurance = 0
-    for i1 in range(len(bigger) - len(smaller) + 1):
-        for j1 in range(len(bigger[i1]) - len(smaller[0]) + 1):
-            idxi = 0
-            found = True
-            for i2 in range(i1, i1 + len(smaller)):
-                idxj = 0
-                for j2 in range(j1, j1 + len(smaller[0])):
-                    if smaller[idxi][idxj] == '-':
-                        idxj += 1
-                        continue
-                    if bigger[i2][j2] != smaller[idxi][idxj]:
-                        found = False
-                    idxj += 1
-                idxi+=1
-            if found:
-                numOccurance += 1
-    return numOccurance
+    import matrix_match
+    return matrix_match.get_matcher([smaller]).count(bigger)[0]
 
 def in_matrix(bigger, smaller):
     """Detemines whether the smaller matrix is in the bigger matrix. '-' in
     the smaller matrix represents that it could represent anything. Does not check
-    whether both matrixes are valid matrixes.
+    whether both matrixes are valid matrixes. Stops at the first occurance.
 
     Args:
         bigger (2d list): The bigget matrix to search in.
@@ -514,14 +740,78 @@ def in_matrix(bigger, smaller):
     Returns:
         bool: Determines whether `smaller` is found inside `larger`.
     """
-    return count_occurances_in_matrix(bigger, smaller) >= 1
-    
-def set_up_games():
-    """Put all the games in the `GAMES` dictionary, where the key is equal to the game class name."""
+    import matrix_match
+    return matrix_match.get_matcher([smaller]).matches(bigger)
+
+class GameDescriptor:
+    """A lightweight stand-in for a game in `GAMES`. The game object is only built the first
+    time it is needed, so that expensive set ups (eg. loading Hangman's dictionary) are not
+    paid for games that are never played.
+
+    Attributes:
+        name (str): The name of the game.
+        cls (type): The BasicGame subclass of the game.
+
+    Methods:
+        get_game():
+            Returns the game object, building it if it is not built yet.
+
+        run():
+            Runs the game. Returns what the game's `run` method returns.
+    """
+    def __init__(self, name, cls):
+        self.name = name
+        self.cls = cls
+        self._game = None
+        # Building may happen in the warm-up thread and the main thread at the same time.
+        self._lock = threading.Lock()
+
+    @property
+    def built(self):
+        """Whether the game object had been built."""
+        return self._game is not None
+
+    def get_game(self):
+        """Returns the game object, building it if it is not built yet."""
+        if self._game is None:
+            with self._lock:
+                if self._game is None:
+                    self._game = self.cls()
+        return self._game
+
+    def run(self):
+        """Runs the game. Returns what the game's `run` method returns."""
+        return self.get_game().run()
+
+def warm_up_games():
+    """Builds all the games in `GAMES` that are not built yet."""
+    for descriptor in list(GAMES.values()):
+        descriptor.get_game()
+
+def set_up_games(warmUp=False):
+    """Put all the games in the `GAMES` dictionary, where the key is equal to the game's name.
+    The games are not built until they are used.
+
+    Args:
+        warmUp (bool): If True, the games are built in a background thread, so that they are
+                       likely ready by the time they are played. Defaults False.
+    Returns:
+        threading.Thread: The warm-up thread if `warmUp` is True, None otherwise.
+    """
     global GAMES
-    for cls in BasicGame.__subclasses__():
-        game = cls()
-        GAMES[game.name] = game
+    subclasses = BasicGame.__subclasses__()
+    while len(subclasses) != 0:
+        cls = subclasses.pop(0)
+        # Variants of a game (eg. EvilHangman) are games too.
+        subclasses.extend(cls.__subclasses__())
+        if cls.name not in GAMES:
+            GAMES[cls.name] = GameDescriptor(cls.name, cls)
+    if not warmUp:
+        return None
+    # A daemon thread, so that it never keeps the game from quitting.
+    warmUpThread = threading.Thread(target=warm_up_games, name="warm up games", daemon=True)
+    warmUpThread.start()
+    return warmUpThread
 
 if __name__ == '__main__':
     set_up_games()
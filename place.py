@@ -1,4 +1,90 @@
-"""Places in the game."""
+"""Places in the game.
+
+Classes:
+    Place:
+        A place in the game, with its game objects.
+
+    MazeGrid:
+        A grid in a maze.
+
+    Namespace:
+        The tree of the dotted names of the objects in a place.
+
+    Locator:
+        A level-wide index of where every game object is.
+"""
+import bisect
+
+class Namespace:
+    """The tree of the dotted names of the objects in a place. A name like
+    `vegetable patch.hole.chest` is the path `vegetable patch` -> `hole` -> `chest` from the
+    root, so the objects tagged to an object are the names below it.
+
+    Attributes:
+        children (dict): Maps the next segment of a name to the subtree of the names starting with it.
+        name (str): The full name of the object at this node. None if no object has this name, eg.
+                    at the root, or at `a.b` when only `a.b.c` was added.
+
+    Methods:
+        add(name):
+            Adds the name `name` to the tree.
+
+        remove(name):
+            Removes the name `name` from the tree.
+
+        is_base(name):
+            Whether `name` is a base object's name, ie. not tagged to another object.
+    """
+    __slots__ = ('children', 'name')
+
+    def __init__(self):
+        self.children = {}
+        self.name = None
+
+    def __contains__(self, name):
+        node = self._find(name)
+        return node is not None and node.name is not None
+
+    def _find(self, name):
+        """Returns the node of `name`, None if no added name starts with it."""
+        node = self
+        for segment in name.split('.'):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def add(self, name):
+        """Adds the name `name` to the tree."""
+        node = self
+        for segment in name.split('.'):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = Namespace()
+            node = child
+        node.name = name
+
+    def remove(self, name):
+        """Removes the name `name` from the tree, and the nodes left with no names below them."""
+        path = [self]
+        for segment in name.split('.'):
+            node = path[-1].children.get(segment)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].name = None
+        segments = name.split('.')
+        for idx in range(len(segments), 0, -1):
+            node = path[idx]
+            if node.name is not None or node.children:
+                break
+            del path[idx - 1].children[segments[idx - 1]]
+
+    def is_base(self, name):
+        """Whether `name` is the name of a base object: a single segment, not tagged to another object."""
+        node = self.children.get(name)
+        return node is not None and node.name is not None
+
 class Place:
     """A place in the game. Each place has many game objects.
     
@@ -6,13 +92,24 @@ class Place:
         objects (dict): All the objects in the game. Must be a mapping of a string, the object's name,
                         to the game_objects.GameObject itself.
         name (str): Name of the place.
-        baseObjects (list): List of names of objects that the player first see when he enters this place.
+        baseObjects (list): List of names of objects that the player first see when he enters this place, in
+                            the order they were added. Read only: kept up to date by an index, see
+                            `update_visibility`.
         reachable (bool): Indicates whether the player can move into this place or not.
+        locator (Locator): The index of the objects of this place's level, kept up to date by this place.
+                           None if the place is not in a level yet.
+        namespace (Namespace): The tree of the names of the objects in this place.
 
     Methods:
         describe_place(): 
             Prints the room's description and objects to the game console.
 
+        shows(name):
+            Whether the object `name` is listed when it is accessible.
+
+        update_visibility(obj):
+            Updates the index of the base objects after `obj`'s accessibility changed.
+
         add_game_objects():
             Add additional object(s) into this place.
 
@@ -29,30 +126,61 @@ class Place:
     def __init__(self, name, objects, reachable=True):
         self.objects = {}
         self.name = name
-        self.baseObjects = []
         self.reachable = reachable
+        self.locator = None
+        self.namespace = Namespace()
+        # The index of the base objects: `_visible` is a sorted list of (order, name) of the base
+        # objects that are accessible, where order is when the object was added into this place.
+        self._order = {}
+        self._nextOrder = 0
+        self._visible = []
         self.add_game_objects(objects)
+
+    @property
+    def baseObjects(self):
+        """List of names of objects that the player first see when he enters this place."""
+        return [name for _, name in self._visible]
     
     def describe_place(self):
         """Prints the room's description and objects to the game console."""
-        self.get_update_on_base_objects()
         print("This is a %s." % self.name)
         if len(self.baseObjects) != 0:
             print("You saw %s." % ', '.join(self.baseObjects))
         else:
             print("You saw nothing interesting.")
 
-    def get_update_on_base_objects(self):
-        """Updates the list of base objects, lest a base object's accessibility changed."""
-        self.baseObjects.clear()
-        for obj in self.objects:
-            if '.' in obj:
-                # An object tagged to another object cannot be the base object.
-                continue
-            gameObj = self.objects[obj]
-            if gameObj.accessible:
-                self.baseObjects.append(obj)
-            
+    def shows(self, name):
+        """Whether the object `name` is listed when the player enters this place, if it is accessible."""
+        # An object tagged to another object cannot be the base object.
+        return self.namespace.is_base(name)
+
+    def update_visibility(self, obj):
+        """Adds `obj` to the base objects if it is an accessible base object of this place, or
+        removes it otherwise. Called whenever an object's accessibility changes (see
+        `game_objects.GameObject.set_accessibility`), so the base objects never need a rescan.
+
+        Args:
+            obj (game_objects.GameObject): The object whose accessibility may have changed.
+        Returns:
+            None
+        """
+        if self.objects.get(obj.name) is not obj or not self.shows(obj.name):
+            return
+        entry = (self._order[obj.name], obj.name)
+        idx = bisect.bisect_left(self._visible, entry)
+        listed = idx < len(self._visible) and self._visible[idx] == entry
+        if obj.accessible and not listed:
+            self._visible.insert(idx, entry)
+        elif not obj.accessible and listed:
+            del self._visible[idx]
+
+    def _unlist(self, name):
+        """Removes the object `name` from the base objects, if it is listed."""
+        entry = (self._order[name], name)
+        idx = bisect.bisect_left(self._visible, entry)
+        if idx < len(self._visible) and self._visible[idx] == entry:
+            del self._visible[idx]
+
     def add_game_objects(self, gameObjectDict):
         """Add additional object(s) into this place.
         
@@ -62,18 +190,23 @@ class Place:
             self (for method chaining)
         """
         for gameObject in gameObjectDict:
+            if gameObject in self.objects:
+                # Replacing an object keeps its place in the order, like the dictionary does.
+                self._unlist(gameObject)
+            else:
+                self._order[gameObject] = self._nextOrder
+                self._nextOrder += 1
             self.objects[gameObject] = gameObjectDict[gameObject]
             self.objects[gameObject].place = self
+            self.namespace.add(gameObject)
+            if self.locator is not None:
+                self.locator.placed(gameObject, self)
             # Iterating a dictionary only iterates the keys.
-            if '.' in gameObject:
-                # Object not at base level (first seen when the room is entered),
-                # but with some redirection.
-                continue
-            elif not gameObjectDict[gameObject].accessible:
-                continue
-            # Set all the tagged objects accessibility to True.
-            self.objects[gameObject].set_accessibility(True)
-        self.get_update_on_base_objects()
+            if self.namespace.is_base(gameObject) and gameObjectDict[gameObject].accessible:
+                # Set all the tagged objects accessibility to True. Objects not at base level
+                # (first seen when the room is entered), but with some redirection, are skipped.
+                self.objects[gameObject].set_accessibility(True)
+            self.update_visibility(self.objects[gameObject])
         return self
 
     def place_object(self, obj):
@@ -98,10 +231,13 @@ class Place:
         """
         if obj.name not in self.objects:
             raise ValueError("object not in place `from_`")
-        if obj.name in self.baseObjects:
-            self.baseObjects.remove(obj.name)
+        self._unlist(obj.name)
+        self._order.pop(obj.name)
         self.objects[obj.name].place = None
         self.objects.pop(obj.name)
+        self.namespace.remove(obj.name)
+        if self.locator is not None:
+            self.locator.removed(obj.name, self)
 
     def set_reachable(self, flag):
         """Changes the setting of whether players can enter this place.
@@ -126,13 +262,21 @@ class MazeGrid(Place):
         describe_place():
             Prints the room's description and objects to the game console.
             (overridden to show coordinates instead of name.)
+
+        shows(name):
+            Whether the object `name` is listed when it is accessible.
+            (overridden to hide the directions.)
     """
+    # Directional game objects' names are not printed onto the console.
+    DIRECTIONS = ('left', 'right', 'up', 'down')
+
     def __init__(self, x, y, objects, reachable=True):
         super().__init__((x, y), objects=objects, reachable=reachable)
         self.x, self.y = x, y
-        # Remove directional game objects' names so that their names are not printed onto the console. 
-        for direction in ['left', 'right', 'up', 'down']:
-            self.baseObjects.remove(direction)
+
+    def shows(self, name):
+        """Whether the object `name` is listed when the player enters this grid, if it is accessible."""
+        return super().shows(name) and name not in self.DIRECTIONS
         
     def describe_place(self):
         """Prints the room's description and objects to the game console."""
@@ -141,3 +285,141 @@ class MazeGrid(Place):
             print("You saw %s." % ', '.join(self.baseObjects))
         else:
             print("You saw nothing interesting.")
+
+class Locator:
+    """A level-wide index of where every game object is: in which places, and in whose inventory.
+    Places and players keep it up to date as objects are added, deleted, relocated, collected
+    and removed, so finding an object does not scan the level.
+
+    Attributes:
+        places (dict): The places of the level, mapping the place's names to the place object itself.
+        locations (dict): Maps an object's name to the list of places with an object of that name,
+                          in the order of `places`.
+        owners (dict): Maps an object's name to the player that has it in the inventory.
+        nameTrie (dict): The names of all the objects in `locations` and `owners`, as a trie over
+                         their words from the last one: a node maps a word to the next node, and
+                         '' (which is never a word) to the name ending there.
+
+    Methods:
+        names_ending(words):
+            Returns the object names that are the last words of a line, the longest first.
+
+        place_of(name):
+            Returns the first place with the object `name`.
+
+        resolve(name, place, player):
+            Returns the object `name` in `place` or in `player`'s inventory.
+    """
+    def __init__(self, places):
+        """Indexes the objects in `places`, and makes the places keep the index up to date."""
+        self.places = places
+        self.locations = {}
+        self.owners = {}
+        self.nameTrie = {}
+        # The position of every place in `places`, by id, and for every object the sorted
+        # positions of the places in `locations`, so both lists are kept in order with bisect.
+        self._placeOrder = {}
+        self._orders = {}
+        for place in places.values():
+            self._placeOrder[id(place)] = len(self._placeOrder)
+            place.locator = self
+            for name in place.objects:
+                self.placed(name, place)
+
+    def placed(self, name, place):
+        """The object `name` was added into `place`."""
+        # Places outside `places` go last, in the order they are seen.
+        order = self._placeOrder.setdefault(id(place), len(self._placeOrder))
+        orders = self._orders.setdefault(name, [])
+        idx = bisect.bisect_left(orders, order)
+        if idx < len(orders) and orders[idx] == order:
+            return
+        orders.insert(idx, order)
+        if name not in self.locations and name not in self.owners:
+            self._add_name(name)
+        self.locations.setdefault(name, []).insert(idx, place)
+
+    def removed(self, name, place):
+        """The object `name` was deleted from `place`."""
+        orders = self._orders.get(name)
+        if orders is None:
+            return
+        order = self._placeOrder.get(id(place))
+        idx = bisect.bisect_left(orders, order) if order is not None else len(orders)
+        if idx == len(orders) or orders[idx] != order:
+            return
+        orders.pop(idx)
+        self.locations[name].pop(idx)
+        if len(orders) == 0:
+            self._orders.pop(name)
+            self.locations.pop(name)
+            if name not in self.owners:
+                self._remove_name(name)
+
+    def collected(self, name, player):
+        """The object `name` was added to `player`'s inventory."""
+        if name not in self.locations and name not in self.owners:
+            self._add_name(name)
+        self.owners[name] = player
+
+    def dropped(self, name, player):
+        """The object `name` was removed from `player`'s inventory."""
+        if self.owners.get(name) is player:
+            self.owners.pop(name)
+            if name not in self.locations:
+                self._remove_name(name)
+
+    def _add_name(self, name):
+        """Adds `name` to `nameTrie`."""
+        node = self.nameTrie
+        for word in reversed(name.split()):
+            node = node.setdefault(word, {})
+        node[''] = name
+
+    def _remove_name(self, name):
+        """Removes `name` from `nameTrie`, and the nodes left with no names below them."""
+        words = list(reversed(name.split()))
+        path = [self.nameTrie]
+        for word in words:
+            node = path[-1].get(word)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].pop('', None)
+        for idx in range(len(words), 0, -1):
+            if len(path[idx]) != 0:
+                break
+            del path[idx - 1][words[idx - 1]]
+
+    def names_ending(self, words):
+        """Returns the names of the objects that are the last words of `words`, the words of a
+        line typed by the player, in one walk back from the last word.
+
+        Returns:
+            list: The names, the longest first.
+        """
+        node = self.nameTrie
+        names = []
+        for word in reversed(words):
+            node = node.get(word)
+            if node is None:
+                break
+            if '' in node:
+                names.append(node[''])
+        names.reverse()
+        return names
+
+    def place_of(self, name):
+        """Returns the first place, in the order of `places`, with an object named `name`. None
+        if no place has it."""
+        locations = self.locations.get(name)
+        return locations[0] if locations else None
+
+    def resolve(self, name, place, player):
+        """Returns the object `name` in `place`, or else in `player`'s inventory. None if it is
+        in neither."""
+        if place.objects.get(name) is not None and place.locator is self:
+            return place.objects[name]
+        if self.owners.get(name) is player:
+            return player.inventory[name]
+        return None
@@ -1,6 +1,5 @@
 """Implements player in the game."""
-import utils
-import minigames
+import command
 class Player:
     """The one and only player. Please do not create more than 1 copy of
        this object.
@@ -11,6 +10,8 @@ class Player:
                       name.  
         unlocked (set): Keeps track of what locks had the player unlocked. This set contains strings, the lock's
                         name.
+        locator (place.Locator): Where every object of the current level is. Kept up to date when items are
+                                 collected and removed. None before the first level starts.
 
     Methods:
         reset(): 
@@ -44,11 +45,15 @@ class Player:
             Ask the player to enter a password until he quits or he enters the correct password.
     """
     def __init__(self):
+        self.locator = None
         self.reset()
         self.level = 1
 
     def reset(self):
         """Resets the player's state."""
+        if self.locator is not None:
+            for item in self.inventory:
+                self.locator.dropped(item, self)
         self.inventory = {}
         self.opened = set()
         self.unlocked = set()
@@ -63,7 +68,7 @@ class Player:
         
         Args:
             item (game_objects.GameObject): The item the player is trying to collect.
-            collectRequirements (str): The requirement before the object can be collected.
+            collectRequirements (command.Requirement): The requirement before the object can be collected.
         Returns:
             None
         """
@@ -74,6 +79,8 @@ class Player:
         else:
             print("`%s` has been added to your inventory." % item.name)
             self.inventory[item.name] = item
+            if self.locator is not None:
+                self.locator.collected(item.name, self)
     
     def remove_item(self, item):
         """Removes a collected `item`. 
@@ -93,6 +100,8 @@ class Player:
             success = False
         if not success:
             raise ValueError("Item not in player's inventory.")
+        if self.locator is not None:
+            self.locator.dropped(item, self)
 
     def show_inventory(self):
         """Prints player's inventory on console."""
@@ -135,7 +144,8 @@ class Player:
         """Checks that player's state fulfills the requirement given.
         
         Args:
-            requirements (str/func): The requirement the player had to fulfil. If this is not None, this string must be
+            requirements (str/func/command.Requirement): The requirement the player had to fulfil, preferably compiled
+                                     with `command.compile_requirement`. If this is not None, this string must be
                                      a semicolon-separated of requiremnts, with each requirement having a basic requirement form,
                                      or a custom function that returns True if the requirement is fulfiled.
 
@@ -152,34 +162,8 @@ class Player:
             bool: Whether the requirement is fulfiled by the player, or not.
                                   
         """
-        if requirements is None:
-            return True
-        elif callable(requirements):
-            return requirements()
-        requirements = requirements.split(';')
-        requirementFulfilled = True
-        for requirement in requirements:
-            adj, gameObject = utils.separate_first_from_last(requirement)
-            if adj == 'unlocked':
-                if gameObject not in self.unlocked:
-                    requirementFulfilled = False
-            elif adj == 'opened':
-                if gameObject not in self.opened:
-                    requirementFulfilled = False
-            elif adj == 'collected':
-                if gameObject not in self.inventory:
-                    requirementFulfilled = False
-            elif adj == 'password':
-                # This is a special case where the condition involves input from the player. The syntax is
-                #`password [password]`, and so [password] is parsed as gameObject above, not knowing this
-                # special case.
-                password = gameObject
-                requirementFulfilled = self.enter_password(password)
-            elif adj == 'played':
-                requirementFulfilled = minigames.GAMES[gameObject].run()
-            if not requirementFulfilled:
-                return False # Short-circuit evaluation.
-        return requirementFulfilled
+        # Compiled requirements are checked straight away; the others are compiled first.
+        return command.compile_requirement(requirements)(self)
 
     def enter_password(self, password):
         """This function repeatedly askes the player to enter a password until he quits or 
@@ -0,0 +1,575 @@
+"""Polyomino (block of tiles) helpers for the Fix the Puzzle game.
+
+A block is a list of strings of the same length, like the blocks in minigames.Puzzle. Every
+character other than '-' is a tile, and all the tiles of a block have the same letter, the
+block's label. A board is a list of strings; the tile at row r and column c of a board with
+width w is bit r * w + c of a bitmask.
+
+Classes:
+    BoardValidator:
+        Checks that a board is exactly covered by a set of blocks.
+
+    DancingLinks:
+        An exact cover solver (Knuth's Algorithm X with dancing links).
+
+Functions:
+    block_label(block):
+        Returns the label of a block.
+
+    block_cells(block):
+        Returns the (row, column) positions of the tiles of a block.
+
+    placement_masks(block, width, height):
+        Returns the bitmasks of every position a block can be placed on a board.
+
+    iter_solutions(blocks, width, height):
+        Yields every way to cover a board exactly with a set of blocks, lazily.
+
+    count_solutions(blocks, width, height, limit=None):
+        Counts the ways to cover a board exactly with a set of blocks.
+
+    is_solvable(blocks, width, height):
+        Checks whether a board can be covered exactly with a set of blocks.
+
+    solution_board(blocks, solution, width, height):
+        Draws a solution as a board.
+
+    cached_solutions(blocks, width, height, cacheDir=SOLUTIONS_CACHE_DIR):
+        Returns all the solutions, from a cache on disk if possible.
+
+    generate_blocks(width, height, minSize=3, maxSize=6, unique=False, rng=random):
+        Cuts a board into random blocks, so that the blocks surely cover the board.
+
+    generate_puzzle(width, height, minSize=3, maxSize=6, unique=False, rng=random):
+        Cuts a board into random blocks, and returns the blocks with the solution they were cut from.
+"""
+import hashlib
+import itertools
+import json
+import os
+import random
+import string
+import matrix_match
+from utils import bit_count
+
+# Where cached_solutions keeps the solutions it had found.
+SOLUTIONS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzle_solutions')
+# Labels given to generated blocks, in order. '-' is an empty space in a block, so it is not a label.
+LABELS = string.ascii_lowercase + string.ascii_uppercase + string.digits + string.punctuation.replace('-', '')
+
+def block_label(block):
+    """Returns the label of `block`, the letter of its tiles.
+
+    Raises:
+        ValueError: The block has no tiles, or tiles with different letters.
+    """
+    labels = set(''.join(block)) - {'-'}
+    if len(labels) != 1:
+        raise ValueError("A block must have tiles of exactly 1 letter, not %r." % block)
+    return labels.pop()
+
+def block_cells(block):
+    """Returns a list of (row, column) positions of the tiles in `block`, moved so that the
+    topmost tile is in row 0 and the leftmost tile is in column 0."""
+    cells = [(row, col) for row, line in enumerate(block) for col, tile in enumerate(line) if tile != '-']
+    top = min(row for row, _ in cells)
+    left = min(col for _, col in cells)
+    return [(row - top, col - left) for row, col in cells]
+
+def placement_masks(block, width, height):
+    """Returns the bitmasks of every position `block` can be placed in, without rotating it,
+    on a board of `width` by `height` tiles.
+
+    Args:
+        block (list): The block, as a list of strings.
+        width (int): Number of columns of the board.
+        height (int): Number of rows of the board.
+    Returns:
+        list: The bitmasks, ordered by the position of the block's top left corner.
+    """
+    cells = block_cells(block)
+    blockHeight = max(row for row, _ in cells) + 1
+    blockWidth = max(col for _, col in cells) + 1
+    # Build the mask at the top left corner once; every other placement is just a shift.
+    cornerMask = 0
+    for row, col in cells:
+        cornerMask |= 1 << (row * width + col)
+    masks = []
+    for top in range(height - blockHeight + 1):
+        for left in range(width - blockWidth + 1):
+            masks.append(cornerMask << (top * width + left))
+    return masks
+
+class BoardValidator:
+    """Checks that a board is exactly covered by a set of blocks: every tile of the board
+    belongs to a block, and the tiles of every block's label form exactly that block, once.
+
+    Attributes:
+        blocks (list): The blocks, each a list of strings.
+        width (int): Number of columns of the board.
+        height (int): Number of rows of the board.
+        tileCounts (dict): Maps the label of a block to its number of tiles.
+        matcher (matrix_match.PatternMatcher): Finds the blocks on a board.
+
+    Methods:
+        is_correct(board):
+            Checks whether the board is exactly covered by the blocks.
+    """
+    def __init__(self, blocks, width, height):
+        """Counts the tiles of every block, and compiles the blocks into a matcher.
+
+        Raises:
+            ValueError: A block is not valid, or 2 blocks have the same label.
+        """
+        self.blocks = blocks
+        self.width = width
+        self.height = height
+        self.tileCounts = {}
+        for block in blocks:
+            label = block_label(block)
+            if label in self.tileCounts:
+                raise ValueError("2 blocks have the same label %r." % label)
+            self.tileCounts[label] = len(block_cells(block))
+        # The '-' of a block is not a tile, so it matches any tile of the board.
+        self.matcher = matrix_match.PatternMatcher(blocks)
+
+    def is_correct(self, board):
+        """Checks whether `board` is exactly covered by the blocks.
+
+        Args:
+            board (list): List of strings, the board to check.
+        Returns:
+            bool: Whether every block is placed on the board exactly once, without gaps.
+        """
+        if len(board) != self.height or any(len(row) != self.width for row in board):
+            return False
+        tileCounts = {}
+        for row in board:
+            for tile in row:
+                tileCounts[tile] = tileCounts.get(tile, 0) + 1
+        if tileCounts != self.tileCounts:
+            return False
+        # Every label has as many tiles as its block, so where the block is found on the board,
+        # those are all the tiles of the label. The blocks are found in a single scan.
+        return all(count != 0 for count in self.matcher.count(board, useNumpy=False))
+
+class DancingLinks:
+    """An exact cover solver: Knuth's Algorithm X, with the matrix stored as dancing links.
+
+    Every node is an index into the lists `left`, `right`, `up`, `down` and `column`. Node 0 is
+    the root, nodes 1 to the number of columns are the column headers, and the rest are the 1s
+    of the matrix. Covering a column unlinks it and every row using it; uncovering links them
+    back in the reverse order, so nothing is ever copied.
+
+    Attributes:
+        columnCount (int): Number of primary columns (things to cover).
+        rowNames (list): The name given to every row, in the order the rows were added.
+
+    Methods:
+        add_row(name, columns):
+            Adds a row covering `columns`.
+
+        solve():
+            Yields every exact cover, as a list of row names.
+    """
+    def __init__(self, columnCount, secondaryCount=0):
+        """Initialise with `columnCount` primary columns, which must be covered exactly once,
+        followed by `secondaryCount` secondary columns, which must be covered at most once."""
+        self.columnCount = columnCount
+        nodes = columnCount + secondaryCount + 1
+        self.left = [node - 1 for node in range(nodes)]
+        self.right = [node + 1 for node in range(nodes)]
+        self.left[0] = columnCount
+        self.right[columnCount] = 0
+        for header in range(columnCount + 1, nodes):
+            # Secondary columns are not in the list of columns left to cover.
+            self.left[header] = self.right[header] = header
+        self.up = list(range(nodes))
+        self.down = list(range(nodes))
+        self.column = list(range(nodes))
+        self.size = [0] * nodes
+        self.rowOf = [-1] * nodes
+        self.rowNames = []
+
+    def add_row(self, name, columns):
+        """Adds a row covering `columns`, a list of column numbers starting from 0."""
+        row = len(self.rowNames)
+        self.rowNames.append(name)
+        first = None
+        for col in columns:
+            header = col + 1
+            node = len(self.column)
+            # Insert the node at the bottom of its column.
+            self.column.append(header)
+            self.rowOf.append(row)
+            self.up.append(self.up[header])
+            self.down.append(header)
+            self.down[self.up[header]] = node
+            self.up[header] = node
+            self.size[header] += 1
+            # Insert the node at the end of its row.
+            if first is None:
+                first = node
+                self.left.append(node)
+                self.right.append(node)
+            else:
+                self.left.append(self.left[first])
+                self.right.append(first)
+                self.right[self.left[first]] = node
+                self.left[first] = node
+            self.size.append(0)
+
+    def cover(self, header):
+        """Removes column `header` and every row that uses it."""
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        node = down[header]
+        while node != header:
+            other = right[node]
+            while other != node:
+                down[up[other]] = down[other]
+                up[down[other]] = up[other]
+                size[column[other]] -= 1
+                other = right[other]
+            node = down[node]
+
+    def uncover(self, header):
+        """Puts back column `header` and every row that uses it, undoing `cover`."""
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        node = up[header]
+        while node != header:
+            other = left[node]
+            while other != node:
+                size[column[other]] += 1
+                down[up[other]] = other
+                up[down[other]] = other
+                other = left[other]
+            node = up[node]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def solve(self):
+        """Yields every exact cover, as a list of row names. The search is iterative, so deep
+        searches do not hit the recursion limit, and it stops as soon as the caller stops
+        asking for solutions."""
+        left, right, down, column, size = self.left, self.right, self.down, self.column, self.size
+        chosen = []  # The row node chosen on every level of the search.
+        newLevel = True
+        while True:
+            if newLevel:
+                if right[0] == 0:
+                    # Every column is covered.
+                    yield [self.rowNames[self.rowOf[node]] for node in chosen]
+                    node = None
+                else:
+                    # Choose the column with the fewest rows left.
+                    header = right[0]
+                    col = right[header]
+                    while col != 0:
+                        if size[col] < size[header]:
+                            header = col
+                        col = right[col]
+                    self.cover(header)
+                    node = down[header]
+            if node is not None and node != column[node]:
+                # Try the row of `node`, and go 1 level deeper.
+                chosen.append(node)
+                other = right[node]
+                while other != node:
+                    self.cover(column[other])
+                    other = right[other]
+                newLevel = True
+                continue
+            if node is not None:
+                # Every row of this level had been tried; `node` is the level's column header.
+                self.uncover(node)
+            if len(chosen) == 0:
+                return
+            # Backtrack to the previous level, and try its next row.
+            node = chosen.pop()
+            other = left[node]
+            while other != node:
+                self.uncover(column[other])
+                other = left[other]
+            node = down[node]
+            newLevel = False
+
+def same_shape_groups(blocks):
+    """Returns the groups of blocks having the same shape, as lists of block numbers. Blocks
+    with a shape of their own are left out."""
+    groups = {}
+    for blockNum, block in enumerate(blocks):
+        groups.setdefault(tuple(sorted(block_cells(block))), []).append(blockNum)
+    return [group for group in groups.values() if len(group) > 1]
+
+def exact_cover(blocks, width, height, groups=()):
+    """Builds the exact cover problem of covering a `width` by `height` board with `blocks`.
+    There is 1 column for every block (it must be used once) and 1 for every tile of the board
+    (it must be covered once), and 1 row for every placement of every block, named by a tuple
+    (block number, placement mask).
+
+    Blocks with the same shape can swap places in any solution. For every group in `groups`
+    (lists of block numbers of blocks with the same shape), the blocks must be placed in the
+    order of their placements, so each tiling is only found once, not once for every order of
+    these blocks. This is done with secondary columns (columns that may be left uncovered):
+    for the blocks i and i + 1 of a group, there is 1 column for each placement p, which block
+    i covers if its placement is at or after p, and block i + 1 covers if its placement is at
+    or before p. The 2 blocks clash exactly when block i + 1 is not after block i.
+    """
+    cellCount = width * height
+    placements = [placement_masks(block, width, height) for block in blocks]
+    # orderColumns[blockNum] is a tuple of (first column before this block, first column after it).
+    orderColumns = {}
+    secondaryCount = 0
+    for group in groups:
+        for earlier, later in zip(group, group[1:]):
+            first = len(blocks) + cellCount + secondaryCount
+            orderColumns.setdefault(earlier, [None, None])[1] = first
+            orderColumns.setdefault(later, [None, None])[0] = first
+            secondaryCount += len(placements[earlier])
+    solver = DancingLinks(len(blocks) + cellCount, secondaryCount)
+    for blockNum, masks in enumerate(placements):
+        before, after = orderColumns.get(blockNum, (None, None))
+        for position, mask in enumerate(masks):
+            columns = [blockNum]
+            columns.extend(len(blocks) + cell for cell in range(cellCount) if mask >> cell & 1)
+            if after is not None:
+                columns.extend(range(after, after + position + 1))
+            if before is not None:
+                columns.extend(range(before + position, before + len(masks)))
+            solver.add_row((blockNum, mask), columns)
+    return solver
+
+def iter_solutions(blocks, width, height, everyOrder=True):
+    """Yields every way to cover a `width` by `height` board exactly with `blocks`, lazily.
+    Blocks with the same shape are different blocks (they have different labels), so every
+    order of them is a different solution, unless `everyOrder` is False.
+
+    Args:
+        blocks (list): The blocks, each a list of strings.
+        width (int): Number of columns of the board.
+        height (int): Number of rows of the board.
+        everyOrder (bool): If False, only 1 order of the blocks with the same shape is yielded
+                           for every tiling. Defaults True.
+    Yields:
+        list: A solution: the placement mask of every block, in the order of `blocks`.
+    """
+    if sum(len(block_cells(block)) for block in blocks) != width * height:
+        # The tiles cannot cover the board exactly; do not bother searching.
+        return
+    groups = same_shape_groups(blocks)
+    for rows in exact_cover(blocks, width, height, groups).solve():
+        solution = [0] * len(blocks)
+        for blockNum, mask in rows:
+            solution[blockNum] = mask
+        if not everyOrder:
+            yield solution
+            continue
+        # The solver only finds the blocks of a group in 1 order; hand out their placements
+        # in every order.
+        groupMasks = [[solution[blockNum] for blockNum in group] for group in groups]
+        for orders in itertools.product(*[itertools.permutations(masks) for masks in groupMasks]):
+            for group, order in zip(groups, orders):
+                for blockNum, mask in zip(group, order):
+                    solution[blockNum] = mask
+            yield list(solution)
+
+def count_solutions(blocks, width, height, limit=None, everyOrder=True):
+    """Counts the ways to cover a `width` by `height` board exactly with `blocks`, stopping at
+    `limit` solutions if it is not None. See `iter_solutions` for `everyOrder`."""
+    count = 0
+    for _ in iter_solutions(blocks, width, height, everyOrder):
+        count += 1
+        if count == limit:
+            break
+    return count
+
+def is_solvable(blocks, width, height):
+    """Checks whether a `width` by `height` board can be covered exactly with `blocks`."""
+    return count_solutions(blocks, width, height, limit=1) == 1
+
+def solution_board(blocks, solution, width, height):
+    """Draws `solution`, a placement mask for every block in `blocks`, as a board.
+
+    Returns:
+        list: The board, as a list of strings.
+    """
+    tiles = ['-'] * (width * height)
+    for block, mask in zip(blocks, solution):
+        label = block_label(block)
+        for cell in range(width * height):
+            if mask >> cell & 1:
+                tiles[cell] = label
+    return [''.join(tiles[row * width:(row + 1) * width]) for row in range(height)]
+
+def solutions_cache_path(blocks, width, height, cacheDir=SOLUTIONS_CACHE_DIR):
+    """Returns the path of the file in `cacheDir` caching the solutions of `blocks` on a `width`
+    by `height` board."""
+    key = hashlib.sha1(json.dumps([blocks, width, height]).encode()).hexdigest()
+    return os.path.join(cacheDir, key + '.json')
+
+def load_solutions(blocks, width, height, cacheDir=SOLUTIONS_CACHE_DIR):
+    """Returns the cached solutions of `blocks` on a `width` by `height` board, or None if they
+    are not cached yet. Never searches for solutions."""
+    try:
+        with open(solutions_cache_path(blocks, width, height, cacheDir), mode='r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def cached_solutions(blocks, width, height, cacheDir=SOLUTIONS_CACHE_DIR):
+    """Returns all the ways to cover a `width` by `height` board exactly with `blocks`. The
+    solutions are saved in `cacheDir`, so that they are only searched for once.
+
+    Returns:
+        list: The solutions, each a list of the placement mask of every block.
+    """
+    solutions = load_solutions(blocks, width, height, cacheDir)
+    if solutions is not None:
+        return solutions
+    solutions = list(iter_solutions(blocks, width, height))
+    path = solutions_cache_path(blocks, width, height, cacheDir)
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        # Write to a temporary file first, so that a half written cache is never read.
+        tempPath = '%s.%d.tmp' % (path, os.getpid())
+        with open(tempPath, mode='w') as f:
+            json.dump(solutions, f)
+        os.replace(tempPath, path)
+    except OSError:
+        pass
+    return solutions
+
+def neighbour_masks(width, height):
+    """Returns a list with the bitmask of the tiles next to (above, below, left or right of)
+    every tile of a `width` by `height` board."""
+    masks = []
+    for cell in range(width * height):
+        row, col = divmod(cell, width)
+        mask = 0
+        if row > 0:
+            mask |= 1 << (cell - width)
+        if row < height - 1:
+            mask |= 1 << (cell + width)
+        if col > 0:
+            mask |= 1 << (cell - 1)
+        if col < width - 1:
+            mask |= 1 << (cell + 1)
+        masks.append(mask)
+    return masks
+
+def mask_cells(mask):
+    """Returns a list of the tiles (bit numbers) in `mask`."""
+    cells = []
+    while mask:
+        lowest = mask & -mask
+        cells.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return cells
+
+def region_block(mask, label, width):
+    """Draws the tiles in `mask`, a region of a board of `width` columns, as a block labelled
+    `label`."""
+    cells = [divmod(cell, width) for cell in mask_cells(mask)]
+    top = min(row for row, _ in cells)
+    left = min(col for _, col in cells)
+    blockHeight = max(row for row, _ in cells) - top + 1
+    blockWidth = max(col for _, col in cells) - left + 1
+    block = [['-'] * blockWidth for row in range(blockHeight)]
+    for row, col in cells:
+        block[row - top][col - left] = label
+    return [''.join(line) for line in block]
+
+def cut_board(width, height, minSize, maxSize, rng):
+    """Cuts a `width` by `height` board into random connected regions of `minSize` to `maxSize`
+    tiles (a region that cannot grow to `minSize` tiles joins a region next to it, so it may be
+    bigger). There are never more regions than LABELS.
+
+    Returns:
+        list: The regions, as bitmasks.
+    """
+    neighbours = neighbour_masks(width, height)
+    regionOf = [None] * (width * height)
+    regions = []
+    free = (1 << (width * height)) - 1
+    while free:
+        # Start from the first free tile, so the tiles above and to the left are already taken.
+        start = (free & -free).bit_length() - 1
+        target = rng.randint(minSize, maxSize)
+        region = 1 << start
+        free ^= region
+        frontier = neighbours[start] & free
+        size = 1
+        while size < target and frontier:
+            cell = rng.choice(mask_cells(frontier))
+            region |= 1 << cell
+            free ^= 1 << cell
+            frontier = (frontier | neighbours[cell]) & free
+            size += 1
+        adjacent = set(regionOf[cell] for cell in mask_cells(region) for cell in mask_cells(neighbours[cell])
+                       if regionOf[cell] is not None)
+        if size < minSize and len(adjacent) != 0:
+            # Too small; join the smallest region next to it.
+            regionNum = min(adjacent, key=lambda num: bit_count(regions[num]))
+            regions[regionNum] |= region
+        else:
+            regionNum = len(regions)
+            regions.append(region)
+        for cell in mask_cells(region):
+            regionOf[cell] = regionNum
+    while len(regions) > len(LABELS):
+        # Not enough labels; join the smallest region with its smallest neighbour.
+        smallest = min(range(len(regions)), key=lambda num: bit_count(regions[num]))
+        region = regions.pop(smallest)
+        border = 0
+        for cell in mask_cells(region):
+            border |= neighbours[cell]
+        other = min((num for num in range(len(regions)) if regions[num] & border),
+                    key=lambda num: bit_count(regions[num]))
+        regions[other] |= region
+    return regions
+
+def generate_blocks(width, height, minSize=3, maxSize=6, unique=False, rng=random, attempts=100):
+    """Cuts a `width` by `height` board into random blocks. As the blocks are cut from the board,
+    they surely cover it exactly. See `generate_puzzle` for the arguments.
+
+    Returns:
+        list: The blocks, each a list of strings, labelled in the order of LABELS.
+    """
+    return generate_puzzle(width, height, minSize, maxSize, unique, rng, attempts)[0]
+
+def generate_puzzle(width, height, minSize=3, maxSize=6, unique=False, rng=random, attempts=100):
+    """Cuts a `width` by `height` board into random blocks. The way the board was cut is a
+    solution, so it is returned too, and never needs to be searched for.
+
+    Args:
+        width (int): Number of columns of the board.
+        height (int): Number of rows of the board.
+        minSize (int): The least number of tiles in a block. Defaults 3.
+        maxSize (int): The most number of tiles in a block, unless a block is too small and is
+                       joined with another, or there are more blocks than LABELS. Defaults 6.
+        unique (bool): If True, only a set of blocks with exactly 1 tiling of the board is
+                       returned (orders of blocks with the same shape are not counted). This
+                       needs a search, so it is only practical for small boards. Defaults False.
+        rng (random.Random): Source of randomness. Defaults the `random` module.
+        attempts (int): How many sets of blocks to try when `unique` is True. Defaults 100.
+    Returns:
+        tuple: The blocks in tuple[0], each a list of strings, labelled in the order of LABELS.
+               A solution in tuple[1]: the placement mask of every block, as in `iter_solutions`.
+    Raises:
+        ValueError: `unique` is True, but no set of blocks with exactly 1 tiling is found.
+    """
+    for attempt in range(attempts):
+        regions = cut_board(width, height, minSize, maxSize, rng)
+        blocks = [region_block(region, label, width) for region, label in zip(regions, LABELS)]
+        if not unique or count_solutions(blocks, width, height, limit=2, everyOrder=False) == 1:
+            # Every block is placed where it was cut from.
+            return blocks, regions
+    raise ValueError("No set of blocks with exactly 1 tiling found in %d attempts." % attempts)
+
+if __name__ == '__main__':
+    # Builds the solutions cache of the Fix the Puzzle game, so that its hints are instant.
+    import minigames
+    puzzle = minigames.Puzzle()
+    print("Found %d solutions." % len(cached_solutions(puzzle.blocks, puzzle.width, puzzle.height)))
@@ -0,0 +1,130 @@
+"""Tests of command.py."""
+import random
+
+import pytest
+
+import command
+import minigames
+import utils
+from game_objects import GameObject
+from levels import Level
+from place import Place
+from player import Player
+
+class ScriptedPlayer(Player):
+    """A player whose password guesses are given, instead of typed."""
+    def __init__(self, passwords=()):
+        super().__init__()
+        self.passwords = list(passwords)
+        self.asked = []
+
+    def enter_password(self, password):
+        self.asked.append(password)
+        return password in self.passwords
+
+def parsed_requirement(player, requirements):
+    """The old Player.fulfill_requirement: parses the requirement every time it is checked."""
+    if requirements is None:
+        return True
+    elif callable(requirements):
+        return requirements()
+    for requirement in requirements.split(';'):
+        adj, noun = utils.separate_first_from_last(requirement)
+        if adj == 'unlocked':
+            fulfilled = noun in player.unlocked
+        elif adj == 'opened':
+            fulfilled = noun in player.opened
+        elif adj == 'collected':
+            fulfilled = noun in player.inventory
+        elif adj == 'password':
+            fulfilled = player.enter_password(noun)
+        if not fulfilled:
+            return False
+    return True
+
+def test_compiled_requirements_match_parsing():
+    rng = random.Random(0)
+    forms = ['unlocked door.lock', 'opened drawer', 'collected red  key', ' collected   box ', 'password abc',
+             'password open sesame']
+    for _ in range(300):
+        requirement = ';'.join(rng.sample(forms, rng.randint(1, 4)))
+        compiled = command.compile_requirement(requirement)
+        assert command.compile_requirement(compiled) is compiled
+        unlocked = {'door.lock'} if rng.random() < 0.5 else set()
+        opened = {'drawer'} if rng.random() < 0.5 else set()
+        inventory = {name: None for name in ('red key', 'box') if rng.random() < 0.5}
+        # 2 players in the same state, one checked the old way and one with the compiled requirement.
+        expected, found = ScriptedPlayer(['abc']), ScriptedPlayer(['abc'])
+        for player in (expected, found):
+            player.unlocked, player.opened, player.inventory = set(unlocked), set(opened), dict(inventory)
+        assert compiled(found) == parsed_requirement(expected, requirement)
+        # Passwords are only asked for until a requirement is not fulfilled.
+        assert found.asked == expected.asked
+        assert found.fulfill_requirement(requirement) == compiled(found)
+
+def test_callable_and_empty_requirements():
+    calls = []
+    compiled = command.compile_requirement(lambda: calls.append(1) or True)
+    assert compiled(Player())
+    assert calls == [1]
+    assert command.compile_requirement(None)(Player())
+
+@pytest.mark.parametrize('requirement', ['unlockd door.lock', 'opened', 'collected key;', 'opened drawer; key'])
+def test_typos_fail_when_the_level_is_built(requirement):
+    with pytest.raises(ValueError):
+        command.compile_requirement(requirement)
+    with pytest.raises(ValueError):
+        GameObject('door').add_command('open', 'Opens the door.', req=requirement)
+    with pytest.raises(ValueError):
+        GameObject('key').set_collectable(requirement)
+
+def test_unknown_games_fail_once_games_are_set_up():
+    minigames.set_up_games()
+    command.compile_requirement('played Hangman')
+    with pytest.raises(ValueError):
+        command.compile_requirement('played Hangmen')
+
+def make_level():
+    """Returns a level with a room, and a player in it."""
+    drawer = GameObject('drawer')
+    drawer.add_command('open', 'Opens the drawer.', successMsg="The drawer is opened.")
+    drawer.add_command('look under', 'Looks under the drawer.', successMsg="Nothing under the drawer.")
+    objects = {'drawer': drawer, 'red key': GameObject('red key'), 'key': GameObject('key'),
+               'hidden key': GameObject('hidden key')}
+    objects['hidden key'].accessible = False
+    room = Place('room', objects)
+    levelMap = Level(1, {'room': room}, 'room')
+    player = Player()
+    player.locator = levelMap.locator
+    player.set_current_place(room)
+    return player, levelMap
+
+@pytest.mark.parametrize('line, output', [
+    ('', "`` is not a valid command."),
+    ('drawer', "Type `help drawer` for more information about this object."),
+    ('red key', "Type `help red key` for more information about this object."),
+    ('open drawer', "The drawer is opened."),
+    ('look under drawer', "Nothing under the drawer."),
+    ('open the drawer', "`the drawer` is not found."),
+    ('unlock kitchen drawer', "`kitchen drawer` is not found."),
+    ('push drawer', "drawer has no command `push`."),
+    ('take the red key', "`the red key` is not found."),
+    ('take red key', "red key has no command `take`."),
+    # Only `key` is seen, and `take hidden` is not one of its commands.
+    ('take hidden key', "`hidden key` is not found."),
+    ('open', "`open` is not a valid command."),
+    ('open box', "`box` is not found."),
+    ('show inventory', "You have nothing on you."),
+])
+def test_execute_command(capsys, line, output):
+    player, levelMap = make_level()
+    command.execute_command(player, levelMap, line.split())
+    assert capsys.readouterr().out.strip() == output
+
+def test_grammar_takes_the_longest_command():
+    grammar = command.CommandGrammar()
+    grammar.add('help', 'help').add('help', 'help object', takesNoun=True).add('help places', 'help places')
+    assert grammar.resolve(['help']) == ('help', '')
+    assert grammar.resolve(['help', 'places']) == ('help places', '')
+    assert grammar.resolve(['help', 'red', 'key']) == ('help object', 'red key')
+    assert grammar.resolve(['show']) == (None, None)
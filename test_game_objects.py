@@ -0,0 +1,72 @@
+"""Tests of the accessibility propagation of game_objects.py, against setting every object
+recursively."""
+import random
+
+from game_objects import GameObject, set_accessibilities
+
+class Reference:
+    """An object whose accessibility is set recursively, as GameObject used to do it."""
+    def __init__(self):
+        self.accessible = True
+        self.thingsOn = []
+
+    def set_accessibility(self, flag):
+        self.accessible = flag
+        for item in self.thingsOn:
+            item.set_accessibility(flag)
+
+    def add_included_item(self, item):
+        self.thingsOn.append(item)
+        item.set_accessibility(self.accessible)
+
+def attached(obj):
+    """Returns `obj` and every object attached on it, directly or not."""
+    found, stack = [], [obj]
+    while stack:
+        current = stack.pop()
+        found.append(current)
+        stack.extend(current.thingsOn)
+    return found
+
+def test_propagation_matches_recursion():
+    for trial in range(500):
+        rng = random.Random(trial)
+        count = rng.randint(1, 12)
+        objects = [GameObject(str(idx)) for idx in range(count)]
+        references = [Reference() for _ in range(count)]
+        # Objects are only attached on objects before them, so there are no cycles. Some trials
+        # attach an object on many objects.
+        shared = trial % 3 == 0
+        attachedOn = [0] * count
+        for step in range(rng.randint(1, 40)):
+            choice = rng.random()
+            if choice < 0.35:
+                first, second = rng.randrange(count), rng.randrange(count)
+                if first < second and (shared or attachedOn[second] == 0) and objects[second] not in objects[first].thingsOn:
+                    objects[first].add_included_item(objects[second])
+                    references[first].add_included_item(references[second])
+                    attachedOn[second] += 1
+            elif choice < 0.75:
+                idx, flag = rng.randrange(count), rng.random() < 0.5
+                objects[idx].set_accessibility(flag)
+                references[idx].set_accessibility(flag)
+            else:
+                changes = [(rng.randrange(count), rng.random() < 0.5) for _ in range(rng.randint(1, 4))]
+                set_accessibilities([(objects[idx], flag) for idx, flag in changes])
+                for idx, flag in changes:
+                    references[idx].set_accessibility(flag)
+            assert [obj.accessible for obj in objects] == [ref.accessible for ref in references]
+            # A subtree said to be uniform must be.
+            for obj in objects:
+                if obj._uniform:
+                    assert all(item.accessible == obj.accessible for item in attached(obj))
+
+def test_deep_chain():
+    items = [GameObject('item%d' % idx) for idx in range(20000)]
+    for idx in range(len(items) - 1, 0, -1):
+        items[idx - 1].add_included_item(items[idx])
+    items[0].set_accessibility(False)
+    assert not any(item.accessible for item in items)
+    set_accessibilities([(items[0], True), (items[10000], False)])
+    assert all(item.accessible for item in items[:10000])
+    assert not any(item.accessible for item in items[10000:])
@@ -0,0 +1,61 @@
+"""Tests of the bitset Hangman solver of hangman_solver.py, against filtering every word."""
+import random
+
+from hangman_solver import HangmanSolver
+from wordlist import WordStore
+
+WORDS = ['apple', 'apply', 'ample', 'maple', 'angle', 'ankle', 'eagle', 'tiger', 'timer', 'liver',
+         'lever', 'never', 'cat', 'cot', 'cut', 'act', 'tac', 'banana', 'bandana', 'cabana']
+
+def fits(word, pattern, guessedLetters):
+    """Checks whether `word` can be the hidden word of a game showing `pattern`."""
+    if len(word) != len(pattern):
+        return False
+    for wordLetter, shown in zip(word, pattern):
+        if shown != '_' and wordLetter != shown:
+            return False
+        if shown == '_' and wordLetter in guessedLetters:
+            return False
+    return all(letter in pattern for letter in guessedLetters if letter in word)
+
+def game_states(word, rng):
+    """Yields the states of a game against `word` guessing random letters, as tuples
+    (pattern, guessed letters)."""
+    guessedLetters = set()
+    for letter in rng.sample('abcdefghijklmnopqrstuvwxyz', 10):
+        guessedLetters.add(letter)
+        yield [wordLetter if wordLetter in guessedLetters else '_' for wordLetter in word], set(guessedLetters)
+
+def test_candidates_match_filtering():
+    store = WordStore(WORDS)
+    solver = HangmanSolver(store)
+    rng = random.Random(0)
+    for word in WORDS:
+        for pattern, guessedLetters in game_states(word, rng):
+            expected = sorted(candidate for candidate in WORDS if fits(candidate, pattern, guessedLetters))
+            assert sorted(solver.candidates(pattern, guessedLetters)) == expected
+            assert word in expected
+            letter, count = solver.best_letter(pattern, guessedLetters)
+            assert count == len(expected)
+            letterCounts = {}
+            for candidate in expected:
+                for candidateLetter in set(candidate) - guessedLetters:
+                    letterCounts[candidateLetter] = letterCounts.get(candidateLetter, 0) + 1
+            if letterCounts:
+                assert letterCounts[letter] == max(letterCounts.values())
+                assert letter == min(key for key, value in letterCounts.items() if value == letterCounts[letter])
+            else:
+                assert letter is None
+
+def test_play_finds_every_word():
+    solver = HangmanSolver(WordStore(WORDS))
+    for word in WORDS:
+        won, guesses = solver.play(word)
+        assert won
+        assert len(set(guesses)) == len(guesses)
+
+def test_unknown_word():
+    solver = HangmanSolver(WordStore(WORDS))
+    assert solver.candidates('_____', {'z'}) != []
+    assert solver.best_letter('zzzzz', set('z')) == (None, 0)
+    assert solver.play('zzzzz')[0] is False
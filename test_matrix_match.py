@@ -0,0 +1,96 @@
+"""Tests of the wildcard pattern matcher of matrix_match.py."""
+import random
+
+import pytest
+
+import matrix_match
+import minigames
+
+# The lines of 4 of a side, and the lines going to win, of the old Tic Tac Toe patterns.
+PATTERNS = [['pppp'], ['p', 'p', 'p', 'p'], ['p---', '-p--', '--p-', '---p'], ['---p', '--p-', '-p--', 'p---'],
+            ['ppp'], ['p', 'p', 'p'], ['p--', '-p-', '--p'], ['--p', '-p-', 'p--'], ['--', '--']]
+
+def baseline_count(bigger, smaller):
+    """The count of the old minigames.count_occurances_in_matrix: every position is compared
+    cell by cell."""
+    if len(bigger) < len(smaller) or len(bigger[0]) < len(smaller[0]):
+        return 0
+    count = 0
+    for top in range(len(bigger) - len(smaller) + 1):
+        for left in range(len(bigger[0]) - len(smaller[0]) + 1):
+            if all(value == '-' or bigger[top + row][left + col] == value
+                   for row, line in enumerate(smaller) for col, value in enumerate(line)):
+                count += 1
+    return count
+
+class RecordingMatrix(list):
+    """A matrix recording which rows are read."""
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.rowsRead = set()
+
+    def __getitem__(self, row):
+        self.rowsRead.add(row)
+        return super().__getitem__(row)
+
+def random_board(size, rng):
+    return [[rng.choice('pc ') for col in range(size)] for row in range(size)]
+
+def test_numpy_and_python_counts_agree():
+    pytest.importorskip('numpy')
+    rng = random.Random(0)
+    matcher = matrix_match.PatternMatcher(PATTERNS)
+    for size in (1, 3, 10, 60):
+        board = random_board(size, rng)
+        assert matcher.count(board, useNumpy=True) == matcher.count(board, useNumpy=False)
+
+def test_large_boards_are_counted_with_numpy(monkeypatch):
+    pytest.importorskip('numpy')
+    board = random_board(60, random.Random(1))
+    expected = matrix_match.PatternMatcher([PATTERNS[0]]).count(board, useNumpy=False)[0]
+    counted = []
+    countNumpy = matrix_match.PatternMatcher._count_numpy
+    monkeypatch.setattr(matrix_match.PatternMatcher, '_count_numpy',
+                        lambda self, *args: counted.append(args) or countNumpy(self, *args))
+    assert minigames.count_occurances_in_matrix(board, PATTERNS[0]) == expected
+    assert len(counted) == 1
+    assert minigames.count_occurances_in_matrix(board[:10], PATTERNS[0]) == \
+        matrix_match.PatternMatcher([PATTERNS[0]]).count(board[:10], useNumpy=False)[0]
+    assert len(counted) == 1
+
+def test_matchers_are_cached():
+    assert matrix_match.get_matcher([['pp']]) is matrix_match.get_matcher([['pp']])
+    assert matrix_match.get_matcher([['pp']]) is matrix_match.get_matcher([[['p', 'p']]])
+    assert matrix_match.get_matcher([['pp']]) is not matrix_match.get_matcher([['p', 'p']])
+
+def test_matcher_matches_baseline_scan():
+    rng = random.Random(2)
+    matcher = matrix_match.PatternMatcher(PATTERNS)
+    for size in (1, 2, 4, 7, 12):
+        for _ in range(5):
+            board = random_board(size, rng)
+            counts = matcher.count(board, useNumpy=False)
+            assert counts == [baseline_count(board, pattern) for pattern in PATTERNS]
+            assert matcher.matches(board) == any(counts)
+            for pattern, count in zip(PATTERNS, counts):
+                assert minigames.in_matrix(board, pattern) == (count != 0)
+                assert minigames.count_occurances_in_matrix(board, pattern) == count
+
+def test_find_stops_at_first_hit():
+    board = RecordingMatrix([' ' * 20 for _ in range(20)])
+    board[1] = ' pppp' + ' ' * 15
+    board.rowsRead.clear()
+    matcher = matrix_match.PatternMatcher([['pppp'], ['c']])
+    assert matcher.find(board) == (0, 1, 1)
+    assert max(board.rowsRead) == 1
+    board.rowsRead.clear()
+    assert matcher.matches(board)
+    assert max(board.rowsRead) == 1
+    board.rowsRead.clear()
+    assert matcher.count(board) == [1, 0]
+    assert max(board.rowsRead) == 19
+
+def test_find_nothing():
+    matcher = matrix_match.PatternMatcher([['pp', 'pp']])
+    assert matcher.find(['p p', ' p ', 'p p']) is None
+    assert not matcher.matches([])
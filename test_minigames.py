@@ -0,0 +1,61 @@
+"""Tests of minigames.py."""
+import os
+import random
+import subprocess
+import sys
+import time
+
+import minigames
+import polyomino
+
+# Modules that are slow to import, and only needed once a game is played.
+HEAVY_MODULES = ('concurrent.futures', 'mmap', 'multiprocessing.shared_memory', 'mcts', 'wordlist', 'polyomino')
+
+def loaded_modules(code):
+    """Runs `code` in a new interpreter, and returns the HEAVY_MODULES it had imported."""
+    check = "%s\nimport sys\nprint(' '.join(name for name in %r if name in sys.modules))" % (code, HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', check], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    return output.split()
+
+def test_import_does_not_load_engines():
+    assert loaded_modules("import minigames") == []
+
+def test_start_up_does_not_load_engines():
+    assert loaded_modules("import main\n"
+                          "main.minigames.set_up_games()\n"
+                          "main.levels.make_levels(main.player.Player())") == []
+
+def test_hint_on_generated_puzzle_is_quick(capsys):
+    puzzle = minigames.Puzzle.generated(20, 20, rng=random.Random(0))
+    start = time.perf_counter()
+    for _ in range(20):
+        puzzle.show_hint()
+    assert time.perf_counter() - start < 1.0
+    board = polyomino.solution_board(puzzle.blocks, puzzle.hintSolution, 20, 20)
+    assert puzzle.board_is_correct(board)
+    hints = capsys.readouterr().out.splitlines()
+    assert hints == ["Hint: row %d of a correct board is %s." % (row + 1, line) for row, line in enumerate(board)]
+
+def test_default_gomoku_plays_with_mcts(monkeypatch):
+    import mcts
+    moves = []
+
+    class RecordingPlayer(mcts.MCTSPlayer):
+        def best_move(self, own, other):
+            moves.append((own, other))
+            return super().best_move(own, other)
+
+    monkeypatch.setattr(mcts, 'MCTSPlayer', RecordingPlayer)
+    game = minigames.Gomoku()
+    # A short search on 1 process is enough to see that MCTS is used.
+    game.mctsPlayer.timeLimit = 0.05
+    game.mctsPlayer.workers = 1
+    game.set_up_game()
+    game.execute_move(113, 'player')
+    try:
+        move = game.get_move('computer')
+    finally:
+        game.close()
+    assert moves == [(0, 1 << 112)]
+    assert move in game.gridAvailable
@@ -0,0 +1,101 @@
+"""Tests of place.py."""
+import random
+
+from game_objects import GameObject, find_item_place, get_object, relocate_item
+from place import Locator, Namespace, Place
+from player import Player
+
+def test_namespace():
+    namespace = Namespace()
+    for name in ('drawer', 'drawer.safe.hammer', 'vegetable patch.hole'):
+        namespace.add(name)
+    assert 'drawer.safe.hammer' in namespace
+    assert 'drawer.safe' not in namespace
+    assert 'vegetable patch' not in namespace
+    assert namespace.is_base('drawer')
+    assert not namespace.is_base('drawer.safe.hammer')
+    # Only the names added are objects, even if other names start with them.
+    assert not namespace.is_base('vegetable patch')
+    namespace.remove('drawer.safe.hammer')
+    assert 'drawer.safe.hammer' not in namespace
+    assert list(namespace.children['drawer'].children) == []
+    namespace.remove('drawer')
+    namespace.remove('drawer')
+    assert not namespace.is_base('drawer')
+    assert list(namespace.children) == ['vegetable patch']
+
+def test_base_objects_are_the_accessible_undotted_names():
+    objects = {name: GameObject(name) for name in ('bed', 'bed.key', 'door', 'lamp', 'lamp.bulb')}
+    place = Place('room', objects)
+    assert place.baseObjects == ['bed', 'door', 'lamp']
+    objects['door'].set_accessibility(False)
+    assert place.baseObjects == ['bed', 'lamp']
+    place.delete_object(objects['bed'])
+    assert place.baseObjects == ['lamp']
+    place.place_object(GameObject('key'))
+    objects['door'].set_accessibility(True)
+    assert place.baseObjects == ['door', 'lamp', 'key']
+    # A dotted name is never a base object, even if nothing has the name before the dot.
+    place.place_object(GameObject('shelf.book'))
+    assert 'shelf.book' not in place.baseObjects
+
+def linear_find_item_place(places, item):
+    """The old game_objects.find_item_place: scans every place."""
+    for place in places:
+        if item in places[place].objects:
+            return places[place]
+    return None
+
+def linear_get_object(name, player, place):
+    """The old game_objects.get_object: the place, then the inventory."""
+    if name in place.objects:
+        obj = place.objects[name]
+    elif name in player.inventory:
+        obj = player.inventory[name]
+    else:
+        return None
+    return obj if obj.accessible else None
+
+def test_locator_matches_linear_search():
+    names = ['key', 'red key', 'box', 'box.key', 'old red key']
+    for trial in range(100):
+        rng = random.Random(trial)
+        places = {}
+        for placeNum in range(3):
+            objects = {}
+            for name in rng.sample(names, rng.randint(0, len(names))):
+                objects[name] = GameObject(name)
+                objects[name].set_collectable()
+            places['place %d' % placeNum] = Place('place %d' % placeNum, objects)
+        locator = Locator(places)
+        player = Player()
+        player.locator = locator
+        for step in range(30):
+            place = rng.choice(list(places.values()))
+            choice = rng.random()
+            if choice < 0.25 and place.objects:
+                # Move an object to another place, as relocate_item does.
+                name = rng.choice(sorted(place.objects))
+                other = rng.choice(list(places.values()))
+                if name not in other.objects:
+                    relocate_item(name, place, other)
+            elif choice < 0.4 and place.objects:
+                place.delete_object(place.objects[rng.choice(sorted(place.objects))])
+            elif choice < 0.55:
+                name = rng.choice(names)
+                if name not in place.objects:
+                    obj = GameObject(name)
+                    obj.set_collectable()
+                    place.place_object(obj)
+            elif choice < 0.8 and place.objects:
+                player.collect_item(place.objects[rng.choice(sorted(place.objects))], None)
+            elif choice < 0.95 and player.inventory:
+                player.remove_item(rng.choice(sorted(player.inventory)))
+            else:
+                player.reset()
+            for name in names:
+                assert find_item_place(places, name) is linear_find_item_place(places, name)
+                for place in places.values():
+                    assert get_object(name, player, place) is linear_get_object(name, player, place)
+                anywhere = name in player.inventory or any(name in place.objects for place in places.values())
+                assert (name in locator.names_ending(name.split())) == anywhere
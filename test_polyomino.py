@@ -0,0 +1,72 @@
+"""Tests of the dancing links solver of polyomino.py, against a brute force search."""
+import itertools
+import random
+
+import polyomino
+
+def brute_force_solutions(blocks, width, height):
+    """Returns every solution of `blocks` on a `width` by `height` board, by trying every
+    placement of every block."""
+    full = (1 << width * height) - 1
+    solutions = []
+    for solution in itertools.product(*[polyomino.placement_masks(block, width, height) for block in blocks]):
+        covered = 0
+        for mask in solution:
+            if covered & mask:
+                break
+            covered |= mask
+        else:
+            if covered == full:
+                solutions.append(list(solution))
+    return solutions
+
+def test_solutions_match_brute_force():
+    for seed in range(20):
+        blocks = polyomino.generate_blocks(4, 3, minSize=2, maxSize=4, rng=random.Random(seed))
+        expected = brute_force_solutions(blocks, 4, 3)
+        found = list(polyomino.iter_solutions(blocks, 4, 3))
+        assert sorted(found) == sorted(expected)
+        assert polyomino.count_solutions(blocks, 4, 3) == len(expected)
+        for solution in found:
+            assert polyomino.BoardValidator(blocks, 4, 3).is_correct(polyomino.solution_board(blocks, solution, 4, 3))
+
+def test_same_shape_blocks_are_ordered():
+    # 4 dominoes cover a 2 by 4 board in 1 tiling, with the dominoes in 4! orders.
+    blocks = [['aa'], ['bb'], ['cc'], ['dd']]
+    assert polyomino.same_shape_groups(blocks) == [[0, 1, 2, 3]]
+    assert polyomino.count_solutions(blocks, 4, 2) == 24
+    assert polyomino.count_solutions(blocks, 4, 2, everyOrder=False) == 1
+    assert polyomino.count_solutions(blocks, 4, 2, limit=5) == 5
+    # The solver only finds the dominoes in the order of their placements.
+    solution, = polyomino.iter_solutions(blocks, 4, 2, everyOrder=False)
+    assert solution == sorted(solution)
+
+def test_unsolvable_boards():
+    assert not polyomino.is_solvable([['aa'], ['bbb']], 3, 2)
+    assert not polyomino.is_solvable([['a-', 'aa'], ['b-', 'bb']], 3, 2)
+    assert polyomino.is_solvable([['a-', 'aa'], ['bb', '-b']], 3, 2)
+
+def test_cached_solutions(tmp_path):
+    blocks = polyomino.generate_blocks(4, 3, minSize=2, maxSize=4, rng=random.Random(1))
+    assert polyomino.load_solutions(blocks, 4, 3, str(tmp_path)) is None
+    solutions = polyomino.cached_solutions(blocks, 4, 3, str(tmp_path))
+    assert sorted(solutions) == sorted(brute_force_solutions(blocks, 4, 3))
+    assert polyomino.load_solutions(blocks, 4, 3, str(tmp_path)) == solutions
+    assert polyomino.cached_solutions(blocks, 4, 3, str(tmp_path)) == solutions
+
+def test_board_validator():
+    blocks = [['a-', 'aa'], ['bb', '-b']]
+    validator = polyomino.BoardValidator(blocks, 3, 2)
+    assert validator.is_correct(['abb', 'aab'])
+    # Every block is on the board, but a tile is left over.
+    assert not polyomino.BoardValidator(blocks, 4, 2).is_correct(['abba', 'aab-'])
+    # The same tiles, not in the shapes of the blocks.
+    assert not validator.is_correct(['aab', 'abb'])
+    assert not validator.is_correct(['abb', 'aa'])
+    assert not validator.is_correct(['abc', 'aab'])
+
+def test_generated_puzzle_solution():
+    for seed in range(10):
+        blocks, solution = polyomino.generate_puzzle(8, 6, rng=random.Random(seed))
+        assert polyomino.BoardValidator(blocks, 8, 6).is_correct(polyomino.solution_board(blocks, solution, 8, 6))
+        assert polyomino.generate_blocks(8, 6, rng=random.Random(seed)) == blocks
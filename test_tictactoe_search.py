@@ -0,0 +1,63 @@
+"""Tests of the alpha-beta search of tictactoe_search.py, against a plain negamax search."""
+import random
+
+import bitboard
+import tictactoe_search
+from tictactoe_search import AlphaBetaSearch, TranspositionTable, WIN_SCORE
+
+def plain_negamax(geometry, own, other, ply=0):
+    """Returns the score of a position for the side owning `own`, searched to the end of the
+    game without pruning, scored like AlphaBetaSearch."""
+    if (own | other) == geometry.full:
+        return 0
+    bestScore = -WIN_SCORE - 1
+    for cell in range(geometry.cellCount):
+        if (own | other) >> cell & 1:
+            continue
+        if geometry.wins_with(own, cell):
+            score = WIN_SCORE - ply - 1
+        else:
+            score = -plain_negamax(geometry, other, own | 1 << cell, ply + 1)
+        bestScore = max(bestScore, score)
+    return bestScore
+
+def random_positions(geometry, count, rng):
+    """Returns `count` random positions of `geometry` where nobody has won yet and the board
+    is not full, as (own, other) pairs for the side to move."""
+    positions = []
+    while len(positions) < count:
+        own, other = 0, 0
+        for _ in range(rng.randrange(geometry.cellCount - 1)):
+            cell = rng.choice([cell for cell in range(geometry.cellCount) if not (own | other) >> cell & 1])
+            own |= 1 << cell
+            if geometry.wins(own):
+                break
+            own, other = other, own
+        else:
+            positions.append((own, other))
+    return positions
+
+def test_search_matches_plain_negamax():
+    geometry = bitboard.get_geometry(3, 3)
+    # One search for every position, so the transposition table is also reused across them.
+    search = AlphaBetaSearch(geometry, TranspositionTable())
+    for own, other in [(0, 0)] + random_positions(geometry, 40, random.Random(0)):
+        expected = plain_negamax(geometry, own, other)
+        move = search.best_move(own, other, maxDepth=64)
+        assert search.score == expected
+        # The move must be as good as the score.
+        if geometry.wins_with(own, move):
+            assert expected == WIN_SCORE - 1
+        else:
+            assert -plain_negamax(geometry, other, own | 1 << move, 1) == expected
+
+def test_empty_board_is_a_draw():
+    search = AlphaBetaSearch(bitboard.get_geometry(3, 3), TranspositionTable())
+    search.best_move(0, 0, maxDepth=64)
+    assert search.score == 0
+
+def test_full_board_has_no_move():
+    geometry = bitboard.get_geometry(3, 3)
+    search = tictactoe_search.get_search(geometry)
+    assert search is tictactoe_search.get_search(geometry)
+    assert search.best_move(0b101110001, 0b010001110, maxDepth=4) is None
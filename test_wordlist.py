@@ -0,0 +1,73 @@
+"""Tests of the compiled dictionary cache of wordlist.py."""
+import os
+
+import pytest
+
+import wordlist
+
+def write_words(path, words, mtime=None):
+    with open(path, mode='w') as f:
+        f.write('\n'.join(words) + '\n')
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+def test_cache_is_built_and_reused(tmp_path):
+    path = str(tmp_path / 'words.txt')
+    write_words(path, ['cat', 'dog', 'bird'])
+    store = wordlist.load_words(path)
+    assert isinstance(store, wordlist.MappedWordStore)
+    assert sorted(store) == ['bird', 'cat', 'dog']
+    cacheTime = os.stat(wordlist.cache_path(path)).st_mtime_ns
+    store.release()
+    store = wordlist.load_words(path)
+    assert sorted(store) == ['bird', 'cat', 'dog']
+    assert os.stat(wordlist.cache_path(path)).st_mtime_ns == cacheTime
+    assert sorted(os.listdir(str(tmp_path))) == ['words.bin', 'words.txt']
+    store.release()
+
+@pytest.mark.parametrize('words, mtime', [
+    # The same size, but modified later.
+    (['cat', 'dog', 'owl'], 2 * 10 ** 18),
+    # Modified at the same time, but a different size.
+    (['cat', 'dog', 'bird', 'fish'], 10 ** 18),
+])
+def test_cache_is_rebuilt_when_the_words_change(tmp_path, words, mtime):
+    path = str(tmp_path / 'words.txt')
+    write_words(path, ['cat', 'dog', 'bee'], mtime=10 ** 18)
+    wordlist.load_words(path).release()
+    write_words(path, words, mtime=mtime)
+    store = wordlist.load_words(path)
+    assert sorted(store) == sorted(words)
+    store.release()
+    assert sorted(wordlist.map_compiled(wordlist.cache_path(path))) == sorted(words)
+
+def test_truncated_cache_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'words.txt')
+    words = ['word%d' % idx for idx in range(100)]
+    write_words(path, words)
+    wordlist.load_words(path).release()
+    cachePath = wordlist.cache_path(path)
+    with open(cachePath, mode='rb') as f:
+        compiled = f.read()
+    for size in (0, 10, wordlist.HEADER.size + 1, len(compiled) // 2 + 1, len(compiled) - 1):
+        with open(cachePath, mode='wb') as f:
+            f.write(compiled[:size])
+        # Every truncated file is a ValueError, which load_words recovers from. An empty file
+        # cannot even be mapped.
+        with pytest.raises(ValueError):
+            wordlist.map_compiled(cachePath)
+        store = wordlist.load_words(path)
+        assert isinstance(store, wordlist.MappedWordStore)
+        assert sorted(store) == sorted(words)
+        store.release()
+
+def test_failed_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'words.txt')
+    write_words(path, ['cat', 'dog'])
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, 'replace', fail)
+    store = wordlist.load_words(path)
+    assert not isinstance(store, wordlist.MappedWordStore)
+    assert sorted(store) == ['cat', 'dog']
+    assert os.listdir(str(tmp_path)) == ['words.txt']
@@ -0,0 +1,396 @@
+"""An opening book and endgame table for the Tic Tac Toe game.
+
+The book maps positions to their best move. It is built offline, by running
+`python tictactoe_book.py`, and saved to a file that the game memory-maps, so that looking a
+position up is a single hash table probe instead of a search. Only one position of the 8 that
+are the same up to a rotation or reflection of the board is kept.
+
+The book has:
+    - the opening: every position with fewer than `openingPlies` stones, searched like the
+      'expert' difficulty.
+    - the endgame: positions with at most `endgameEmpty` free grids, solved exactly. There are
+      far too many of them to list, so the ones reached in `endgameGames` random games are kept.
+Only positions where the computer is to move are kept: the player moves first, so these are
+the positions with an odd number of stones. The book plays as well as the best difficulty or
+better, so it is only used by the difficulties in BOOK_DIFFICULTIES; the others keep the
+depth and time limits of their searches.
+
+Classes:
+    Symmetries:
+        The 8 rotations and reflections of a board, and canonical positions.
+
+    Book:
+        A book read from a compiled book buffer.
+
+Functions:
+    build_book(size, winLength, ...):
+        Searches the positions of a book with a pool of worker processes.
+
+    compile_book(size, winLength, entries):
+        Compiles the entries of a book into the book format.
+
+    get_book(geometry):
+        Returns the book of a geometry, if it had been built.
+
+The book format (all numbers little-endian):
+    header: magic b'TTTB', version (uint16), board size (uint16), win length (uint16),
+            reserved (uint16), number of slots (uint32), number of entries (uint32).
+    slots: an open addressing hash table (with linear probing) of slots, each a key (uint64),
+           a move (uint8) and a result (int8). The key of an empty slot is 0.
+
+A key is the canonical position (see Symmetries.canonical) with bit 63 set. The move is a bit
+of the canonical position, and the result is for the side to move in it: RESULT_WIN,
+RESULT_DRAW, RESULT_LOSS, or RESULT_UNKNOWN if the position was not searched to the end.
+"""
+import mmap
+import os
+import random
+import struct
+import bitboard
+import tictactoe_search
+from utils import bit_count
+
+MAGIC = b'TTTB'
+# Version 2 only has the positions where the computer is to move, searched like 'expert'.
+VERSION = 2
+HEADER = struct.Struct('<4sHHHHII')
+SLOT = struct.Struct('<QBb')
+# Set in every key, so that the key of the empty board is not 0, the key of an empty slot.
+USED = 1 << 63
+# Multiplier of the key hashes (Fibonacci hashing).
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+RESULT_WIN, RESULT_DRAW, RESULT_LOSS, RESULT_UNKNOWN = 1, 0, -1, -128
+
+# The difficulties that play the moves of the book.
+BOOK_DIFFICULTIES = ('expert',)
+
+def computer_to_move(own, other):
+    """Whether the computer is to move in the position (own, other): the player moves first, so
+    the computer moves when there is an odd number of stones."""
+    return bit_count(own | other) % 2 == 1
+
+def book_path(size, winLength):
+    """Returns the path of the book of a `size` by `size` board where `winLength` in a line wins."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'tictactoe_book_%d_%d.bin' % (size, winLength))
+
+class Symmetries:
+    """The 8 rotations and reflections of a `size` by `size` board.
+
+    Attributes:
+        size (int): Number of rows (and columns) of the board.
+        permutations (list): permutations[i][cell] is where bit `cell` goes in symmetry i.
+        inverses (list): inverses[i][cell] is where bit `cell` comes from in symmetry i.
+
+    Methods:
+        canonical(own, other):
+            Returns the canonical form of a position.
+    """
+    def __init__(self, size):
+        if 2 * size * size > 63:
+            raise ValueError("A %d by %d board is too large for a book." % (size, size))
+        self.size = size
+        last = size - 1
+        transforms = [
+            lambda row, col: (row, col),
+            lambda row, col: (col, last - row),
+            lambda row, col: (last - row, last - col),
+            lambda row, col: (last - col, row),
+            lambda row, col: (row, last - col),
+            lambda row, col: (last - row, col),
+            lambda row, col: (col, row),
+            lambda row, col: (last - col, last - row),
+        ]
+        self.permutations = []
+        self.inverses = []
+        for transform in transforms:
+            permutation = [0] * (size * size)
+            for cell in range(size * size):
+                row, col = transform(cell // size, cell % size)
+                permutation[cell] = row * size + col
+            inverse = [0] * (size * size)
+            for cell, image in enumerate(permutation):
+                inverse[image] = cell
+            self.permutations.append(permutation)
+            self.inverses.append(inverse)
+
+    @staticmethod
+    def apply(bits, permutation):
+        """Returns the bitboard `bits` with every bit moved by `permutation`."""
+        moved = 0
+        while bits:
+            lowest = bits & -bits
+            moved |= 1 << permutation[lowest.bit_length() - 1]
+            bits ^= lowest
+        return moved
+
+    def canonical(self, own, other):
+        """Returns the canonical form of the position where the side to move has `own` and the
+        opponent `other`: the smallest packing `own | other << size * size` over the 8
+        symmetries.
+
+        Returns:
+            tuple: The canonical packing in tuple[0], and the index of its symmetry in tuple[1].
+        """
+        shift = self.size * self.size
+        best, bestSymmetry = None, 0
+        for idx, permutation in enumerate(self.permutations):
+            packed = self.apply(own, permutation) | self.apply(other, permutation) << shift
+            if best is None or packed < best:
+                best, bestSymmetry = packed, idx
+        return best, bestSymmetry
+
+    def unpack(self, packed):
+        """Returns the position (own, other) of the packing `packed`."""
+        shift = self.size * self.size
+        return packed & ((1 << shift) - 1), packed >> shift
+
+def slot_index(key, slotBits):
+    """Returns the first slot to probe for `key` in a table of 2 ** `slotBits` slots."""
+    return ((key * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - slotBits)
+
+class Book:
+    """A book read from a compiled book buffer (see `compile_book`), usually a memory-mapped
+    file. Nothing but the header is read until a position is looked up.
+
+    Attributes:
+        buffer (buffer): The buffer holding the compiled book.
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        entryCount (int): Number of positions in the book.
+
+    Methods:
+        lookup(own, other):
+            Returns the best move and the result of a position, if it is in the book.
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        magic, version, self.size, self.winLength, _, self.slotCount, self.entryCount = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a compiled Tic Tac Toe book.")
+        self.slotBits = self.slotCount.bit_length() - 1
+        self.symmetries = Symmetries(self.size)
+
+    def __len__(self):
+        return self.entryCount
+
+    def lookup(self, own, other):
+        """Returns the best move and the result of the position where the side to move has
+        `own` and the opponent `other`.
+
+        Returns:
+            tuple: The bit of the best move in tuple[0], and the result for the side to move in
+                   tuple[1]. None if the position is not in the book.
+        """
+        packed, symmetry = self.symmetries.canonical(own, other)
+        key = packed | USED
+        idx = slot_index(key, self.slotBits)
+        for probe in range(self.slotCount):
+            slotKey, move, result = SLOT.unpack_from(self.buffer, HEADER.size + SLOT.size * idx)
+            if slotKey == key:
+                # The move is in the canonical position, so move it back.
+                return self.symmetries.inverses[symmetry][move], result
+            if slotKey == 0:
+                return None
+            idx = (idx + 1) % self.slotCount
+        return None
+
+    def release(self):
+        """Closes the buffer if it is a memory map."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+def compile_book(size, winLength, entries):
+    """Compiles a book into the book format.
+
+    Args:
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        entries (dict): Maps a canonical packing to a tuple (move, result).
+    Returns:
+        bytes: The compiled book.
+    """
+    # At most half of the slots are used, so that probes stay short.
+    slotBits = max(1, (2 * len(entries)).bit_length())
+    slotCount = 1 << slotBits
+    slots = [None] * slotCount
+    for packed, (move, result) in entries.items():
+        key = packed | USED
+        idx = slot_index(key, slotBits)
+        while slots[idx] is not None:
+            idx = (idx + 1) % slotCount
+        slots[idx] = (key, move, result)
+    data = bytearray(HEADER.pack(MAGIC, VERSION, size, winLength, 0, slotCount, len(entries)))
+    empty = SLOT.pack(0, 0, 0)
+    for slot in slots:
+        data += SLOT.pack(*slot) if slot is not None else empty
+    return bytes(data)
+
+def solve_positions(size, winLength, positions, maxDepth, timeLimit):
+    """Searches the best move of every position. Runs in the worker processes of `build_book`.
+
+    Args:
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        positions (list): Canonical packings of the positions to search.
+        maxDepth (int): The maximum depth of the search. None to search to the end.
+        timeLimit (float): The time budget of each position in seconds. None for no limit.
+    Returns:
+        list: A tuple (packing, move, result) for every position.
+    """
+    geometry = bitboard.get_geometry(size, winLength)
+    symmetries = Symmetries(size)
+    search = tictactoe_search.get_search(geometry)
+    results = []
+    for packed in positions:
+        own, other = symmetries.unpack(packed)
+        freeCount = geometry.cellCount - bit_count(own | other)
+        move = search.best_move(own, other, maxDepth or freeCount, timeLimit)
+        if search.score > tictactoe_search.WIN_THRESHOLD:
+            result = RESULT_WIN
+        elif search.score < -tictactoe_search.WIN_THRESHOLD:
+            result = RESULT_LOSS
+        elif search.depthReached >= freeCount:
+            result = RESULT_DRAW
+        else:
+            result = RESULT_UNKNOWN
+        results.append((packed, move, result))
+    return results
+
+def opening_positions(geometry, symmetries, openingPlies):
+    """Returns the canonical packings of every position with fewer than `openingPlies` stones
+    where the computer is to move."""
+    positions = set()
+    layer = {symmetries.canonical(0, 0)[0]}
+    for ply in range(openingPlies):
+        if ply % 2 == 1:
+            # `ply` stones: the computer is to move.
+            positions |= layer
+        nextLayer = set()
+        for packed in layer:
+            own, other = symmetries.unpack(packed)
+            for cell in range(geometry.cellCount):
+                if (own | other) >> cell & 1:
+                    continue
+                if geometry.wins_with(own, cell):
+                    continue
+                nextLayer.add(symmetries.canonical(other, own | 1 << cell)[0])
+        layer = nextLayer
+    return positions
+
+def endgame_positions(geometry, symmetries, endgameEmpty, games, rng):
+    """Returns the canonical packings of the positions with at most `endgameEmpty` free grids,
+    no winner, and the computer to move, reached in `games` games. The games are played at random, except that a
+    winning move is always taken and a losing one always blocked."""
+    positions = set()
+    for game in range(games):
+        own = other = 0
+        while True:
+            free = [cell for cell in range(geometry.cellCount) if not (own | other) >> cell & 1]
+            if len(free) == 0:
+                break
+            if len(free) <= endgameEmpty and computer_to_move(own, other):
+                positions.add(symmetries.canonical(own, other)[0])
+            winning = [cell for cell in free if geometry.wins_with(own, cell)]
+            if len(winning) != 0:
+                break
+            blocking = [cell for cell in free if geometry.wins_with(other, cell)]
+            cell = rng.choice(blocking or free)
+            own, other = other, own | 1 << cell
+    return positions
+
+def build_book(size, winLength, openingPlies=4, endgameEmpty=9, endgameGames=2000,
+               workers=None, seed=0, chunkSize=64):
+    """Searches the positions of a book with a pool of worker processes.
+
+    Args:
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        openingPlies (int): Positions with fewer stones than this are in the opening.
+        endgameEmpty (int): Positions with at most this many free grids are in the endgame.
+        endgameGames (int): Number of random games the endgame positions are taken from.
+        workers (int): Number of worker processes. Defaults to the number of CPUs.
+        seed (int): Seed of the random games.
+        chunkSize (int): Number of positions given to a worker at a time.
+    Returns:
+        dict: Maps a canonical packing to a tuple (move, result).
+    """
+    # Only building the book needs worker processes; the game only reads it.
+    from concurrent.futures import ProcessPoolExecutor
+    geometry = bitboard.get_geometry(size, winLength)
+    symmetries = Symmetries(size)
+    maxDepth, timeLimit = tictactoe_search.DIFFICULTIES['expert']
+    opening = sorted(opening_positions(geometry, symmetries, openingPlies))
+    endgame = sorted(endgame_positions(geometry, symmetries, endgameEmpty, endgameGames, random.Random(seed))
+                     - set(opening))
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(solve_positions, size, winLength, opening[i:i + chunkSize], maxDepth, timeLimit)
+                   for i in range(0, len(opening), chunkSize)]
+        # The endgame is searched to the end, with no time limit.
+        futures += [executor.submit(solve_positions, size, winLength, endgame[i:i + chunkSize], None, None)
+                    for i in range(0, len(endgame), chunkSize)]
+        for future in futures:
+            for packed, move, result in future.result():
+                entries[packed] = (move, result)
+    return entries
+
+def write_book(path, size, winLength, entries):
+    """Compiles the book `entries` and writes it to `path`."""
+    # Write to a temporary file first, so that a half written book is never read.
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+    with open(tempPath, mode='wb') as f:
+        f.write(compile_book(size, winLength, entries))
+    os.replace(tempPath, path)
+
+def map_book(path):
+    """Memory-maps the book at `path` read-only.
+
+    Raises:
+        OSError: The file cannot be opened or mapped.
+        ValueError: The file is not a compiled book.
+    """
+    with open(path, mode='rb') as f:
+        # The mapping stays valid after the file is closed.
+        return Book(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+_BOOKS = {}
+
+def get_book(geometry):
+    """Returns the book of `geometry`, memory-mapped the first time it is asked for. None if
+    the book had not been built, or is not for this geometry."""
+    if geometry not in _BOOKS:
+        try:
+            book = map_book(book_path(geometry.size, geometry.winLength))
+        except (OSError, ValueError):
+            book = None
+        if book is not None and (book.size, book.winLength) != (geometry.size, geometry.winLength):
+            book.release()
+            book = None
+        _BOOKS[geometry] = book
+    return _BOOKS[geometry]
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Builds the opening book and endgame table of Tic Tac Toe.")
+    parser.add_argument('--size', type=int, default=5, help="Number of rows and columns of the board. Defaults 5.")
+    parser.add_argument('--win-length', type=int, default=4, help="Number of grids in a line to win. Defaults 4.")
+    parser.add_argument('--opening-plies', type=int, default=4,
+                        help="Positions with fewer stones than this are in the opening. Defaults 4.")
+    parser.add_argument('--endgame-empty', type=int, default=9,
+                        help="Positions with at most this many free grids are in the endgame. Defaults 9.")
+    parser.add_argument('--endgame-games', type=int, default=2000,
+                        help="Number of random games the endgame positions are taken from. Defaults 2000.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes. Defaults all CPUs.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the random games. Defaults 0.")
+    args = parser.parse_args()
+    entries = build_book(args.size, args.win_length, args.opening_plies, args.endgame_empty,
+                         args.endgame_games, args.workers, args.seed)
+    path = book_path(args.size, args.win_length)
+    write_book(path, args.size, args.win_length, entries)
+    print("Wrote %d positions to %s." % (len(entries), path))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""Alpha-beta search for the Tic Tac Toe game.
+
+Positions are pairs of bitboards (see bitboard.py). The search is a negamax alpha-beta search
+with iterative deepening under a time budget, and a transposition table keyed by Zobrist hashes.
+The transposition table of a board geometry is shared by every search on that geometry in the
+process, so positions seen in earlier moves or earlier games are not searched again.
+
+Classes:
+    ZobristKeys:
+        Random 64-bit keys for every (side, grid), used to hash positions.
+
+    TranspositionTable:
+        A size-capped table of the results of searched positions.
+
+    AlphaBetaSearch:
+        Finds the best move of a position.
+
+Functions:
+    get_search(geometry):
+        Returns the AlphaBetaSearch of a geometry, building it only once.
+"""
+import random
+import time
+from utils import bit_count
+
+# Difficulty levels of the computer player, mapped to (maximum depth, time limit in seconds) of
+# the search. None means the quick heuristic of TicTacToe is used instead of a search.
+DIFFICULTIES = {
+    'easy': None,
+    'medium': (2, 0.2),
+    'hard': (4, 1.0),
+    'expert': (64, 3.0),
+}
+
+# Score of a win. Wins found sooner score higher, so the search goes for the quickest win and
+# the slowest loss.
+WIN_SCORE = 1000000
+# Any score beyond this is a win or a loss.
+WIN_THRESHOLD = WIN_SCORE - 1000
+
+# Flags of the scores stored in the transposition table.
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent."""
+
+class ZobristKeys:
+    """Random 64-bit keys for hashing positions. The hash of a position is the xor of the keys
+    of every taken grid, with `sideKey` xor-ed in when the second side is to move, so a hash
+    can be updated with a single xor per move.
+
+    Attributes:
+        cells (list): cells[side][cell] is the key of `side` (0 or 1) taking bit `cell`.
+        sideKey (int): The key xor-ed in when side 1 is to move.
+    """
+    def __init__(self, cellCount, seed=0):
+        rng = random.Random(seed)
+        self.cells = [[rng.getrandbits(64) for cell in range(cellCount)] for side in range(2)]
+        self.sideKey = rng.getrandbits(64)
+
+    def hash(self, bits0, bits1, sideToMove=0):
+        """Returns the hash of the position where side 0 has `bits0`, side 1 has `bits1`, and
+        `sideToMove` is to move."""
+        key = self.sideKey if sideToMove else 0
+        for side, bits in enumerate((bits0, bits1)):
+            while bits:
+                lowest = bits & -bits
+                key ^= self.cells[side][lowest.bit_length() - 1]
+                bits ^= lowest
+        return key
+
+class TranspositionTable:
+    """A size-capped table of the results of searched positions, keyed by Zobrist hash.
+
+    An entry is only replaced by a search of at least the same depth. When the table is full,
+    the oldest entry is dropped to make space for a new one.
+
+    Attributes:
+        capacity (int): The maximum number of entries.
+        entries (dict): Maps a hash to a tuple (depth, score, flag, bestMove).
+        hits (int): Number of lookups that found an entry.
+    """
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.entries = {}
+        self.hits = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the entry of `key`, None if there is none."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def store(self, key, depth, score, flag, bestMove):
+        """Stores the result of a search of `depth` plies on the position `key`."""
+        old = self.entries.get(key)
+        if old is not None:
+            if old[0] > depth:
+                return
+        elif len(self.entries) >= self.capacity:
+            # Dictionaries keep their insertion order, so the first key is the oldest.
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (depth, score, flag, bestMove)
+
+    def clear(self):
+        """Removes every entry."""
+        self.entries.clear()
+        self.hits = 0
+
+class AlphaBetaSearch:
+    """Finds the best move of a position on a board geometry with a negamax alpha-beta search.
+
+    Positions are given from the point of view of the side to move: `own` are its bits and
+    `other` are the opponent's.
+
+    Attributes:
+        geometry (bitboard.Geometry): The board the search is for.
+        table (TranspositionTable): The results of searched positions.
+        zobrist (ZobristKeys): The keys used to hash positions.
+        nodes (int): Number of positions visited by the last call of `best_move`.
+        depthReached (int): Depth of the last completed iteration of the last call of `best_move`.
+        score (int): Score of the move returned by the last call of `best_move`, for the side
+                     to move. Beyond WIN_THRESHOLD (or below -WIN_THRESHOLD) if it wins (or loses).
+
+    Methods:
+        evaluate(own, other):
+            Returns a heuristic score of a position.
+
+        best_move(own, other, maxDepth, timeLimit=None, rng=None):
+            Returns the best move for the side to move.
+    """
+    # Score of a line by the number of grids one side has in it, when the other side has none.
+    LINE_SCORES = (0, 1, 10, 100, 1000, 10000, 100000)
+    # How often, in visited positions, the clock is checked.
+    CLOCK_INTERVAL = 1024
+
+    def __init__(self, geometry, table=None):
+        self.geometry = geometry
+        self.table = table if table is not None else TranspositionTable()
+        self.zobrist = ZobristKeys(geometry.cellCount)
+        # Grids on more winning lines are tried first.
+        self.cellOrder = sorted(range(geometry.cellCount), key=lambda cell: -len(geometry.winLinesThrough[cell]))
+        self.nodes = 0
+        self.depthReached = 0
+        self.score = 0
+        self._deadline = None
+
+    def evaluate(self, own, other):
+        """Returns a heuristic score of the position for the side owning `own`: the lines only
+        it can still complete count for it, the lines only the opponent can still complete
+        count against it."""
+        score = 0
+        lineScores = self.LINE_SCORES
+        for line in self.geometry.winLines:
+            ownCount = bit_count(own & line)
+            otherCount = bit_count(other & line)
+            if otherCount == 0:
+                score += lineScores[min(ownCount, len(lineScores) - 1)]
+            elif ownCount == 0:
+                score -= lineScores[min(otherCount, len(lineScores) - 1)]
+        return score
+
+    def ordered_moves(self, own, other, firstMove=None):
+        """Returns the free grids of the position, `firstMove` first."""
+        taken = own | other
+        moves = [cell for cell in self.cellOrder if not taken >> cell & 1]
+        if firstMove is not None and firstMove in moves:
+            moves.remove(firstMove)
+            moves.insert(0, firstMove)
+        return moves
+
+    def negamax(self, own, other, key, depth, alpha, beta, ply):
+        """Returns the score of the position for the side owning `own`, searched `depth` plies
+        deep. `key` is the position's hash, and `ply` the number of moves from the root.
+
+        Raises:
+            SearchTimeout: The time budget is spent.
+        """
+        self.nodes += 1
+        if self._deadline is not None and self.nodes % self.CLOCK_INTERVAL == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        if (own | other) == self.geometry.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(own, other)
+
+        originalAlpha = alpha
+        entry = self.table.get(key)
+        firstMove = None
+        if entry is not None:
+            entryDepth, score, flag, firstMove = entry
+            if entryDepth >= depth:
+                # Wins are stored as distances from the stored position, not from the root.
+                if score > WIN_THRESHOLD:
+                    score -= ply
+                elif score < -WIN_THRESHOLD:
+                    score += ply
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER_BOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        cells = self.zobrist.cells
+        sideKey = self.zobrist.sideKey
+        # The side to move at the root is side 0 of the hashes, so `own` is side 0 on even plies.
+        side = ply & 1
+        bestScore, bestMove = -WIN_SCORE - 1, None
+        for cell in self.ordered_moves(own, other, firstMove):
+            if self.geometry.wins_with(own, cell):
+                score = WIN_SCORE - ply - 1
+            else:
+                score = -self.negamax(other, own | 1 << cell, key ^ cells[side][cell] ^ sideKey,
+                                      depth - 1, -beta, -alpha, ply + 1)
+            if score > bestScore:
+                bestScore, bestMove = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if bestScore <= originalAlpha:
+            flag = UPPER_BOUND
+        elif bestScore >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        storedScore = bestScore
+        if storedScore > WIN_THRESHOLD:
+            storedScore += ply
+        elif storedScore < -WIN_THRESHOLD:
+            storedScore -= ply
+        self.table.store(key, depth, storedScore, flag, bestMove)
+        return bestScore
+
+    def best_move(self, own, other, maxDepth, timeLimit=None, rng=None):
+        """Returns the best move for the side owning `own`, with iterative deepening: the
+        position is searched 1 ply deep, then 2 plies deep, and so on until `maxDepth` plies,
+        or until `timeLimit` seconds are spent. The move of the deepest completed search is
+        returned.
+
+        Args:
+            own (int): Bitboard of the side to move.
+            other (int): Bitboard of the opponent.
+            maxDepth (int): The maximum depth of the search.
+            timeLimit (float): The time budget in seconds. None for no limit. Defaults None.
+            rng (random.Random): If given, moves with the same score are chosen at random.
+        Returns:
+            int: The bit of the best move. None if the board is full.
+        """
+        moves = self.ordered_moves(own, other)
+        if len(moves) == 0:
+            return None
+        # The side to move at the root is side 0 of the hashes. The computer is always the side
+        # to move at the root, so the hashes of its searches agree across moves and games.
+        rootKey = self.zobrist.hash(own, other)
+        self.nodes = 0
+        self.depthReached = 0
+        self.score = 0
+        self._deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+        bestMove = moves[0]
+        for cell in moves:
+            # Take a win straight away.
+            if self.geometry.wins_with(own, cell):
+                self.depthReached = 1
+                self.score = WIN_SCORE - 1
+                return cell
+        try:
+            for depth in range(1, min(maxDepth, len(moves)) + 1):
+                bestScore, candidates = self._search_root(own, other, rootKey, depth, moves)
+                bestMove = rng.choice(candidates) if rng is not None else candidates[0]
+                self.depthReached = depth
+                self.score = bestScore
+                if abs(bestScore) > WIN_THRESHOLD:
+                    # The game is decided, searching deeper will not change the move.
+                    break
+                # The best move of this iteration is tried first in the next one.
+                moves.remove(bestMove)
+                moves.insert(0, bestMove)
+        except SearchTimeout:
+            pass
+        finally:
+            self._deadline = None
+        return bestMove
+
+    def _search_root(self, own, other, rootKey, depth, moves):
+        """Searches every move of the root position `depth` plies deep.
+
+        Returns:
+            tuple: The best score in tuple[0], and the moves with that score in tuple[1].
+        """
+        cells = self.zobrist.cells
+        sideKey = self.zobrist.sideKey
+        bestScore, candidates = -WIN_SCORE - 1, []
+        for cell in moves:
+            # Positions are slow to evaluate on large boards, so the clock is checked for every
+            # root move too. The first iteration is always completed, so there is a move.
+            if self._deadline is not None and depth > 1 and time.perf_counter() > self._deadline:
+                raise SearchTimeout()
+            # A window just below the best score, so that the moves as good as the best one are
+            # scored exactly and can be told apart from the worse ones.
+            alpha = bestScore - 1 if candidates else -WIN_SCORE - 1
+            score = -self.negamax(other, own | 1 << cell, rootKey ^ cells[0][cell] ^ sideKey,
+                                  depth - 1, -(WIN_SCORE + 1), -alpha, 1)
+            if score > bestScore:
+                bestScore, candidates = score, [cell]
+            elif score == bestScore:
+                candidates.append(cell)
+        return bestScore, candidates
+
+_SEARCHES = {}
+
+def get_search(geometry):
+    """Returns the AlphaBetaSearch of `geometry`. Every search is only built once, so its
+    transposition table is kept across moves and games."""
+    if geometry not in _SEARCHES:
+        _SEARCHES[geometry] = AlphaBetaSearch(geometry)
+    return _SEARCHES[geometry]
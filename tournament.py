@@ -0,0 +1,230 @@
+"""Self-play tournaments between Tic Tac Toe computer players, to tune the difficulty levels
+without human testers.
+
+Run `python tournament.py hard easy --games 1000 --report report.json` to play 1000 games
+between the 'hard' and 'easy' players, and write their win, loss and tie rates and the
+percentiles of the time they took per move. The games are played headlessly (see
+`minigames.TicTacToe.play_headless`) by a pool of worker processes.
+
+A player is given as a string:
+    '<difficulty>': The computer player of that difficulty, eg. 'easy' or 'hard'.
+    'mcts:<difficulty>': The Monte Carlo tree search player with the time limit of that
+                         difficulty, eg. 'mcts:medium'.
+    'random': Plays any available grid.
+    'script:<moves>': A scripted player, playing the comma separated grids in order, eg.
+                      'script:13,7,19'. When its next grid is taken, it plays the lowest
+                      available grid.
+
+Every game is seeded with the tournament's seed and the game's number, so the players that
+are not limited by time play the same games every time.
+
+Functions:
+    make_player(spec, size, winLength):
+        Returns the mover of a player, for `TicTacToe.play_headless`.
+
+    run_tournament(firstSpec, secondSpec, games, ...):
+        Plays games between 2 players and returns the report.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import json
+import math
+import os
+import random
+import time
+import minigames
+import tictactoe_search
+
+def make_player(spec, size=5, winLength=4, seed=None):
+    """Returns the mover of the player `spec` (see the module's documentation), a function
+    taking the game and who is to move, and returning the move.
+
+    Args:
+        spec (str): The player, see the module's documentation.
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        seed (int): Seed of the Monte Carlo player's playouts. Other players use the `random`
+                    module. Defaults None (not reproducible).
+    Raises:
+        ValueError: `spec` is not a player.
+    """
+    kind, _, argument = spec.partition(':')
+    if kind == 'random':
+        return lambda game, who: random.choice(sorted(game.gridAvailable))
+    if kind == 'script':
+        try:
+            script = [int(move) for move in argument.split(',') if move.strip() != '']
+        except ValueError:
+            raise ValueError("A scripted player needs comma separated grids, not `%s`." % argument)
+        def scripted(game, who):
+            for move in script:
+                if move in game.gridAvailable:
+                    return move
+            return min(game.gridAvailable)
+        return scripted
+    if kind == 'mcts':
+        if tictactoe_search.DIFFICULTIES.get(argument) is None:
+            raise ValueError("The Monte Carlo player needs a difficulty with a time limit, not `%s`." % argument)
+        engine = minigames.TicTacToe(argument, size, winLength, engine='mcts')
+        # Every game already runs in its own worker process.
+        engine.mctsPlayer.workers = 1
+        engine.mctsPlayer.rng.seed(seed)
+    elif argument == '':
+        engine = minigames.TicTacToe(kind, size, winLength)
+    else:
+        raise ValueError("Unknown player `%s`." % spec)
+    engine.set_up_game()
+    def computer(game, who):
+        # The engine always plays as the computer, so the sides are swapped for the player.
+        if who == 'computer':
+            engine.computerBits, engine.playerBits = game.computerBits, game.playerBits
+        else:
+            engine.computerBits, engine.playerBits = game.playerBits, game.computerBits
+        engine.gridAvailable = game.gridAvailable
+        return engine.get_move('computer')
+    return computer
+
+def play_games(firstSpec, secondSpec, gameNumbers, seed, size, winLength):
+    """Plays the games `gameNumbers` between 2 players. Runs in the worker processes of
+    `run_tournament`. The first player moves first in even games, the second in odd games.
+
+    Returns:
+        list: A tuple (result, firstLatencies, secondLatencies) for every game, where result
+              is 'win', 'loss' or 'tie' for the first player, and the latencies are the
+              times, in seconds, each player took for its moves.
+    """
+    game = minigames.TicTacToe('easy', size, winLength)
+    records = []
+    for gameNumber in gameNumbers:
+        # The players use the `random` module, so it is seeded for every game, and the Monte
+        # Carlo players are made again with seeds of the game, whatever worker plays it.
+        gameSeed = seed * 1000003 + gameNumber
+        random.seed(gameSeed)
+        movers = [make_player(firstSpec, size, winLength, 2 * gameSeed),
+                  make_player(secondSpec, size, winLength, 2 * gameSeed + 1)]
+        latencies = [[], []]
+        def timed_mover(idx):
+            def mover(game, who):
+                start = time.perf_counter()
+                move = movers[idx](game, who)
+                latencies[idx].append(time.perf_counter() - start)
+                return move
+            return mover
+        firstSide = 'player' if gameNumber % 2 == 0 else 'computer'
+        secondSide = 'computer' if firstSide == 'player' else 'player'
+        result = game.play_headless({firstSide: timed_mover(0), secondSide: timed_mover(1)})
+        if result == 'tie':
+            records.append(('tie', latencies[0], latencies[1]))
+        else:
+            records.append(('win' if result == firstSide + ' won' else 'loss', latencies[0], latencies[1]))
+    return records
+
+def percentile(values, fraction):
+    """Returns the `fraction` percentile of `values` (nearest rank). 0 if there are none."""
+    if len(values) == 0:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+def latency_summary(latencies):
+    """Returns the mean, 50th, 90th, 99th percentile and maximum of `latencies`, in milliseconds."""
+    return {
+        'moves': len(latencies),
+        'mean_ms': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50_ms': 1000 * percentile(latencies, 0.5),
+        'p90_ms': 1000 * percentile(latencies, 0.9),
+        'p99_ms': 1000 * percentile(latencies, 0.99),
+        'max_ms': 1000 * max(latencies, default=0.0),
+    }
+
+def run_tournament(firstSpec, secondSpec, games, workers=None, seed=0, size=5, winLength=4, chunkSize=16):
+    """Plays `games` games between 2 players with a pool of worker processes. The players take
+    turns to move first.
+
+    Args:
+        firstSpec (str): The first player, see the module's documentation.
+        secondSpec (str): The second player.
+        games (int): Number of games to play.
+        workers (int): Number of worker processes. Defaults to the number of CPUs.
+        seed (int): Seed of the games.
+        size (int): Number of rows (and columns) of the board.
+        winLength (int): Number of grids in a line needed to win.
+        chunkSize (int): Number of games given to a worker at a time.
+    Returns:
+        dict: The report, with the rates of the first player's wins, losses and ties, and a
+              latency summary for each player.
+    Raises:
+        ValueError: A player is not a valid player.
+    """
+    # Fail here rather than in every worker.
+    make_player(firstSpec, size, winLength)
+    make_player(secondSpec, size, winLength)
+    records = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_games, firstSpec, secondSpec, range(start, min(start + chunkSize, games)),
+                                   seed, size, winLength)
+                   for start in range(0, games, chunkSize)]
+        for future in futures:
+            records.extend(future.result())
+    counts = {'win': 0, 'loss': 0, 'tie': 0}
+    firstLatencies, secondLatencies = [], []
+    for result, first, second in records:
+        counts[result] += 1
+        firstLatencies.extend(first)
+        secondLatencies.extend(second)
+    return {
+        'first': firstSpec,
+        'second': secondSpec,
+        'games': games,
+        'size': size,
+        'win_length': winLength,
+        'seed': seed,
+        'first_win_rate': counts['win'] / games if games else 0.0,
+        'first_loss_rate': counts['loss'] / games if games else 0.0,
+        'tie_rate': counts['tie'] / games if games else 0.0,
+        'first_latency': latency_summary(firstLatencies),
+        'second_latency': latency_summary(secondLatencies),
+    }
+
+def write_report(report, path):
+    """Writes `report` to `path`, as CSV if the path ends with '.csv', as JSON otherwise."""
+    if os.path.splitext(path)[1].lower() == '.csv':
+        # One row, with the latency summaries flattened into columns.
+        row = {}
+        for key, value in report.items():
+            if isinstance(value, dict):
+                for subKey, subValue in value.items():
+                    row['%s_%s' % (key, subKey)] = subValue
+            else:
+                row[key] = value
+        with open(path, mode='w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(row))
+            writer.writeheader()
+            writer.writerow(row)
+    else:
+        with open(path, mode='w') as f:
+            json.dump(report, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays Tic Tac Toe games between 2 computer players.")
+    parser.add_argument('first', help="The first player, eg. 'hard', 'mcts:medium', 'random' or 'script:13,7'.")
+    parser.add_argument('second', help="The second player.")
+    parser.add_argument('--games', type=int, default=100, help="Number of games. Defaults 100.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes. Defaults all CPUs.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the games. Defaults 0.")
+    parser.add_argument('--size', type=int, default=5, help="Number of rows and columns of the board. Defaults 5.")
+    parser.add_argument('--win-length', type=int, default=4, help="Number of grids in a line to win. Defaults 4.")
+    parser.add_argument('--report', default=None, help="Write the report to this .json or .csv file.")
+    args = parser.parse_args()
+    try:
+        report = run_tournament(args.first, args.second, args.games, args.workers, args.seed,
+                                args.size, args.win_length)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.report is not None:
+        write_report(report, args.report)
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,17 @@ Functions:
     separate_first_from_last(s):
         Separates the very first word from the rest of the string, and condenses all whitespace in
         string to only 1 whitespace.
+
+    get_numpy():
+        Returns the numpy module, importing it the first time. None if NumPy is not installed.
+
+    bit_count(bits):
+        Returns the number of set bits in the integer `bits`.
 """
+# The numpy module once it had been imported, see `get_numpy`.
+_numpy = None
+_numpyImported = False
+
 def print_quit_message():
     # This function is here so that I can customise the quit message easily.
     print("You quit the game. Thank you and goodbye.")
@@ -28,4 +38,30 @@ def separate_first_from_last(s):
         raise ValueError('No last.')
     first = inputWords[0]
     last = ' '.join(inputWords[1:])
-    return first, last
\ No newline at end of file
+    return first, last
+
+def get_numpy():
+    """Returns the numpy module, importing it the first time it is asked for. NumPy is optional,
+    and importing it takes longer than starting the rest of the game, so it is only imported
+    by the code that is about to use it.
+
+    Returns:
+        module: numpy. None if NumPy is not installed.
+    """
+    global _numpy, _numpyImported
+    if not _numpyImported:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+        _numpyImported = True
+    return _numpy
+
+def bit_count(bits):
+    """Returns the number of set bits in the integer `bits`."""
+    return bin(bits).count('1')
+
+if hasattr(int, 'bit_count'):
+    # int.bit_count is only available from Python 3.10 onwards, and is much faster.
+    bit_count = int.bit_count
@@ -0,0 +1,426 @@
+"""Word list storage used by the word games (eg. Hangman).
+
+Classes:
+    WordStore:
+        An indexed, array-backed collection of words, bucketed by word length and by
+        the number of different letters in a word.
+
+    MappedWordStore:
+        A WordStore that reads its words straight out of a compiled dictionary buffer.
+
+Functions:
+    letter_count(word):
+        Returns the number of different letters in `word`.
+
+    sort_key(word):
+        The key that orders words inside a WordStore.
+
+    compile_words(store, sourceMtime=0, sourceSize=0):
+        Compiles a WordStore into the binary dictionary format.
+
+    load_words(path, sharedName=None):
+        Loads the words in the text file `path`, through its compiled cache or a shared
+        memory segment if possible.
+
+    publish_shared(path, name=None):
+        Copies the compiled dictionary of `path` into a new shared memory segment.
+
+    attach_shared(name):
+        Attaches read-only to a shared memory segment made by `publish_shared`.
+
+The compiled dictionary format (all numbers little-endian):
+    header: magic b'HMWD', version (uint16), reserved (uint16), modification time of the
+            source file in nanoseconds (int64), size of the source file (int64), number
+            of words (uint32), number of buckets (uint32).
+    bucket table: for each bucket, length (uint16), letter count (uint16), start (uint32)
+                  and end (uint32).
+    offset table: number of words + 1 offsets (uint32) into the blob.
+    blob: all the words, sorted with `sort_key`, encoded in ASCII without separators.
+"""
+import array
+import bisect
+import mmap
+from multiprocessing import shared_memory
+import os
+import random
+import struct
+import sys
+
+MAGIC = b'HMWD'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqqII')
+BUCKET = struct.Struct('<HHII')
+# Worker processes attach to the shared memory segment named in this environment variable.
+SHARED_ENV_VAR = 'HANGMAN_SHARED_DICTIONARY'
+
+def letter_count(word):
+    """Returns the number of different letters in `word`. The more different letters a
+    word has, the more guesses it takes to find it in Hangman."""
+    return len(set(word))
+
+def sort_key(word):
+    """The key that orders words inside a WordStore.
+
+    Words are sorted by length first, then by the number of different letters, and
+    then alphabetically, so that each (length, letter count) bucket is a contiguous
+    range of the store.
+    """
+    return (len(word), letter_count(word), word)
+
+class WordStore:
+    """An indexed, array-backed collection of words.
+
+    The words are kept in one list sorted with `sort_key`, so every bucket of words with
+    the same length (and the same number of different letters) is a contiguous range of
+    indices. Picking a random word from any bucket is then just picking a random index.
+
+    Attributes:
+        words (list): All the words in the store, sorted with `sort_key`.
+        buckets (dict): Maps a tuple (length, letter count) to a tuple (start, end), the range
+                        of indices in `words` having that length and letter count.
+        lengths (dict): Maps a word length to a tuple (start, end), the range of indices in
+                        `words` having that length.
+
+    Methods:
+        random_word(length=None, letters=None, rng=random):
+            Picks a random word in constant time, optionally with a certain length and/or
+            number of different letters.
+
+        word_range(length=None, letters=None):
+            Returns the ranges of indices of the words that fit the given filters.
+
+        length_block(length):
+            Returns the characters of all the words of a length, one word after another.
+    """
+    def __init__(self, words):
+        """Initialise the store with an iterable of words. Duplicates are removed."""
+        self.words = sorted(set(words), key=sort_key)
+        self.buckets = {}
+        self.lengths = {}
+        for idx, word in enumerate(self.words):
+            key = (len(word), letter_count(word))
+            if key not in self.buckets:
+                self.buckets[key] = (idx, idx + 1)
+            else:
+                self.buckets[key] = (self.buckets[key][0], idx + 1)
+            if len(word) not in self.lengths:
+                self.lengths[len(word)] = (idx, idx + 1)
+            else:
+                self.lengths[len(word)] = (self.lengths[len(word)][0], idx + 1)
+        self._build_letter_index()
+
+    def _build_letter_index(self):
+        """Groups the buckets by letter count, so that filtering by letter count alone does
+        not need to look at every bucket. Called once the buckets are known."""
+        # self.byLetters[letters] is a tuple of (ranges, cumulative sizes of ranges).
+        self.byLetters = {}
+        for (length, letters), (start, end) in sorted(self.buckets.items()):
+            ranges, sizes = self.byLetters.setdefault(letters, ([], []))
+            ranges.append((start, end))
+            sizes.append((sizes[-1] if sizes else 0) + end - start)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, idx):
+        return self.words[idx]
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __contains__(self, word):
+        start, end = self.buckets.get((len(word), letter_count(word)), (0, 0))
+        # Words in a bucket are sorted alphabetically.
+        idx = bisect.bisect_left(self, word, start, end)
+        return idx < end and self[idx] == word
+
+    def word_range(self, length=None, letters=None):
+        """Returns the ranges of indices of the words that fit the given filters.
+
+        Args:
+            length (int): The length of the words. Defaults None (any length).
+            letters (int): The number of different letters in the words. Defaults None
+                           (any number of letters).
+        Returns:
+            list: A list of tuples (start, end), each being a range of indices in the store.
+        """
+        if length is not None and letters is not None:
+            ranges = [self.buckets[(length, letters)]] if (length, letters) in self.buckets else []
+        elif length is not None:
+            ranges = [self.lengths[length]] if length in self.lengths else []
+        elif letters is not None:
+            ranges = list(self.byLetters[letters][0]) if letters in self.byLetters else []
+        else:
+            ranges = [(0, len(self))] if len(self) != 0 else []
+        return ranges
+
+    def length_block(self, length):
+        """Returns the characters of all the words of `length` letters, one word after another,
+        as a bytes-like object. Since every word has the same length, this can be seen as a
+        matrix with one word per row.
+
+        Args:
+            length (int): The length of the words.
+        Returns:
+            bytes: The ASCII characters of the words, in the order of the store.
+        """
+        start, end = self.lengths.get(length, (0, 0))
+        return ''.join(self.words[start:end]).encode('ascii')
+
+    def random_word(self, length=None, letters=None, rng=random):
+        """Picks a random word, optionally with a certain length and/or number of different
+        letters. Runs in constant time, except when filtering by `letters` alone, which takes
+        O(log L) time, L being the number of different word lengths.
+
+        Args:
+            length (int): The length of the word. Defaults None (any length).
+            letters (int): The number of different letters in the word. Defaults None (any
+                           number of letters).
+            rng (random.Random): Source of randomness. Defaults the `random` module.
+        Returns:
+            str: The chosen word.
+        Raises:
+            LookupError: No word fits the given filters.
+        """
+        if length is None and letters is not None:
+            if letters not in self.byLetters:
+                raise LookupError("No word has %d different letters." % letters)
+            ranges, sizes = self.byLetters[letters]
+            pick = rng.randrange(sizes[-1])
+            which = bisect.bisect_right(sizes, pick)
+            before = sizes[which - 1] if which > 0 else 0
+            return self[ranges[which][0] + pick - before]
+        ranges = self.word_range(length, letters)
+        if len(ranges) == 0:
+            raise LookupError("No word fits the given length and number of letters.")
+        start, end = ranges[0]
+        return self[rng.randrange(start, end)]
+
+class MappedWordStore(WordStore):
+    """A WordStore that reads its words straight out of a compiled dictionary buffer (see
+    `compile_words`), usually a memory-mapped file. Only the small bucket table is read when
+    the store is created; a word is only turned into a string when it is asked for.
+
+    Inherits from WordStore.
+    Attributes defined here:
+        buffer (buffer): The buffer holding the compiled dictionary.
+        offsets (memoryview): The offset table of the compiled dictionary.
+        blob (memoryview): The words of the compiled dictionary.
+        sourceMtime (int): Modification time of the source text file, in nanoseconds.
+        sourceSize (int): Size of the source text file, in bytes.
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError("Not a compiled dictionary.")
+        magic, version, _, self.sourceMtime, self.sourceSize, wordCount, bucketCount = \
+            HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a compiled dictionary.")
+        pos = HEADER.size
+        offsetsEnd = pos + BUCKET.size * bucketCount + 4 * (wordCount + 1)
+        if len(view) < offsetsEnd:
+            # Eg. the file was cut short while it was written.
+            raise ValueError("The compiled dictionary is truncated.")
+        self.buckets = {}
+        self.lengths = {}
+        for length, letters, start, end in BUCKET.iter_unpack(view[pos:pos + BUCKET.size * bucketCount]):
+            self.buckets[(length, letters)] = (start, end)
+            if length not in self.lengths:
+                self.lengths[length] = (start, end)
+            else:
+                self.lengths[length] = (min(self.lengths[length][0], start), max(self.lengths[length][1], end))
+        pos += BUCKET.size * bucketCount
+        if sys.byteorder == 'little':
+            self.offsets = view[pos:offsetsEnd].cast('I')
+        else:
+            # Rare, but the file is little-endian. This copies the offset table.
+            offsets = array.array('I', view[pos:offsetsEnd])
+            offsets.byteswap()
+            self.offsets = memoryview(offsets)
+        self.blob = view[offsetsEnd:]
+        self.wordCount = wordCount
+        # A shared memory segment may be longer than the dictionary, but never shorter.
+        if self.offsets[wordCount] > len(self.blob) or any(end > wordCount for _, end in self.buckets.values()):
+            self.offsets.release()
+            self.blob.release()
+            raise ValueError("The compiled dictionary is truncated.")
+        self._build_letter_index()
+
+    def __len__(self):
+        return self.wordCount
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.wordCount
+        if not 0 <= idx < self.wordCount:
+            raise IndexError("word index out of range")
+        return str(self.blob[self.offsets[idx]:self.offsets[idx + 1]], 'ascii')
+
+    def __iter__(self):
+        for idx in range(self.wordCount):
+            yield self[idx]
+
+    def length_block(self, length):
+        """Returns the characters of all the words of `length` letters, see
+        `WordStore.length_block`. This is a view on the buffer; nothing is copied."""
+        start, end = self.lengths.get(length, (0, 0))
+        return self.blob[self.offsets[start]:self.offsets[end]]
+
+    def release(self):
+        """Releases the views on the buffer, so that the buffer can be closed."""
+        self.offsets.release()
+        self.blob.release()
+        if isinstance(self.buffer, memoryview):
+            self.buffer.release()
+        if getattr(self, 'segment', None) is not None:
+            self.segment.close()
+            self.segment = None
+
+def compile_words(store, sourceMtime=0, sourceSize=0):
+    """Compiles a WordStore into the binary dictionary format described in this module's
+    docstring.
+
+    Args:
+        store (WordStore): The words to compile.
+        sourceMtime (int): Modification time of the source text file, in nanoseconds.
+        sourceSize (int): Size of the source text file, in bytes.
+    Returns:
+        bytes: The compiled dictionary.
+    Raises:
+        ValueError: A word is not ASCII.
+    """
+    blob = ''.join(store).encode('ascii', errors='strict')
+    offsets = array.array('I', [0])
+    for word in store:
+        offsets.append(offsets[-1] + len(word))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    buckets = b''.join(BUCKET.pack(length, letters, start, end)
+                       for (length, letters), (start, end) in sorted(store.buckets.items()))
+    return b''.join([HEADER.pack(MAGIC, VERSION, 0, sourceMtime, sourceSize, len(store), len(store.buckets)),
+                     buckets, offsets.tobytes(), blob])
+
+def cache_path(path):
+    """Returns the path of the compiled cache of the dictionary text file `path`."""
+    return os.path.splitext(path)[0] + '.bin'
+
+def map_compiled(path):
+    """Memory-maps the compiled dictionary at `path` read-only.
+
+    Args:
+        path (str): Path to the compiled dictionary.
+    Returns:
+        MappedWordStore: The words in the compiled dictionary.
+    Raises:
+        OSError: The file cannot be opened or mapped.
+        ValueError: The file is not a compiled dictionary, or it is truncated.
+    """
+    with open(path, mode='rb') as f:
+        # The mapping stays valid after the file is closed.
+        return MappedWordStore(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def read_words(path):
+    """Reads a text file with a list of words separated by newlines into a WordStore."""
+    words = []
+    with open(path, mode='r') as f:
+        while (word := f.readline()) != '':
+            if word.strip() != '':
+                words.append(word.strip().lower())
+    return WordStore(words)
+
+def publish_shared(path, name=None):
+    """Copies the compiled dictionary of the text file `path` into a new shared memory segment,
+    so that many worker processes can read the same copy of the words with `attach_shared`.
+    The caller owns the segment: it must be kept open while workers use it, and `unlink`ed
+    when they are done.
+
+    Args:
+        path (str): Path to a text file with a list of words separated by newlines.
+        name (str): Name of the segment. Defaults None (a random name is chosen).
+    Returns:
+        multiprocessing.shared_memory.SharedMemory: The segment. Its name is `segment.name`.
+    """
+    compiled = compile_words(load_words(path))
+    segment = shared_memory.SharedMemory(name=name, create=True, size=len(compiled))
+    segment.buf[:len(compiled)] = compiled
+    return segment
+
+def attach_shared(name):
+    """Attaches read-only to a shared memory segment made by `publish_shared`. No word is
+    copied into the process until it is asked for.
+
+    Args:
+        name (str): Name of the segment.
+    Returns:
+        MappedWordStore: The words in the segment. The store keeps the segment attached in its
+                         `segment` attribute.
+    Raises:
+        FileNotFoundError: No segment is named `name`.
+    """
+    try:
+        segment = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13, attaching registers the segment with the resource tracker, which
+        # would destroy it when the tracker's processes exit, even though the host still owns it.
+        # Workers started by the host share its tracker, where the segment is already
+        # registered, so registering again does nothing; unregistering would drop the host's
+        # own registration. So the segment is only unregistered from a tracker started here.
+        from multiprocessing import resource_tracker
+        trackerShared = getattr(getattr(resource_tracker, '_resource_tracker', None), '_fd', None) is not None
+        segment = shared_memory.SharedMemory(name=name)
+        if not trackerShared:
+            resource_tracker.unregister(segment._name, 'shared_memory')
+    store = MappedWordStore(segment.buf.toreadonly())
+    store.segment = segment
+    return store
+
+def load_words(path, sharedName=None):
+    """Loads the words in the text file `path`. The words are read from a compiled cache next
+    to the text file if the cache is up to date, so loading does not depend on the number of
+    words. Otherwise, the text file is read and the cache is rebuilt.
+
+    The cache is mapped read-only, so processes on the same machine already share its pages.
+    If `sharedName` is given, the words are read from that shared memory segment instead (see
+    `publish_shared`), and `path` is not touched.
+
+    Args:
+        path (str): Path to a text file with a list of words separated by newlines.
+        sharedName (str): Name of a shared memory segment holding the compiled words. Defaults
+                          None.
+    Returns:
+        WordStore: The words in `path`. This is a MappedWordStore unless the cache cannot be
+                   written (eg. a read-only directory).
+    Raises:
+        FileNotFoundError: `path` does not exist, or no segment is named `sharedName`.
+    """
+    if sharedName is not None:
+        return attach_shared(sharedName)
+    source = os.stat(path)
+    cachePath = cache_path(path)
+    try:
+        store = map_compiled(cachePath)
+    except (OSError, ValueError, struct.error):
+        # No cache yet, or the cache is broken.
+        pass
+    else:
+        if store.sourceMtime == source.st_mtime_ns and store.sourceSize == source.st_size:
+            return store
+        store.release()
+    store = read_words(path)
+    try:
+        compiled = compile_words(store, source.st_mtime_ns, source.st_size)
+        # Write to a temporary file first, so that other processes never see half a cache.
+        tempPath = '%s.%d.tmp' % (cachePath, os.getpid())
+        try:
+            with open(tempPath, mode='wb') as f:
+                f.write(compiled)
+            os.replace(tempPath, cachePath)
+        finally:
+            # Once replaced, the temporary file is gone; otherwise do not leave it behind.
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+        return map_compiled(cachePath)
+    except (OSError, ValueError):
+        return store